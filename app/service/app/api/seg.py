@@ -12,7 +12,7 @@ import shutil
 import requests
 from concurrent.futures import ThreadPoolExecutor
 
-from app.core.response import success_response, error_response
+from app.core.response import success_response, array_success_response, error_response
 
 logger = logging.getLogger(__name__)
 
@@ -826,7 +826,8 @@ async def merged_patches(
         if merged_annotations is None:
             return error_response("No patch data available", code=404)
 
-        return success_response({
+        # Polygon points are NumPy arrays, serialized by orjson with OPT_SERIALIZE_NUMPY
+        return array_success_response({
             "annotations": list(merged_annotations.values()),
             "count": len(merged_annotations)
         })
@@ -864,7 +865,7 @@ async def patches(
                 "count": 0
             })
 
-        return success_response({
+        return array_success_response({
             "annotations": list(merged_annotations.values()),
             "count": len(merged_annotations)
         })
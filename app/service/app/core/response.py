@@ -1,4 +1,5 @@
 import json
+import orjson
 from typing import Any, Optional
 import numpy as np
 
@@ -31,8 +32,7 @@ class AppResponse:
         self.data = data if data is not None else {}
         self.request_id = request_id
 
-    def to_response(self) -> Response:
-        """Convert to FastAPI Response"""
+    def _payload(self) -> dict:
         response_data = {
             "code": self.code,
             "message": self.message,
@@ -42,12 +42,27 @@ class AppResponse:
             response_data["data"] = self.data
         if self.request_id is not None:
             response_data["request_id"] = self.request_id
+        return response_data
 
+    def to_response(self) -> Response:
+        """Convert to FastAPI Response"""
+        response_data = self._payload()
         return Response(
             content=json.dumps(response_data, cls=NumpyEncoder),
             status_code=200,  # Always return 200
         )
 
+    def to_orjson_response(self) -> Response:
+        """Convert to FastAPI Response, serializing NumPy arrays natively with orjson"""
+        return Response(
+            content=orjson.dumps(
+                self._payload(),
+                default=NumpyEncoder().default,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+            ),
+            status_code=200,  # Always return 200
+        )
+
 
 # Convenient Methods
 def success_response(
@@ -62,6 +77,19 @@ def success_response(
     ).to_response()
 
 
+def array_success_response(
+        data: Any = None,
+        request_id: Optional[str] = None
+) -> Response:
+    """success_response for payloads carrying large NumPy arrays (e.g. polygon points)"""
+    return AppResponse(
+        code=0,
+        message="Success",
+        data=data,
+        request_id=request_id
+    ).to_orjson_response()
+
+
 def error_response(
         message: str,
         code: int = AppErrors.SERVER_INTERNAL_ERROR().status_code,
@@ -1,15 +1,20 @@
 import math
+import logging
 import zarr
 from zarr.sync import ThreadSynchronizer, ProcessSynchronizer
 import json
 import orjson
-from datetime import datetime
-from scipy.spatial import KDTree, Delaunay
+from datetime import datetime, timezone
+from scipy.spatial import cKDTree, Delaunay
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
 import numpy as np
 import time
 import os
+import hashlib
+import threading
 from typing import Dict, List, Optional, Any, Tuple
-from collections import OrderedDict
+from collections import Counter, OrderedDict
 import cv2
 import traceback
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -38,6 +43,47 @@ except ImportError:
     MATPLOTLIB_AVAILABLE = False
     print("[WARN] Matplotlib not installed. Polygon filtering will fallback to bounding box.")
 
+# KD trees keyed by a digest of the centroid buffer, so reloading (or reopening) an unchanged
+# segmentation gets the cached tree back. LRU bounded by approximate tree bytes,
+# since one whole-slide tree can be hundreds of MB while a small ROI tree is a few KB.
+_kd_tree_cache = OrderedDict()
+_kd_tree_cache_lock = threading.Lock()
+_kd_tree_cache_bytes = 0
+_KD_TREE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+def _kd_tree_nbytes(tree):
+    """Approximate memory held by a cKDTree: its float64 copy of the points, the index permutation and the nodes"""
+    return tree.data.nbytes + tree.indices.nbytes + getattr(tree, 'size', 0) * 96
+
+def _kd_tree_cache_get(key):
+    with _kd_tree_cache_lock:
+        entry = _kd_tree_cache.get(key)
+        if entry is None:
+            return None
+        _kd_tree_cache.move_to_end(key)
+        return entry[0]
+
+def _kd_tree_cache_put(key, tree):
+    global _kd_tree_cache_bytes
+    nbytes = _kd_tree_nbytes(tree)
+    if nbytes > _KD_TREE_CACHE_MAX_BYTES:
+        return
+    with _kd_tree_cache_lock:
+        previous = _kd_tree_cache.pop(key, None)
+        if previous is not None:
+            _kd_tree_cache_bytes -= previous[1]
+        _kd_tree_cache[key] = (tree, nbytes)
+        _kd_tree_cache_bytes += nbytes
+        while _kd_tree_cache_bytes > _KD_TREE_CACHE_MAX_BYTES:
+            _, (_, evicted_bytes) = _kd_tree_cache.popitem(last=False)
+            _kd_tree_cache_bytes -= evicted_bytes
+
+def _kd_tree_cache_clear():
+    global _kd_tree_cache_bytes
+    with _kd_tree_cache_lock:
+        _kd_tree_cache.clear()
+        _kd_tree_cache_bytes = 0
+
 def safe_load_zarr_dataset(dataset):
     """Safely load Zarr dataset, handling both scalar and array datasets"""
     try:
@@ -53,12 +99,234 @@ def safe_load_zarr_dataset(dataset):
             print(f"[WARN] Failed to load dataset even as scalar: {fallback_e}")
             return None
 
-def transform_points_numpy(points, M):
-    # points shape: (N, 2), M shape: (3, 3)
-    # BLAS-optimized NumPy implementation with maximum performance
-    # Use BLAS matrix multiplication: result = points @ M[:2, :2].T + M[:2, 2]
-    result = points @ M[:2, :2].T + M[:2, 2]
-    return result
+def read_zarr_array(array):
+    """Read a whole Zarr array into one preallocated buffer (np.array() on a Zarr array copies twice)"""
+    out = np.empty(array.shape, dtype=array.dtype)
+    array.get_basic_selection(Ellipsis, out=out)
+    return out
+
+def narrow_float64_array(arr, chunk_size=1 << 20):
+    """Return a float32 copy of a float64 array when every value survives the round trip, else arr.
+
+    Pixel-grid coordinates are exact in float32 (integers up to 2**24), so the narrowed array gives
+    back the same Python floats from tolist()/float() at half the memory. Values are cast and checked
+    `chunk_size` elements at a time, so beyond the float32 result only one chunk's temporaries are
+    alive at once, and a lossy value stops the scan early.
+    """
+    if (not isinstance(arr, np.ndarray) or arr.dtype != np.float64 or arr.size == 0
+            or not arr.flags.c_contiguous):
+        return arr
+    flat = arr.reshape(-1)
+    narrowed = np.empty(arr.shape, dtype=np.float32)
+    narrowed_flat = narrowed.reshape(-1)
+    with np.errstate(invalid='ignore', over='ignore'):
+        for start in range(0, flat.size, chunk_size):
+            block = flat[start:start + chunk_size]
+            narrowed_block = narrowed_flat[start:start + chunk_size]
+            narrowed_block[...] = block
+            if not np.array_equal(narrowed_block, block, equal_nan=True):
+                return arr
+    return narrowed
+
+def memmap_zarr_array(array):
+    """Map a Zarr array stored as one raw chunk file (DirectoryStore, no compressor/filters, C order)
+    straight from disk; returns None when the layout does not allow a zero-copy view"""
+    # Windows refuses to replace a file that is mapped, which would block re-running segmentation
+    if os.name == 'nt':
+        return None
+    try:
+        store = array.chunk_store
+        if not isinstance(store, zarr.storage.DirectoryStore):
+            return None
+        if array.compressor is not None or array.filters or array.order != 'C' or array.dtype.hasobject:
+            return None
+        if array.size == 0 or tuple(array.chunks) != tuple(array.shape):
+            return None
+        separator = getattr(array, '_dimension_separator', None) or '.'
+        chunk_key = separator.join('0' for _ in array.shape)
+        chunk_path = os.path.join(store.path, array.path, chunk_key) if array.path else os.path.join(store.path, chunk_key)
+        if not os.path.isfile(chunk_path) or os.path.getsize(chunk_path) != array.nbytes:
+            return None
+        return np.memmap(chunk_path, dtype=array.dtype, mode='r', shape=array.shape)
+    except Exception:
+        return None
+
+def zarr_array_stamp(array):
+    """(path, inode, mtime_ns) of a DirectoryStore array's directory, or None for other stores.
+
+    DirectoryStore replaces chunk and metadata files by rename, so every write bumps the directory
+    mtime; the stamp changes whenever the stored array does"""
+    try:
+        store = array.chunk_store
+        if not isinstance(store, zarr.storage.DirectoryStore):
+            return None
+        array_dir = os.path.join(store.path, array.path) if array.path else store.path
+        st = os.stat(array_dir)
+        return (os.path.abspath(array_dir), st.st_ino, st.st_mtime_ns)
+    except Exception:
+        return None
+
+ANNOTATION_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+# Row layout of get_patch_centroids_in_viewport results: [index, x, y, width, height, color, class_id].
+# Colors stay Python objects so hex/rgba strings of any length pass through untruncated
+PATCH_VIEWPORT_ROW_DTYPE = np.dtype([
+    ('index', np.int64), ('x', np.float64), ('y', np.float64),
+    ('width', np.float64), ('height', np.float64), ('color', object), ('class_id', np.int64),
+])
+
+def _fixed_width_newer_than(stamps, reference):
+    """Lexicographic `ts > reference` for stamps that all share one 'YYYY-MM-DD HH:MM:SS.f+' layout.
+
+    For a fixed-width, zero-padded layout string order equals time order, so no parsing is needed. The
+    (naive) reference is formatted to the same layout, truncated to the stamps' precision (truncation
+    keeps strict `>` exact). Returns None when the stamps do not all fit one such layout.
+    """
+    arr = np.asarray(stamps)
+    if arr.dtype.kind != 'U' or len(arr) == 0:
+        return None
+    width = arr.dtype.itemsize // 4
+    if not 21 <= width <= 26:
+        return None
+    # Shorter strings are NUL-padded to the array width, so mixed widths fail the layout check below
+    codes = arr.view(np.uint32).reshape(len(arr), width)
+    layout = np.array([ord(c) for c in '0000-00-00 00:00:00.' + '0' * (width - 20)], dtype=np.uint32)
+    digit_cols = layout == ord('0')
+    digits = codes[:, digit_cols]
+    if not (((digits >= ord('0')) & (digits <= ord('9'))).all() and (codes[:, ~digit_cols] == layout[~digit_cols]).all()):
+        return None
+    if reference.year < 1000:
+        return None
+    return arr > reference.strftime('%Y-%m-%d %H:%M:%S.%f')[:width]
+
+def timestamps_newer_than(ts_strings, reference):
+    """Vectorized `strptime(ts, ANNOTATION_TIMESTAMP_FORMAT) > reference` over annotation timestamp strings.
+
+    Missing or unparseable stamps count as newer, matching the per-annotation strptime checks. An aware
+    reference is converted to naive UTC first. Stamps in the fixed-width annotation layout are compared
+    as strings; anything else falls back to strptime per value.
+    """
+    keep = np.ones(len(ts_strings), dtype=bool)
+    present = np.fromiter((bool(ts) for ts in ts_strings), dtype=bool, count=len(ts_strings))
+    if not present.any():
+        return keep
+    if reference.tzinfo is not None:
+        reference = reference.astimezone(timezone.utc).replace(tzinfo=None)
+    present_stamps = [ts for ts in ts_strings if ts]
+    try:
+        newer = _fixed_width_newer_than(present_stamps, reference)
+    except (ValueError, TypeError):
+        newer = None
+    if newer is not None:
+        keep[present] = newer
+        return keep
+    # Hoist the method and format lookups out of the per-stamp loop
+    strptime = datetime.strptime
+    fmt = ANNOTATION_TIMESTAMP_FORMAT
+    for i in np.flatnonzero(present).tolist():
+        try:
+            keep[i] = strptime(ts_strings[i], fmt) > reference
+        except (ValueError, TypeError):
+            pass
+    return keep
+
+def unassigned_class_ids(n):
+    """Allocate n int32 class ids set to -1 (unclassified); class ids are a small enum, so int32 halves the footprint of int64"""
+    ids = np.empty(n, dtype=np.int32)
+    ids.fill(-1)
+    return ids
+
+def decode_str_array(raw):
+    """Return string data as a 1-D unicode array; byte-string arrays are decoded in a single C pass"""
+    raw = np.atleast_1d(np.asarray(raw))
+    if raw.dtype.kind == 'S':
+        return np.char.decode(raw, 'utf-8')
+    if raw.dtype.kind == 'U':
+        return raw
+    return np.array([v.decode('utf-8') if isinstance(v, (bytes, bytearray)) else str(v) for v in raw])
+
+def load_json_scalar(raw):
+    """Parse a JSON blob read from a scalar Zarr dataset.
+
+    Zarr hands the stored value back as numpy.bytes_/numpy.str_ (or a 0-d array), which orjson rejects;
+    those are converted to builtin bytes/str first. Builtin values are parsed without a copy.
+    """
+    if isinstance(raw, np.ndarray) and raw.ndim == 0:
+        raw = raw.item()
+    if isinstance(raw, bytes):
+        if type(raw) is not bytes:
+            raw = bytes(raw)
+    elif isinstance(raw, str):
+        if type(raw) is not str:
+            raw = str(raw)
+    return orjson.loads(raw)
+
+def polygon_points_and_bounds(contour, as_array=False):
+    """Return a (K, 2) contour as a list of [x, y] floats plus its minX/minY/maxX/maxY bounds.
+
+    The points are converted to float64 once and the bounds come from two axis reductions. With
+    `as_array` the points stay a float64 ndarray for callers whose responses are serialized by orjson
+    with OPT_SERIALIZE_NUMPY.
+    """
+    coords = np.asarray(contour, dtype=np.float64).reshape(-1, 2)
+    min_x, min_y = coords.min(axis=0).tolist()
+    max_x, max_y = coords.max(axis=0).tolist()
+    points = coords if as_array else coords.tolist()
+    return points, {"minX": min_x, "minY": min_y, "maxX": max_x, "maxY": max_y}
+
+def fill_patch_mask(coords, min_x, min_y, height, width):
+    """Rasterize the union of inclusive [x1, x2] x [y1, y2] patch rectangles into a (height, width) uint8 mask.
+
+    Each rectangle adds +1/-1 at its four corners of a difference image; two running sums turn that
+    into per-pixel coverage, so the fill is two array passes however many patches there are. The
+    sums may wrap in between, but the final coverage counts are exact: they are bounded by the
+    number of rectangles, which picks int16 or int32.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 4)
+    x1 = np.trunc(coords[:, 0] - min_x).astype(np.int64)
+    y1 = np.trunc(coords[:, 1] - min_y).astype(np.int64)
+    x2 = np.minimum(np.trunc(coords[:, 2] - min_x).astype(np.int64) + 1, width)
+    y2 = np.minimum(np.trunc(coords[:, 3] - min_y).astype(np.int64) + 1, height)
+    # Empty rectangles fill nothing, as empty slices would
+    keep = (x2 > x1) & (y2 > y1)
+    x1, y1, x2, y2 = x1[keep], y1[keep], x2[keep], y2[keep]
+
+    count_dtype = np.int16 if len(x1) <= np.iinfo(np.int16).max else np.int32
+    coverage = np.zeros((height + 1, width + 1), dtype=count_dtype)
+    np.add.at(coverage, (y1, x1), 1)
+    np.add.at(coverage, (y1, x2), -1)
+    np.add.at(coverage, (y2, x1), -1)
+    np.add.at(coverage, (y2, x2), 1)
+    np.cumsum(coverage, axis=0, dtype=count_dtype, out=coverage)
+    np.cumsum(coverage, axis=1, dtype=count_dtype, out=coverage)
+    return (coverage[:height, :width] > 0).astype(np.uint8)
+
+def index_manual_annotations(manual_annots):
+    """Map patch index -> manual annotation dict for the usable entries of a tissue_annotations dict.
+
+    Keys are decimal strings or ints; as with a per-patch lookup, the str key wins unless its value is None.
+    """
+    by_index = {}
+    for key in manual_annots:
+        if isinstance(key, str):
+            try:
+                patch_idx = int(key)
+            except ValueError:
+                continue
+            if str(patch_idx) != key:
+                continue
+        elif isinstance(key, (int, np.integer)):
+            patch_idx = int(key)
+        else:
+            continue
+        if patch_idx in by_index:
+            continue
+        manual = manual_annots.get(str(patch_idx))
+        if manual is None:
+            manual = manual_annots.get(patch_idx)
+        if manual and isinstance(manual, dict):
+            by_index[patch_idx] = manual
+    return by_index
 
 def is_file_locked(file_path):
     """check if zarr file is locked"""
@@ -181,7 +449,7 @@ def get_user_annotation_indices(file_path: str) -> Dict[str, List[int]]:
                 else:
                     json_str = '{}'
                 try:
-                    annotations_dict = json.loads(json_str)
+                    annotations_dict = load_json_scalar(json_str)
                     if isinstance(annotations_dict, dict):
                         for k in annotations_dict.keys():
                             try:
@@ -201,6 +469,8 @@ def clear_all_caches_and_reset_handler():
 
     _annotations_data = {}
 
+    _kd_tree_cache_clear()
+
     # No Zarr cache to clear
 
     try:
@@ -252,7 +522,7 @@ def query_viewport(handler: "SegmentationHandler",
             (x1 <= centroids_x) & (centroids_x <= x2) &
             (y1 <= centroids_y) & (centroids_y <= y2)
         )
-        indices_in_bbox = np.where(in_bbox_mask)[0]
+        indices_in_bbox = np.flatnonzero(in_bbox_mask)
 
         if len(indices_in_bbox) > 0:
             # 2. If Polygon points provided, perform PIP test using backend centroids and frontend polygon
@@ -264,7 +534,7 @@ def query_viewport(handler: "SegmentationHandler",
                     polygon_path = Path(polygon_points)
                     tolerance_radius = -1e-9
                     is_inside = polygon_path.contains_points(points_to_test, radius=tolerance_radius)
-                    final_indices_mask = np.where(is_inside)[0]
+                    final_indices_mask = np.flatnonzero(is_inside)
                     matching_indices = indices_in_bbox[final_indices_mask].tolist() # Get original indices
                 except Exception as pip_error:
                     print(f"[ERROR] query_viewport - Error during PIP test: {pip_error}")
@@ -812,7 +1082,7 @@ def query_patches_in_viewport(handler: "SegmentationHandler",
                         (centroids_x >= x1) & (centroids_x <= x2) &
                         (centroids_y >= y1) & (centroids_y <= y2)
                     )
-                    indices_in_viewport = np.where(viewport_mask)[0]
+                    indices_in_viewport = np.flatnonzero(viewport_mask)
 
                     if len(indices_in_viewport) > 0:
                         # For polygon filtering, use the viewport-filtered centroids
@@ -825,7 +1095,7 @@ def query_patches_in_viewport(handler: "SegmentationHandler",
                             polygon_path = Path(polygon_points)
                             tolerance_radius = -1e-9
                             is_inside = polygon_path.contains_points(points_to_test, radius=tolerance_radius)
-                            final_indices_mask = np.where(is_inside)[0]
+                            final_indices_mask = np.flatnonzero(is_inside)
                             matching_indices = indices_in_viewport[final_indices_mask].tolist()
                             print(f"[DEBUG] query_patches_in_viewport - After polygon filter: {len(matching_indices)} patch centroids inside polygon.")
                         except Exception as pip_error:
@@ -838,7 +1108,7 @@ def query_patches_in_viewport(handler: "SegmentationHandler",
                         (centroids_x >= min(x1, x2)) & (centroids_x <= max(x1, x2)) &
                         (centroids_y >= min(y1, y2)) & (centroids_y <= max(y1, y2))
                     )
-                    matching_indices = np.where(bbox_mask)[0].tolist()
+                    matching_indices = np.flatnonzero(bbox_mask).tolist()
 
             query_end = time.time()
             print(f"[DEBUG] query_patches_in_viewport - Found final matching patches: {len(matching_indices)}/{total_patches}, time: {query_end - query_start:.2f} seconds")
@@ -1039,7 +1309,6 @@ def clear_nuclei_annotations_in_region(
         Dict with cleared_count and success status
     """
     import zarr
-    import json
     
     print(f"[clear_nuclei_annotations] Starting - bbox: ({x1}, {y1}) to ({x2}, {y2})")
     print(f"[clear_nuclei_annotations] Handler exists: {handler is not None}")
@@ -1191,9 +1460,9 @@ def clear_nuclei_annotations_in_region(
                 # IMPORTANT: Also update handler's in-memory class_id cache
                 # This ensures WebSocket returns updated colors immediately
                 if handler and hasattr(handler, 'class_id') and handler.class_id is not None:
-                    for cell_id in cleared_cell_ids:
-                        if cell_id < len(handler.class_id):
-                            handler.class_id[cell_id] = -1
+                    cleared_ids = np.fromiter(cleared_cell_ids, dtype=np.int64, count=len(cleared_cell_ids))
+                    in_bounds = (cleared_ids >= 0) & (cleared_ids < len(handler.class_id))
+                    handler.class_id[cleared_ids[in_bounds]] = -1
                     print(f"[clear_nuclei_annotations] Updated handler.class_id cache for {len(cleared_cell_ids)} cells")
                     
                     # CRITICAL: Clear viewport cache to ensure fresh data is returned
@@ -1206,10 +1475,8 @@ def clear_nuclei_annotations_in_region(
                 if 'class_counts' in user_anno_group:
                     try:
                         counts_raw = user_anno_group['class_counts'][()]
-                        if isinstance(counts_raw, bytes):
-                            counts_dict = json.loads(counts_raw.decode('utf-8'))
-                        elif isinstance(counts_raw, str):
-                            counts_dict = json.loads(counts_raw)
+                        if isinstance(counts_raw, (bytes, str)):
+                            counts_dict = load_json_scalar(counts_raw)
                         else:
                             counts_dict = {}
                         
@@ -1225,7 +1492,7 @@ def clear_nuclei_annotations_in_region(
                         print(f"[clear_nuclei_annotations] New class_counts: {counts_dict}")
                         
                         # Save updated counts
-                        counts_bytes = json.dumps(counts_dict, ensure_ascii=False).encode('utf-8')
+                        counts_bytes = orjson.dumps(counts_dict)
                         existing_ds = user_anno_group['class_counts']
                         if existing_ds.shape == () and len(counts_bytes) <= existing_ds.nbytes:
                             existing_ds[()] = counts_bytes
@@ -1270,7 +1537,6 @@ def mark_nuclei_as_ground_truth_in_region(
         Dict with marked_count and success status
     """
     import zarr
-    import json
     from datetime import datetime
     
     print(f"[mark_nuclei_as_ground_truth] Starting - bbox: ({x1}, {y1}) to ({x2}, {y2})")
@@ -1331,7 +1597,7 @@ def mark_nuclei_as_ground_truth_in_region(
             # Get class names from handler or user_annotation metadata
             class_names = []
             if handler.class_name is not None:
-                class_names = [name.decode('utf-8') if isinstance(name, bytes) else str(name) for name in handler.class_name]
+                class_names = decode_str_array(handler.class_name).tolist()
             elif hasattr(user_anno_group, 'attrs') and 'class_names' in user_anno_group.attrs:
                 class_names_raw = user_anno_group.attrs['class_names']
                 if isinstance(class_names_raw, (list, tuple)):
@@ -1345,7 +1611,7 @@ def mark_nuclei_as_ground_truth_in_region(
             # Get class colors
             class_colors = []
             if handler.class_hex_color is not None:
-                class_colors = [color.decode('utf-8') if isinstance(color, bytes) else str(color) for color in handler.class_hex_color]
+                class_colors = decode_str_array(handler.class_hex_color).tolist()
             elif hasattr(user_anno_group, 'attrs') and 'class_colors' in user_anno_group.attrs:
                 class_colors_raw = user_anno_group.attrs['class_colors']
                 if isinstance(class_colors_raw, (list, tuple)):
@@ -1467,10 +1733,8 @@ def mark_nuclei_as_ground_truth_in_region(
                 try:
                     if 'class_counts' in user_anno_group:
                         counts_raw = user_anno_group['class_counts'][()]
-                        if isinstance(counts_raw, bytes):
-                            counts_dict = json.loads(counts_raw.decode('utf-8'))
-                        elif isinstance(counts_raw, str):
-                            counts_dict = json.loads(counts_raw)
+                        if isinstance(counts_raw, (bytes, str)):
+                            counts_dict = load_json_scalar(counts_raw)
                         else:
                             counts_dict = {}
                     else:
@@ -1483,7 +1747,7 @@ def mark_nuclei_as_ground_truth_in_region(
                     print(f"[mark_nuclei_as_ground_truth] Updated class_counts: {counts_dict}")
                     
                     # Save updated counts
-                    counts_bytes = json.dumps(counts_dict, ensure_ascii=False).encode('utf-8')
+                    counts_bytes = orjson.dumps(counts_dict)
                     if 'class_counts' in user_anno_group:
                         existing_ds = user_anno_group['class_counts']
                         if existing_ds.shape == () and len(counts_bytes) <= existing_ds.nbytes:
@@ -1566,7 +1830,7 @@ def clear_tissue_annotations_in_region(
                 json_str = str(raw_data)
             
             try:
-                annotations_dict = json.loads(json_str)
+                annotations_dict = load_json_scalar(json_str)
             except (json.JSONDecodeError, TypeError):
                 return {"cleared_count": 0, "message": "Invalid annotation format"}
             
@@ -1593,24 +1857,15 @@ def clear_tissue_annotations_in_region(
             # Get patch centroids from handler
             # NOTE: patch_coordinates format is [x1, y1, x2, y2] (top-left and bottom-right corners)
             # NOT [x, y, width, height]!
-            patch_centroids = {}
-            if handler and handler.patch_coordinates is not None:
-                patch_coords = handler.patch_coordinates
-                for i in range(len(patch_coords)):
-                    if len(patch_coords[i]) == 4:
-                        # Format is [x1, y1, x2, y2] - top-left and bottom-right corners
-                        px1, py1, px2, py2 = patch_coords[i]
-                        cx = (px1 + px2) / 2
-                        cy = (py1 + py2) / 2
-                        patch_centroids[i] = (cx, cy)
+            patch_centroids = handler.get_patch_centroids() if handler else []
             
             print(f"[clear_tissue_annotations] Input bbox: ({x1}, {y1}) to ({x2}, {y2})")
             print(f"[clear_tissue_annotations] Total patches with coordinates: {len(patch_centroids)}")
             print(f"[clear_tissue_annotations] Total annotations in file: {len(annotations_dict)}")
             
             # Show sample patch coordinates for debugging
-            if patch_centroids:
-                sample_patches = list(patch_centroids.items())[:3]
+            if len(patch_centroids):
+                sample_patches = list(enumerate(patch_centroids[:3].tolist()))
                 print(f"[clear_tissue_annotations] Sample patch centroids: {sample_patches}")
             
             # Show annotated patch IDs
@@ -1626,8 +1881,8 @@ def clear_tissue_annotations_in_region(
                 # Resolve patch id and centroid (same coordinate space as input bbox)
                 patch_id = int(patch_id_str)
                 
-                # Get centroid from our pre-calculated dict
-                if patch_id not in patch_centroids:
+                # Get centroid from the handler's cached centroid array
+                if not 0 <= patch_id < len(patch_centroids):
                     print(f"[clear_tissue_annotations] Warning: patch {patch_id} not found in coordinates, skipping")
                     continue
                 
@@ -1673,10 +1928,8 @@ def clear_tissue_annotations_in_region(
                         else:
                             counts_raw = counts_dataset[:]
                         
-                        if isinstance(counts_raw, bytes):
-                            counts_dict = json.loads(counts_raw.decode('utf-8'))
-                        elif isinstance(counts_raw, str):
-                            counts_dict = json.loads(counts_raw)
+                        if isinstance(counts_raw, (bytes, str)):
+                            counts_dict = load_json_scalar(counts_raw)
                         else:
                             counts_dict = {}
                         
@@ -1690,7 +1943,7 @@ def clear_tissue_annotations_in_region(
                         print(f"[clear_tissue_annotations] Updated patch_class_counts: {counts_dict}")
                         
                         # Save updated counts
-                        counts_bytes = json.dumps(counts_dict, ensure_ascii=False).encode('utf-8')
+                        counts_bytes = orjson.dumps(counts_dict)
                         existing_ds = user_anno_group['patch_class_counts']
                         if existing_ds.shape == () and len(counts_bytes) <= existing_ds.nbytes:
                             existing_ds[()] = counts_bytes
@@ -1702,15 +1955,15 @@ def clear_tissue_annotations_in_region(
                 
                 # Also update handler's tissue_annotations cache and patch_class_id
                 if handler:
-                    for patch_id_str in patches_to_clear:
-                        patch_id = int(patch_id_str)
+                    cleared_ids = np.fromiter((int(patch_id_str) for patch_id_str in patches_to_clear), dtype=np.int64, count=len(patches_to_clear))
+                    for patch_id in cleared_ids.tolist():
                         # Remove from tissue_annotations dict
                         if patch_id in handler.tissue_annotations:
                             del handler.tissue_annotations[patch_id]
-                        # Also reset patch_class_id to -1 (unclassified)
-                        if hasattr(handler, 'patch_class_id') and handler.patch_class_id is not None:
-                            if patch_id < len(handler.patch_class_id):
-                                handler.patch_class_id[patch_id] = -1
+                    # Also reset patch_class_id to -1 (unclassified) in one masked scatter
+                    if hasattr(handler, 'patch_class_id') and handler.patch_class_id is not None:
+                        in_bounds = (cleared_ids >= 0) & (cleared_ids < len(handler.patch_class_id))
+                        handler.patch_class_id[cleared_ids[in_bounds]] = -1
                     
                     print(f"[clear_tissue_annotations] Updated handler caches for {len(patches_to_clear)} patches")
                     
@@ -1820,7 +2073,7 @@ def mark_tissue_as_ground_truth_in_region(
                     json_str = str(raw_data)
                 
                 try:
-                    annotations_dict = json.loads(json_str)
+                    annotations_dict = load_json_scalar(json_str)
                 except (json.JSONDecodeError, TypeError):
                     annotations_dict = {}
             
@@ -1830,7 +2083,7 @@ def mark_tissue_as_ground_truth_in_region(
             # Get class names from handler or user_annotation metadata
             class_names = []
             if hasattr(handler, 'patch_class_name') and handler.patch_class_name is not None:
-                class_names = [name.decode('utf-8') if isinstance(name, bytes) else str(name) for name in handler.patch_class_name]
+                class_names = decode_str_array(handler.patch_class_name).tolist()
             elif hasattr(user_anno_group, 'attrs') and 'tissue_class_names' in user_anno_group.attrs:
                 class_names_raw = user_anno_group.attrs['tissue_class_names']
                 if isinstance(class_names_raw, (list, tuple)):
@@ -1844,7 +2097,7 @@ def mark_tissue_as_ground_truth_in_region(
             # Get class colors (same as non-batch save_tissue: handler or user_annotation.attrs)
             class_colors = []
             if hasattr(handler, 'patch_class_hex_color') and handler.patch_class_hex_color is not None:
-                class_colors = [c.decode('utf-8') if isinstance(c, bytes) else str(c) for c in handler.patch_class_hex_color]
+                class_colors = decode_str_array(handler.patch_class_hex_color).tolist()
             elif hasattr(user_anno_group, 'attrs') and 'tissue_class_colors' in user_anno_group.attrs:
                 class_colors_raw = user_anno_group.attrs['tissue_class_colors']
                 if isinstance(class_colors_raw, (list, tuple)):
@@ -1870,13 +2123,7 @@ def mark_tissue_as_ground_truth_in_region(
             # Get patch centroids from handler
             # NOTE: patch_coordinates format is [x1, y1, x2, y2] (top-left and bottom-right corners)
             patch_coords = handler.patch_coordinates
-            patch_centroids = {}
-            for i in range(len(patch_coords)):
-                if len(patch_coords[i]) == 4:
-                    px1, py1, px2, py2 = patch_coords[i]
-                    cx = (px1 + px2) / 2
-                    cy = (py1 + py2) / 2
-                    patch_centroids[i] = (cx, cy)
+            patch_centroids = handler.get_patch_centroids()
             
             print(f"[mark_tissue_as_ground_truth] Input bbox: ({x1}, {y1}) to ({x2}, {y2})")
             print(f"[mark_tissue_as_ground_truth] Total patches: {len(patch_coords)}, with AI predictions: {np.sum(handler.patch_class_id >= 0)}")
@@ -1896,7 +2143,7 @@ def mark_tissue_as_ground_truth_in_region(
                     continue  # Already a user annotation, skip
                 
                 # Get patch centroid and check if in region
-                if patch_id not in patch_centroids:
+                if not 0 <= patch_id < len(patch_centroids):
                     continue
                 
                 patch_x, patch_y = patch_centroids[patch_id]
@@ -1999,10 +2246,8 @@ def mark_tissue_as_ground_truth_in_region(
                         else:
                             counts_raw = counts_dataset[:]
                         
-                        if isinstance(counts_raw, bytes):
-                            counts_dict = json.loads(counts_raw.decode('utf-8'))
-                        elif isinstance(counts_raw, str):
-                            counts_dict = json.loads(counts_raw)
+                        if isinstance(counts_raw, (bytes, str)):
+                            counts_dict = load_json_scalar(counts_raw)
                         else:
                             counts_dict = {}
                     else:
@@ -2015,7 +2260,7 @@ def mark_tissue_as_ground_truth_in_region(
                     print(f"[mark_tissue_as_ground_truth] Updated patch_class_counts: {counts_dict}")
                     
                     # Save updated counts
-                    counts_bytes = json.dumps(counts_dict, ensure_ascii=False).encode('utf-8')
+                    counts_bytes = orjson.dumps(counts_dict)
                     if 'patch_class_counts' in user_anno_group:
                         existing_ds = user_anno_group['patch_class_counts']
                         if existing_ds.shape == () and len(counts_bytes) <= existing_ds.nbytes:
@@ -2039,6 +2284,14 @@ def mark_tissue_as_ground_truth_in_region(
 
 class SegmentationHandler:
     BUFFER = 200
+    # Byte budget for the chunk cache in front of lazily-read contour arrays
+    CONTOUR_CHUNK_CACHE_BYTES = 64 * 1024 * 1024
+    # Leaf size for the centroid KD tree (only ball queries are run against it)
+    KD_TREE_LEAFSIZE = 32
+    # Recent viewport ball queries kept per handler (the viewer fires several endpoints per pan/zoom)
+    VIEWPORT_QUERY_CACHE_SIZE = 8
+    # The legacy (2, K) contour warning is printed once per process, not per annotation
+    _legacy_contour_warned = False
 
     def __init__(self, zarr_file_path=None):
         self.zarr_file = None
@@ -2050,12 +2303,22 @@ class SegmentationHandler:
         self.probabilities = None
         self.annotations_data = {}
         self.tissue_annotations = {}
-        self.kd_tree = None
+        self._kd_tree = None
+        self._kd_tree_source = None  # centroids array the current KD tree was built from
+        # (center_x, center_y, radius) in whole pixels -> indices, for the tree in _viewport_query_tree
+        self._viewport_query_cache = OrderedDict()
+        self._viewport_query_tree = None
+        self._viewport_query_lock = threading.Lock()
         self.class_id = None
         self.class_name = None
         self.class_hex_color = None
         self.patch_coordinates = None
         self.patch_centroids = None
+        self._patch_centroids_source = None
+        self._patch_dimensions = None
+        self._patch_dimensions_source = None
+        self._patch_x1_index = None
+        self._patch_x1_index_source = None
         self.patch_class_id = None
         self.patch_class_name = None
         self.patch_class_hex_color = None
@@ -2070,6 +2333,16 @@ class SegmentationHandler:
             "class_name": [],
             "class_hex_color": []
         }
+        # Fingerprint of the classification arrays annotation_colors was last built from
+        self._annotation_colors_signature = None
+        # class_id value -> first position in annotation_colors["class_id"], tied to that list and its length
+        self._annotation_color_index = {}
+        self._annotation_color_index_source = None
+        self._annotation_color_index_len = 0
+        # class_id value -> last stored hex color, maintained the same way for viewport color lookups
+        self._annotation_color_lookup = {}
+        self._annotation_color_lookup_source = None
+        self._annotation_color_lookup_len = 0
         self.nuclei_model_timestamp = None
         self.patch_model_timestamp = None
 
@@ -2078,10 +2351,49 @@ class SegmentationHandler:
         self._tissue_segmentation_prefix = "BiomedParseNode"
         self._classification_prefix = 'ClassificationNode'
         self._patch_classification_prefix = 'MuskNode'
+        self._prefixed_keys_cache = None
+        # name -> index over patch_class_name, tied to the list object and its length
+        self._patch_class_name_index = None
+        self._patch_class_name_index_source = None
+        self._patch_class_name_index_len = 0
+        # name -> index over class_name for reclassification lookups, tied the same way
+        self._class_name_index = None
+        self._class_name_index_source = None
+        self._class_name_index_len = 0
+        # Decoded (class names, class colors) for per-nucleus lookups, tied to both lists and their lengths
+        self._class_tables = None
+        self._class_tables_source = None
+        self._class_tables_lens = None
+        # Decoded patch class colors for the merge passes, tied to the color list and its length
+        self._patch_color_table = None
+        self._patch_color_table_source = None
+        self._patch_color_table_len = 0
+        # Parsed user_annotation/tissue_annotations, keyed by the array's on-disk stamp
+        self._patch_annotations_cache_key = None
+        self._patch_annotations_parsed = None
+        # Parsed root tissue_annotations used for patch viewport color overrides, keyed the same way
+        self._tissue_overrides_cache_key = None
+        self._tissue_overrides_parsed = None
+        self._tissue_overrides_by_index = None
+        # Parsed JSON blobs under user_annotation (class_counts, ...), array dir -> (stamp, parsed)
+        self._user_json_cache = {}
 
         # Debounce reloads to avoid thrashing on rapid requests
         self._last_load_time = 0.0
         self._min_reload_interval = 0.2
+        # Whether the load stamped in _last_load_time also read centroids/contours
+        self._last_load_with_segmentation = False
+        # Set by writers that need the next load_file to bypass the debounce
+        self._needs_reload = False
+        self._force_reload_centroids = False
+        # (file path, counts) from get_global_nuclei_label_counts
+        self._global_label_counts_cache = None
+        # Built on first use by process_and_store_merged_patches
+        self._merged_patches_cache = None
+        # (ids, bounds array) over _merged_patches_cache for viewport intersection, tied to the cache dict
+        self._merged_bounds_index = None
+        self._merged_bounds_source = None
+        self._merged_bounds_len = 0
         
         # Cache for user annotation counts (not arrays - arrays are read directly when needed)
         self._user_annotation_counts_cache = None
@@ -2100,6 +2412,88 @@ class SegmentationHandler:
                 # Don't raise the exception, just log it and continue with empty handler
                 # This allows the handler to be created even if the file loading fails
 
+    @property
+    def kd_tree(self):
+        """KD tree over the current centroids, built on first use."""
+        if self._kd_tree_source is not self.centroids:
+            self._kd_tree_source = self.centroids
+            self._kd_tree = self._build_kd_tree(self.centroids) if self.centroids is not None else None
+        return self._kd_tree
+
+    @kd_tree.setter
+    def kd_tree(self, value):
+        # Assigning None invalidates the tree so the next access rebuilds it from the centroids
+        self._kd_tree = value
+        self._kd_tree_source = self.centroids if value is not None else None
+
+    def _query_viewport_indices(self, center_x, center_y, radius):
+        """Centroid indices within radius of the center, memoized over the last few viewports.
+
+        The center is rounded and the radius rounded up to whole pixels, so repeated requests for the
+        same view (and the different endpoints a single pan/zoom triggers) share one tree descent.
+        Rounding moves the center by at most sqrt(0.5) px, so the radius is padded by 0.71 first: the
+        query can only return extra points, never drop one the exact query would find.
+        Returns a fresh list each call, like query_ball_point.
+        """
+        tree = self.kd_tree
+        if tree is None:
+            return []
+        key = (round(center_x), round(center_y), math.ceil(radius + 0.71))
+        with self._viewport_query_lock:
+            if self._viewport_query_tree is not tree:
+                self._viewport_query_cache.clear()
+                self._viewport_query_tree = tree
+            cached = self._viewport_query_cache.get(key)
+            if cached is not None:
+                self._viewport_query_cache.move_to_end(key)
+                return list(cached)
+        indices = tree.query_ball_point([key[0], key[1]], r=key[2])
+        with self._viewport_query_lock:
+            if self._viewport_query_tree is tree:
+                self._viewport_query_cache[key] = indices
+                while len(self._viewport_query_cache) > self.VIEWPORT_QUERY_CACHE_SIZE:
+                    self._viewport_query_cache.popitem(last=False)
+        return list(indices)
+
+    def _query_viewport_box(self, x1, y1, x2, y2):
+        """Centroid indices within the circle circumscribing the viewport box, widened by BUFFER"""
+        width = x2 - x1
+        height = y2 - y1
+        radius = math.sqrt(width ** 2 + height ** 2) / 2 + self.BUFFER
+        return self._query_viewport_indices((x1 + x2) / 2, (y1 + y2) / 2, radius)
+
+    def _build_kd_tree(self, centroids):
+        """Build a KD tree over the centroids as C-contiguous float64; returns None if they are unusable.
+
+        cKDTree keeps its own float64 copy of the points, so float64 input that is already contiguous is
+        passed through without an extra copy.
+        """
+        try:
+            points = np.ascontiguousarray(centroids, dtype=np.float64)
+            # Check if centroids has the right shape (N, 2)
+            if points.ndim != 2 or points.shape[1] != 2:
+                print(f"[Error] _build_kd_tree => Invalid centroids shape: {points.shape}, expected (N, 2)")
+                return None
+            # Check for any NaN or infinite values
+            if not np.all(np.isfinite(points)):
+                print(f"[Error] _build_kd_tree => Centroids contain NaN or infinite values")
+                return None
+            # Hashing the buffer is far cheaper than the build and keys the tree by content,
+            # so a reload of the same centroids gets the cached tree back
+            cache_key = (points.shape, hashlib.blake2b(points, digest_size=16).digest())
+            tree = _kd_tree_cache_get(cache_key)
+            if tree is not None:
+                return tree
+            # Sliding-midpoint splits without median balancing or node compaction build several
+            # times faster on large slides and cost little for radius queries on uniform nuclei
+            tree = cKDTree(points, leafsize=self.KD_TREE_LEAFSIZE, balanced_tree=False, compact_nodes=False)
+            _kd_tree_cache_put(cache_key, tree)
+            return tree
+        except Exception as e:
+            print(f"[Error] _build_kd_tree => Failed to build KD tree: {e}")
+            print(f"[Error] _build_kd_tree => Traceback: {traceback.format_exc()}")
+            return None
+
     def _get_geojson_export_executor(self):
         """Get or create a reusable thread pool for GeoJSON export."""
         if self._geojson_export_executor is None:
@@ -2153,7 +2547,7 @@ class SegmentationHandler:
             current_len = len(self.class_id)
             if current_len == num_cells:
                 return
-            normalized = np.full(num_cells, -1, dtype=int)
+            normalized = unassigned_class_ids(num_cells)
             copy_len = min(current_len, num_cells)
             if copy_len > 0:
                 try:
@@ -2168,6 +2562,11 @@ class SegmentationHandler:
         # Reset patch-related attributes
         self.patch_coordinates = None
         self.patch_centroids = None
+        self._patch_centroids_source = None
+        self._patch_dimensions = None
+        self._patch_dimensions_source = None
+        self._patch_x1_index = None
+        self._patch_x1_index_source = None
         self.patch_class_id = None
         self.patch_class_name = None
         self.patch_class_hex_color = None
@@ -2203,27 +2602,41 @@ class SegmentationHandler:
         if self.class_name is None: self.class_name = []
         if self.class_hex_color is None: self.class_hex_color = []
 
-        # Convert to lists if they are numpy arrays
-        current_names = list(self.class_name)
-        current_colors = list(self.class_hex_color)
+        # Resolve names through a dict and only rebuild the arrays when the UI actually
+        # introduced a class or changed a color; the common "nothing changed" call is a no-op.
+        name_to_index = {name: i for i, name in enumerate(self.class_name)}
+        added_names = []
+        added_colors = []
+        color_updates = {}
+        base_len = len(self.class_name)
 
         for i, name in enumerate(ui_classes):
-            if name not in current_names:
-                current_names.append(name)
+            color = ui_colors[i] if i < len(ui_colors) else None
+            existing_index = name_to_index.get(name)
+            if existing_index is None:
+                name_to_index[name] = base_len + len(added_names)
+                added_names.append(name)
                 # Ensure the colors list is extended safely
-                if i < len(ui_colors):
-                    current_colors.append(ui_colors[i])
-                else:
-                    current_colors.append("#FFFFFF") # Default color for safety
-            else:
+                added_colors.append(color if color is not None else "#FFFFFF") # Default color for safety
+            elif color is not None:
                 # Update existing class color if provided
-                if i < len(ui_colors):
-                    existing_index = current_names.index(name)
-                    current_colors[existing_index] = ui_colors[i]
-                    print(f"[Debug] update_class_definitions => Updated color for class '{name}': {ui_colors[i]}")
+                if existing_index >= base_len:
+                    added_colors[existing_index - base_len] = color
+                elif existing_index >= len(self.class_hex_color) or self.class_hex_color[existing_index] != color:
+                    color_updates[existing_index] = color
 
-        self.class_name = np.array(current_names)
-        self.class_hex_color = np.array(current_colors)
+        if not added_names and not color_updates:
+            return
+
+        current_colors = list(self.class_hex_color)
+        if len(current_colors) < base_len:
+            current_colors.extend(["#FFFFFF"] * (base_len - len(current_colors)))
+        for existing_index, color in color_updates.items():
+            current_colors[existing_index] = color
+            print(f"[Debug] update_class_definitions => Updated color for class '{self.class_name[existing_index]}': {color}")
+
+        self.class_name = np.array(list(self.class_name) + added_names)
+        self.class_hex_color = np.array(current_colors + added_colors)
 
     def load_file(self, zarr_file_path, force_reload: bool = True, reload_segmentation_data: bool = True):
         """Load data directly from Zarr file - simplified version without cache
@@ -2246,12 +2659,13 @@ class SegmentationHandler:
                 if (self._zarr_file_obj is not None) or (self.zarr_file and os.path.exists(self.zarr_file)):
                     return
             
-            # Throttle rapid consecutive reload requests
+            # Throttle rapid consecutive reload requests. Within the interval a repeat of a completed
+            # load is served from the in-memory state; force_reload (used by callers after writing
+            # to the file) and _needs_reload always go through.
             now = time.time()
-            last = getattr(self, '_last_load_time', 0.0)
-            min_interval = getattr(self, '_min_reload_interval', 0.2)
-            needs_reload = getattr(self, '_needs_reload', False)
-            if (now - last) < min_interval and not needs_reload and not reload_segmentation_data and not force_reload:
+            if ((now - self._last_load_time) < self._min_reload_interval and not self._needs_reload
+                    and not force_reload
+                    and (self._last_load_with_segmentation or not reload_segmentation_data)):
                 return
 
         # Clear caches
@@ -2269,6 +2683,9 @@ class SegmentationHandler:
             except Exception as e:
                 logger.warning(f"Exception occurred while clearing Zarr file references: {e}")
 
+        switching_file = self.zarr_file != zarr_file_path
+        if switching_file:
+            self._last_load_with_segmentation = False
         self.zarr_file = zarr_file_path
         
         # Load data directly from Zarr file - no cache needed
@@ -2294,9 +2711,10 @@ class SegmentationHandler:
         try:
             zarr_file = self._zarr_file_obj
             
-            # Get prefixes for data organization
-            classification_prefix = self.get_classification_prefix()
-            patch_prefix = self.get_patch_classification_prefix()
+            # Get prefixes (and the flattened dataset keys derived from them) for data organization
+            prefixed_keys = self._get_prefixed_keys()
+            classification_prefix = prefixed_keys['classification_prefix']
+            patch_prefix = prefixed_keys['patch_prefix']
 
             # Only reload centroids and contours if reload_segmentation_data is True
             if reload_segmentation_data:
@@ -2306,7 +2724,11 @@ class SegmentationHandler:
                     
                     # Look for centroids and contours in SegmentationNode group
                     if 'centroids' in seg_group:
-                        self.centroids = np.array(seg_group['centroids'])
+                        # Uncompressed single-chunk centroids are mapped from disk; anything else is read into RAM
+                        centroids_array = seg_group['centroids']
+                        self.centroids = memmap_zarr_array(centroids_array)
+                        if self.centroids is None:
+                            self.centroids = read_zarr_array(centroids_array)
                     else:
                         self.centroids = None
                     
@@ -2317,11 +2739,18 @@ class SegmentationHandler:
                         contour_shape = seg_group['contours'].shape
                         
                         if contour_shape[0] > 50000:
-                            # Large dataset: keep zarr reference for lazy loading
-                            self.contours = seg_group['contours']  # Keep zarr array reference
+                            # Large dataset: keep zarr reference for lazy loading.
+                            # Viewport queries re-read overlapping chunks on every pan/zoom,
+                            # so front the read-only array with an LRU chunk cache.
+                            contours_array = seg_group['contours']
+                            contours_store = zarr.LRUStoreCache(contours_array.store, max_size=self.CONTOUR_CHUNK_CACHE_BYTES)
+                            self.contours = zarr.open_array(store=contours_store, path=contours_array.path, mode='r')
                         else:
-                            # Small dataset: load into memory
-                            self.contours = np.array(seg_group['contours'])
+                            # Small dataset: load into memory (or map it when stored as one raw chunk)
+                            self.contours = memmap_zarr_array(seg_group['contours'])
+                            if self.contours is None:
+                                # In-memory copy: keep float64 contours as float32 when that is lossless
+                                self.contours = narrow_float64_array(read_zarr_array(seg_group['contours']))
                     else:
                         self.contours = None
                 else:
@@ -2334,9 +2763,9 @@ class SegmentationHandler:
                 pass
 
             # Load classification data - try metadata first, then fallback to datasets
-            class_id_key = f'{classification_prefix}_nuclei_class_id'
-            class_name_key = f'{classification_prefix}_nuclei_class_name'
-            class_hex_color_key = f'{classification_prefix}_nuclei_class_HEX_color'
+            class_id_key = prefixed_keys['class_id']
+            class_name_key = prefixed_keys['class_name']
+            class_hex_color_key = prefixed_keys['class_hex_color']
             
             # Try to load from metadata first
             if classification_prefix in zarr_file:
@@ -2358,12 +2787,13 @@ class SegmentationHandler:
                         if self.class_id is None or (self.centroids is not None and len(self.class_id) != len(self.centroids)):
                             # Need to initialize or resize
                             if self.centroids is not None:
-                                self.class_id = np.full(len(self.centroids), -1, dtype=int)
+                                self.class_id = unassigned_class_ids(len(self.centroids))
                             else:
                                 self.class_id = np.array([-1])
                         elif self.centroids is not None and np.any(self.class_id >= 0):
                             # class_id exists and is populated, don't overwrite it
-                            print(f"[Debug] load_file => Preserving existing class_id (has {np.sum(self.class_id >= 0)} annotations)")
+                            if logger.isEnabledFor(logging.DEBUG):
+                                logger.debug("load_file => Preserving existing class_id (has %d annotations)", np.count_nonzero(self.class_id >= 0))
                         # If class_id exists and is all -1, we'll try to populate from datasets below
 
                         # Even when using metadata for classes, attempt to load per-cell assignments from datasets
@@ -2377,35 +2807,35 @@ class SegmentationHandler:
                             if needs_population:
                                 # Prefer numeric IDs if available
                                 if 'nuclei_class_id' in group:
-                                    self.class_id = np.array(group['nuclei_class_id'][:], dtype=int)
+                                    self.class_id = read_zarr_array(group['nuclei_class_id']).astype(int, copy=False)
                                 else:
                                     # Fallbacks: try string label datasets then map via metadata class_names
                                     for label_key in ['nuclei_class', 'labels', 'cell_class', 'nucleus_class', 'nuclei_labels']:
                                         if label_key in group:
                                             raw_labels = group[label_key][:]
-                                            labels = [lbl.decode('utf-8') if isinstance(lbl, (bytes, bytearray)) else str(lbl) for lbl in raw_labels]
+                                            labels = decode_str_array(raw_labels)
                                             name_to_idx = {name: i for i, name in enumerate(self.class_name)}
                                             self.class_id = np.array([name_to_idx.get(label, -1) for label in labels], dtype=int)
                                             break
                             else:
-                                print(f"[Debug] load_file => Skipping ClassificationNode dataset load, class_id already populated")
+                                logger.debug("load_file => Skipping ClassificationNode dataset load, class_id already populated")
                         except Exception as e:
-                            print(f"[Warn] load_file => Failed populating nuclei_class_id from ClassificationNode datasets: {e}")
+                            logger.warning("load_file => Failed populating nuclei_class_id from ClassificationNode datasets: %s", e)
                         # Ensure length alignment
                         self._normalize_class_id_length()
 
                     # Fallback: Check for legacy dataset format only if metadata is not available
                     try:
                         if 'nuclei_class_name' in group:
-                            raw_names = group['nuclei_class_name'][:]
-                            self.class_name = np.array([n.decode('utf-8') if isinstance(n, (bytes, bytearray)) else str(n) for n in raw_names])
+                            raw_names = read_zarr_array(group['nuclei_class_name'])
+                            self.class_name = decode_str_array(raw_names)
                         if 'nuclei_class_HEX_color' in group:
-                            raw_colors = group['nuclei_class_HEX_color'][:]
-                            self.class_hex_color = np.array([c.decode('utf-8') if isinstance(c, (bytes, bytearray)) else str(c) for c in raw_colors])
+                            raw_colors = read_zarr_array(group['nuclei_class_HEX_color'])
+                            self.class_hex_color = decode_str_array(raw_colors)
                         if 'nuclei_class_id' in group:
-                            self.class_id = np.array(group['nuclei_class_id'][:])
+                            self.class_id = read_zarr_array(group['nuclei_class_id'])
                     except Exception as e:
-                        print(f"[Warn] load_file => Failed reading classification datasets: {e}")
+                        logger.warning("load_file => Failed reading classification datasets: %s", e)
 
                     # Decide whether we should skip root-level dataset loading.
                     # If we successfully loaded from metadata OR from group datasets,
@@ -2431,42 +2861,30 @@ class SegmentationHandler:
             if not skip_dataset_loading:
                 # First load class_name and class_hex_color (needed for class_id mapping)
                 if class_name_key in zarr_file:
-                    raw_class_name = np.array(zarr_file[class_name_key])
+                    raw_class_name = read_zarr_array(zarr_file[class_name_key])
                 else:
                     raw_class_name = None
                 
                 if class_hex_color_key in zarr_file:
-                    raw_class_hex_color = np.array(zarr_file[class_hex_color_key])
+                    raw_class_hex_color = read_zarr_array(zarr_file[class_hex_color_key])
                 else:
                     raw_class_hex_color = None
                 
                 # Process class name and hex color data
                 if raw_class_name is not None:
-                    # Check if it's a numpy array first
-                    if hasattr(raw_class_name, 'dtype') and raw_class_name.dtype.kind == 'S':  # byte string
-                        self.class_name = np.array([name.decode('utf-8') for name in raw_class_name])
-                    elif isinstance(raw_class_name, list):
-                        self.class_name = np.array(raw_class_name)
-                    else:
-                        self.class_name = raw_class_name
+                    self.class_name = decode_str_array(raw_class_name)
                 else:
                     self.class_name = None
                     
                 if raw_class_hex_color is not None:
-                    # Check if it's a numpy array first
-                    if hasattr(raw_class_hex_color, 'dtype') and raw_class_hex_color.dtype.kind == 'S':  # byte string
-                        self.class_hex_color = np.array([color.decode('utf-8') for color in raw_class_hex_color])
-                    elif isinstance(raw_class_hex_color, list):
-                        self.class_hex_color = np.array(raw_class_hex_color)
-                    else:
-                        self.class_hex_color = raw_class_hex_color
+                    self.class_hex_color = decode_str_array(raw_class_hex_color)
                 else:
                     self.class_hex_color = None
                 
                 # Now load class_id data (only if not already loaded from group)
                 if self.class_id is None:
                     if class_id_key in zarr_file:
-                        self.class_id = np.array(zarr_file[class_id_key])
+                        self.class_id = read_zarr_array(zarr_file[class_id_key])
                     else:
                         # Try alternative locations for class_id data
                         if 'user_annotation' in zarr_file:
@@ -2477,12 +2895,12 @@ class SegmentationHandler:
                                 try:
                                     nuclei_ann_data = user_ann_group['nuclei_annotations'][()]
                                     if isinstance(nuclei_ann_data, bytes):
-                                        nuclei_ann_json = json.loads(nuclei_ann_data.decode('utf-8'))
+                                        nuclei_ann_json = load_json_scalar(nuclei_ann_data)
                                         
                                         # Try to extract class_id information from annotations
                                         if nuclei_ann_json:
                                             # Initialize class_id array with -1 (unclassified)
-                                            self.class_id = np.full(len(self.centroids), -1, dtype=np.int32)
+                                            self.class_id = unassigned_class_ids(len(self.centroids))
                                             
                                             # Extract class_id from annotations
                                             for cell_id, annotation_data in nuclei_ann_json.items():
@@ -2495,7 +2913,7 @@ class SegmentationHandler:
                                                             # Map class name to class_id
                                                             if self.class_name is not None:
                                                                 try:
-                                                                    class_idx = np.where(self.class_name == cell_class)[0]
+                                                                    class_idx = np.flatnonzero(self.class_name == cell_class)
                                                                     if len(class_idx) > 0:
                                                                         self.class_id[idx] = class_idx[0]
                                                                 except Exception as e:
@@ -2514,15 +2932,15 @@ class SegmentationHandler:
                         else:
                             self.class_id = None
                         # Also try string label dataset at root for ClassificationNode
-                        alt_string_key = f'{classification_prefix}_nuclei_class'
+                        alt_string_key = prefixed_keys['class_labels']
                         if self.class_id is None and alt_string_key in zarr_file and self.class_name is not None:
                             try:
-                                raw_labels = np.array(zarr_file[alt_string_key])
-                                labels = [lbl.decode('utf-8') if isinstance(lbl, (bytes, bytearray)) else str(lbl) for lbl in raw_labels]
+                                raw_labels = read_zarr_array(zarr_file[alt_string_key])
+                                labels = decode_str_array(raw_labels)
                                 name_to_idx = {name: i for i, name in enumerate(self.class_name)}
                                 self.class_id = np.array([name_to_idx.get(label, -1) for label in labels], dtype=int)
                             except Exception as e:
-                                print(f"[Warn] load_file => Failed mapping root label dataset '{alt_string_key}': {e}")
+                                logger.warning("load_file => Failed mapping root label dataset '%s': %s", alt_string_key, e)
 
                 # Ensure length alignment
                 self._normalize_class_id_length()
@@ -2531,63 +2949,65 @@ class SegmentationHandler:
             self._apply_manual_nuclei_annotations(zarr_file)
             
             # Load patch data
-            patch_coords_key = f'{patch_prefix}_coordinates'
+            patch_coords_key = prefixed_keys['patch_coordinates']
             if patch_coords_key in zarr_file:
-                self.patch_coordinates = np.array(zarr_file[patch_coords_key])
+                self.patch_coordinates = read_zarr_array(zarr_file[patch_coords_key])
             elif patch_prefix in zarr_file and 'coordinates' in zarr_file[patch_prefix]:
                 # Try loading from group structure (e.g., MuskNode/coordinates)
-                self.patch_coordinates = np.array(zarr_file[patch_prefix]['coordinates'])
+                patch_group = zarr_file[patch_prefix]
+                self.patch_coordinates = read_zarr_array(patch_group['coordinates'])
                 
                 # Also load patch classification data from the same group
                 # Check attributes first (new format), then fallback to datasets (old format)
-                if patch_prefix in zarr_file:
-                    patch_group = zarr_file[patch_prefix]
-                    # Check attributes format first
-                    if hasattr(patch_group, 'attrs') and 'tissue_class_name' in patch_group.attrs:
-                        self.patch_class_name = np.array(patch_group.attrs.get('tissue_class_name', []))
-                        # Try to get colors from attrs first
-                        if 'tissue_class_HEX_color' in patch_group.attrs:
-                            self.patch_class_hex_color = np.array(patch_group.attrs.get('tissue_class_HEX_color', []))
-                        # Fallback: try to load colors from userData if not in attrs
-                        elif 'userData' in patch_group and 'tissue_colors' in patch_group['userData']:
-                            try:
-                                tissue_colors_raw = patch_group['userData']['tissue_colors'][()]
-                                if isinstance(tissue_colors_raw, bytes):
-                                    tissue_colors = json.loads(tissue_colors_raw.decode('utf-8'))
-                                else:
-                                    tissue_colors = json.loads(tissue_colors_raw) if isinstance(tissue_colors_raw, str) else tissue_colors_raw
-                                self.patch_class_hex_color = np.array(tissue_colors) if isinstance(tissue_colors, list) else np.array([tissue_colors])
-                                print(f"[Debug] Loaded patch colors from userData: {self.patch_class_hex_color}")
-                            except Exception as e:
-                                print(f"[Warning] Failed to load colors from userData: {e}")
-                                self.patch_class_hex_color = None
-                        else:
+                # Check attributes format first
+                if hasattr(patch_group, 'attrs') and 'tissue_class_name' in patch_group.attrs:
+                    self.patch_class_name = np.array(patch_group.attrs.get('tissue_class_name', []))
+                    # Try to get colors from attrs first
+                    if 'tissue_class_HEX_color' in patch_group.attrs:
+                        self.patch_class_hex_color = np.array(patch_group.attrs.get('tissue_class_HEX_color', []))
+                    # Fallback: try to load colors from userData if not in attrs
+                    elif 'userData' in patch_group and 'tissue_colors' in patch_group['userData']:
+                        try:
+                            tissue_colors_raw = patch_group['userData']['tissue_colors'][()]
+                            # orjson parses bytes directly, no intermediate str
+                            if isinstance(tissue_colors_raw, (bytes, str)):
+                                tissue_colors = load_json_scalar(tissue_colors_raw)
+                            else:
+                                tissue_colors = tissue_colors_raw
+                            self.patch_class_hex_color = np.array(tissue_colors) if isinstance(tissue_colors, list) else np.array([tissue_colors])
+                            logger.debug("load_file => Loaded %d patch colors from userData", len(self.patch_class_hex_color))
+                        except Exception as e:
+                            logger.warning("load_file => Failed to load colors from userData: %s", e)
                             self.patch_class_hex_color = None
-                        
-                        if 'tissue_class_id' in patch_group.attrs:
-                            self.patch_class_id = np.array(patch_group.attrs.get('tissue_class_id', []))
-                        elif len(self.patch_class_name) > 0:
-                            # Generate IDs from indices if not present
-                            self.patch_class_id = np.array(list(range(len(self.patch_class_name))))
-                    # Fallback to dataset format
-                    elif 'tissue_class_name' in patch_group and 'tissue_class_HEX_color' in patch_group and 'tissue_class_id' in patch_group:
-                        self.patch_class_name = np.array([name.decode('utf-8') if isinstance(name, (bytes, bytearray)) else str(name) for name in patch_group['tissue_class_name'][:]])
-                        self.patch_class_hex_color = np.array([color.decode('utf-8') if isinstance(color, (bytes, bytearray)) else str(color) for color in patch_group['tissue_class_HEX_color'][:]])
-                        self.patch_class_id = np.array(patch_group['tissue_class_id'][:])
+                    else:
+                        self.patch_class_hex_color = None
+                    
+                    if 'tissue_class_id' in patch_group.attrs:
+                        self.patch_class_id = np.array(patch_group.attrs.get('tissue_class_id', []))
+                    elif len(self.patch_class_name) > 0:
+                        # Generate IDs from indices if not present
+                        self.patch_class_id = np.array(list(range(len(self.patch_class_name))))
+                # Fallback to dataset format
+                elif 'tissue_class_name' in patch_group and 'tissue_class_HEX_color' in patch_group and 'tissue_class_id' in patch_group:
+                    self.patch_class_name = decode_str_array(read_zarr_array(patch_group['tissue_class_name']))
+                    self.patch_class_hex_color = decode_str_array(read_zarr_array(patch_group['tissue_class_HEX_color']))
+                    self.patch_class_id = read_zarr_array(patch_group['tissue_class_id'])
             else:
                 # Try alternative key names
                 for alt_key in ['patch_coordinates', 'patch_coords', 'patches']:
                     if alt_key in zarr_file:
-                        self.patch_coordinates = np.array(zarr_file[alt_key])
+                        self.patch_coordinates = read_zarr_array(zarr_file[alt_key])
                         break
                 else:
                     self.patch_coordinates = None
             
-            # Load other data
-            if 'tissues' in zarr_file:
-                self.tissues = np.array(zarr_file['tissues']).tolist()
-            else:
-                self.tissues = []
+            # Load other data. Tissue polygons are segmentation geometry like centroids/contours, so a
+            # lightweight (annotations-only) reload of the same file keeps the already-built list
+            if reload_segmentation_data or switching_file or self.tissues is None:
+                if 'tissues' in zarr_file:
+                    self.tissues = read_zarr_array(zarr_file['tissues']).tolist()
+                else:
+                    self.tissues = []
             
             if 'annotations_data' in zarr_file:
                 self.annotations_data = dict(zarr_file['annotations_data'])
@@ -2599,59 +3019,23 @@ class SegmentationHandler:
             else:
                 self.tissue_annotations = {}
             
-            # Build KD tree if centroids and contours are available (only if reload_segmentation_data is True)
+            # Drop the KD tree whenever centroids are reloaded; it is rebuilt lazily on first query
             if reload_segmentation_data:
-                if self.centroids is not None and self.contours is not None:
-                    try:
-                        # Ensure centroids is a numpy array with correct shape
-                        if not isinstance(self.centroids, np.ndarray):
-                            self.centroids = np.array(self.centroids)
-                        
-                        # Check if centroids has the right shape (N, 2)
-                        if len(self.centroids.shape) != 2 or self.centroids.shape[1] != 2:
-                            print(f"[Error] load_file => Invalid centroids shape: {self.centroids.shape}, expected (N, 2)")
-                            self.kd_tree = None
-                        else:
-                            # Check for any NaN or infinite values
-                            if np.any(np.isnan(self.centroids)) or np.any(np.isinf(self.centroids)):
-                                print(f"[Error] load_file => Centroids contain NaN or infinite values")
-                                self.kd_tree = None
-                            else:
-                                self.kd_tree = KDTree(self.centroids)
-                    except Exception as e:
-                        print(f"[Error] load_file => Failed to build KD tree: {e}")
-                        print(f"[Error] load_file => Centroids info - shape: {self.centroids.shape if hasattr(self.centroids, 'shape') else 'no shape'}, dtype: {self.centroids.dtype if hasattr(self.centroids, 'dtype') else 'no dtype'}")
-                        print(f"[Error] load_file => Traceback: {traceback.format_exc()}")
-                        self.kd_tree = None
-                else:
-                    self.kd_tree = None
-            else:
-                # Ensure KD tree exists if centroids are available
-                if self.kd_tree is None and self.centroids is not None:
-                    try:
-                        if not isinstance(self.centroids, np.ndarray):
-                            self.centroids = np.array(self.centroids)
-                        if len(self.centroids.shape) == 2 and self.centroids.shape[1] == 2:
-                            if not (np.any(np.isnan(self.centroids)) or np.any(np.isinf(self.centroids))):
-                                self.kd_tree = KDTree(self.centroids)
-                    except Exception as e:
-                        print(f"[Warning] load_file => Failed to build KD tree from existing centroids: {e}")
+                self.kd_tree = None
             
             # Manual nuclei annotations are now applied earlier in the method
             
             # Update annotation colors if classification data is available
             if self.class_id is not None and self.class_name is not None and self.class_hex_color is not None:
-                self.annotation_colors = {
-                    "class_id": self.class_id.tolist() if hasattr(self.class_id, 'tolist') else self.class_id,
-                    "class_name": self.class_name.tolist() if hasattr(self.class_name, 'tolist') else self.class_name,
-                    "class_hex_color": self.class_hex_color.tolist() if hasattr(self.class_hex_color, 'tolist') else self.class_hex_color
-                }
+                self._refresh_annotation_colors()
             
             # Load manual tissue annotations if they exist
             self._apply_manual_patch_annotations(zarr_file)
             
             # Update last load time
             self._last_load_time = time.time()
+            if reload_segmentation_data:
+                self._last_load_with_segmentation = True
 
         except Exception as e:
             print(f"[ERROR] load_file - Error reading Zarr file: {e}")
@@ -2684,28 +3068,35 @@ class SegmentationHandler:
             print(f"[ERROR] refresh_annotations => Full traceback: {traceback.format_exc()}")
             raise
     def _apply_manual_patch_annotations(self, zarr_file):
-        print("[Debug] Applying manual patch annotations...")
+        logger.debug("_apply_manual_patch_annotations => Applying manual patch annotations")
         if 'user_annotation' not in zarr_file or 'tissue_annotations' not in zarr_file['user_annotation']:
-            print("[Debug] No manual tissue annotations found in Zarr file.")
+            logger.debug("_apply_manual_patch_annotations => No manual tissue annotations found in Zarr file")
             return
 
         try:
-            raw_bytes = zarr_file['user_annotation/tissue_annotations'][()]
-            manual_annotations = json.loads(raw_bytes.decode("utf-8"))
+            annotations_array = zarr_file['user_annotation/tissue_annotations']
+            cache_key = zarr_array_stamp(annotations_array)
+            if cache_key is not None and cache_key == self._patch_annotations_cache_key:
+                manual_annotations = self._patch_annotations_parsed
+            else:
+                raw_bytes = annotations_array[()]
+                manual_annotations = load_json_scalar(raw_bytes)
+                self._patch_annotations_cache_key = cache_key
+                self._patch_annotations_parsed = manual_annotations
         except Exception as e:
-            print(f"[Error] Failed to load or parse manual annotations: {e}")
+            logger.error("_apply_manual_patch_annotations => Failed to load or parse manual annotations: %s", e)
             return
             
         if not manual_annotations:
-            print("[Debug] Manual annotations are empty.")
+            logger.debug("_apply_manual_patch_annotations => Manual annotations are empty")
             return
 
         # Scenario 1: No model data exists, initialize everything from manual annotations
         if self.patch_class_name is None:
-            print("[Debug] No model classification found. Initializing from manual annotations.")
+            logger.debug("_apply_manual_patch_annotations => No model classification found. Initializing from manual annotations")
             
             if self.patch_coordinates is None:
-                print("[Error] Cannot apply manual annotations without patch coordinates. Aborting.")
+                logger.error("_apply_manual_patch_annotations => Cannot apply manual annotations without patch coordinates. Aborting")
                 return
 
             # Create a mapping from class name to a new integer ID (exclude negative selection entries with tissue_class None)
@@ -2717,7 +3108,7 @@ class SegmentationHandler:
             else:
                 self.patch_class_name = ["Negative control"] + [cls for cls in all_manual_classes if cls != "Negative control"]
 
-            self.patch_class_id = np.full(len(self.patch_coordinates), -1, dtype=int) # Default all to unclassified (-1)
+            self.patch_class_id = unassigned_class_ids(len(self.patch_coordinates)) # Default all to unclassified (-1)
             
             # Don't extract colors from annotations - use default, colors will come from colormap
             # Initialize with default colors, will be overridden by colormap if available
@@ -2726,7 +3117,7 @@ class SegmentationHandler:
                  nc_index = self.patch_class_name.index("Negative control")
                  self.patch_class_hex_color[nc_index] = "#aaaaaa" # Default color for negative control
 
-            print(f"[Debug] Initialized with classes: {self.patch_class_name}")
+            logger.debug("_apply_manual_patch_annotations => Initialized with classes: %s", self.patch_class_name)
         else:
             # Ensure mutable Python lists for appending new classes/colors
             if isinstance(self.patch_class_name, np.ndarray):
@@ -2743,8 +3134,21 @@ class SegmentationHandler:
                     self.patch_class_hex_color = list(self.patch_class_hex_color)
 
         # Now, proceed with overriding based on the (potentially just created) class mapping
-        class_to_id_map = {name: i for i, name in enumerate(self.patch_class_name)}
-        
+        class_to_id_map = self._get_patch_class_name_index()
+
+        # The model timestamp is the same for every annotation; parse it once
+        model_ts = None
+        if self.patch_model_timestamp:
+            try:
+                model_ts = datetime.fromisoformat(self.patch_model_timestamp)
+            except ValueError:
+                model_ts = None
+
+        # Gather (patch_id, class_name) pairs in one pass, then resolve names and scatter them into
+        # patch_class_id at once
+        override_ids = []
+        override_names = []
+        override_stamps = []
         for patch_id_str, annotation in manual_annotations.items():
             try:
                 patch_id = int(patch_id_str)
@@ -2756,38 +3160,51 @@ class SegmentationHandler:
             if class_name is None:
                 continue
 
-            # Check if the manually annotated class exists in our current list.
-            if class_name not in class_to_id_map:
-                print(f"[Debug] New class '{class_name}' found in manual annotations. Adding to list.")
-                new_id = len(self.patch_class_name)
-                self.patch_class_name.append(class_name)
-                # Don't read color from annotation - use default, color will come from colormap
-                self.patch_class_hex_color.append('#808080')  # Default, will be overridden by colormap
-                class_to_id_map[class_name] = new_id
-
-            # Get the ID for the class and update the patch_class_id array
-            target_class_id = class_to_id_map[class_name]
-            
-            if 0 <= patch_id < len(self.patch_class_id):
-                user_ts_str = annotation.get('datetime')
-                if user_ts_str and self.patch_model_timestamp:
-                    try:
-                        user_ts = datetime.strptime(user_ts_str, '%Y-%m-%d %H:%M:%S.%f')
-                        model_ts = datetime.fromisoformat(self.patch_model_timestamp)
-                        if user_ts <= model_ts:
-                            continue
-                    except ValueError as ve:
-                        pass
-                self.patch_class_id[patch_id] = target_class_id
-                # print(f"[Debug] Overrode patch {patch_id} with class '{class_name}' (ID: {target_class_id})")
+            override_ids.append(patch_id)
+            override_names.append(class_name)
+            override_stamps.append(annotation.get('datetime'))
+
+        if override_ids:
+            # Resolve each distinct class name once
+            unique_names, first_seen, inverse = np.unique(
+                np.asarray(override_names), return_index=True, return_inverse=True
+            )
+            unique_names = unique_names.tolist()
+
+            # Register unseen classes in the order they first appear in the annotations
+            for k in np.argsort(first_seen, kind='stable'):
+                class_name = unique_names[k]
+                if class_name not in class_to_id_map:
+                    logger.debug("_apply_manual_patch_annotations => New class %r found in manual annotations. Adding to list", class_name)
+                    new_id = len(self.patch_class_name)
+                    self.patch_class_name.append(class_name)
+                    # Don't read color from annotation - use default, color will come from colormap
+                    self.patch_class_hex_color.append('#808080')  # Default, will be overridden by colormap
+                    class_to_id_map[class_name] = new_id
+                    self._patch_class_name_index_len = len(self.patch_class_name)
+
+            unique_ids = np.fromiter((class_to_id_map[name] for name in unique_names), dtype=np.int64, count=len(unique_names))
+            target_class_ids = unique_ids[inverse.ravel()]
+            patch_ids = np.fromiter(override_ids, dtype=np.int64, count=len(override_ids))
+            # Annotations older than the model run were superseded by it
+            if model_ts is not None:
+                keep = timestamps_newer_than(override_stamps, model_ts)
             else:
-                print(f"[Warning] Manual annotation patch_ID {patch_id} is out of bounds.")
+                keep = np.ones(len(override_ids), dtype=bool)
+            patch_ids = patch_ids[keep]
+            target_class_ids = target_class_ids[keep]
+
+            in_bounds = (patch_ids >= 0) & (patch_ids < len(self.patch_class_id))
+            self.patch_class_id[patch_ids[in_bounds]] = target_class_ids[in_bounds]
+            if not in_bounds.all():
+                logger.warning("_apply_manual_patch_annotations => %d manual annotation patch_IDs out of bounds", int(np.count_nonzero(~in_bounds)))
         
-        # Update self.tissue_annotations with the loaded manual annotations
-        self.tissue_annotations = manual_annotations
-        print(f"[Debug] Updated self.tissue_annotations with {len(manual_annotations)} manual annotations.")
+        # Update self.tissue_annotations with the loaded manual annotations (a copy, so in-place edits
+        # do not leak into the parse cache)
+        self.tissue_annotations = dict(manual_annotations)
+        logger.debug("_apply_manual_patch_annotations => Updated tissue_annotations with %d manual annotations", len(manual_annotations))
         
-        print("[Debug] Finished applying manual patch annotations.")
+        logger.debug("_apply_manual_patch_annotations => Finished applying manual patch annotations")
         
     def _load_annotations_array(self, zarr_file, fields=None, return_non_empty_indices=False):
         """
@@ -2845,17 +3262,48 @@ class SegmentationHandler:
                 return result if not return_non_empty_indices else (result, None)
             else:
                 # Load entire structured array (slower but complete)
-                manual_annotations = np.array(annotations_dataset[:])
+                manual_annotations = read_zarr_array(annotations_dataset)
                 return manual_annotations if not return_non_empty_indices else (manual_annotations, None)
         except Exception as e:
             print(f"[Error] Failed to load structured array format annotations: {e}")
             return None if not return_non_empty_indices else (None, None)
     
+    def _merge_metadata_classes(self, zarr_file, class_names_from_metadata, context=None):
+        """Append classes listed in user_annotation.attrs but missing from self.class_name (with their colors)."""
+        if not class_names_from_metadata:
+            return
+        current_names = list(self.class_name)
+        current_colors = list(self.class_hex_color) if self.class_hex_color is not None else []
+
+        # Get colors from metadata for new classes
+        class_colors_from_metadata = []
+        if 'user_annotation' in zarr_file:
+            user_annotation_group = zarr_file['user_annotation']
+            if 'class_colors' in user_annotation_group.attrs:
+                class_colors_from_metadata = user_annotation_group.attrs.get('class_colors', [])
+        color_map = dict(zip(class_names_from_metadata, class_colors_from_metadata)) if class_colors_from_metadata else {}
+
+        # Add missing classes from metadata
+        known_names = set(current_names)
+        classes_added = []
+        for meta_name in class_names_from_metadata:
+            if meta_name not in known_names:
+                known_names.add(meta_name)
+                current_names.append(meta_name)
+                current_colors.append(color_map.get(meta_name, "#808080"))
+                classes_added.append(meta_name)
+
+        if classes_added:
+            self.class_name = np.array(current_names)
+            self.class_hex_color = np.array(current_colors)
+            suffix = f" ({context})" if context else ""
+            print(f"[Debug] Merged user-added classes from metadata{suffix}: {classes_added}")
+
     def _apply_manual_nuclei_annotations(self, zarr_file):
         # Always apply manual annotations to ensure handler state is synchronized with Zarr file
             
         if 'user_annotation' not in zarr_file:
-            print("[Debug] No user_annotation group found in Zarr file.")
+            logger.debug("_apply_manual_nuclei_annotations => No user_annotation group found in Zarr file")
             return
         
         # Load structured array directly (no dict conversion for performance)
@@ -2868,14 +3316,14 @@ class SegmentationHandler:
             original_indices = None
         
         if manual_annotations is None or len(manual_annotations) == 0:
-            print("[Debug] No manual annotations found.")
+            logger.debug("_apply_manual_nuclei_annotations => No manual annotations found")
             # Initialize default classification data if none exists
             if self.class_name is None and self.centroids is not None:
-                print("[Debug] Initializing default classification data.")
+                logger.debug("_apply_manual_nuclei_annotations => Initializing default classification data")
                 self.class_name = ["Negative control"]
                 self.class_hex_color = ["#aaaaaa"]
-                self.class_id = np.full(len(self.centroids), -1, dtype=int)
-                print(f"[Debug] Initialized with default classes: {self.class_name}")
+                self.class_id = unassigned_class_ids(len(self.centroids))
+                logger.debug("_apply_manual_nuclei_annotations => Initialized with default classes: %s", self.class_name)
             return
 
         # Get cell class data (direct field access, no copy)
@@ -2915,23 +3363,23 @@ class SegmentationHandler:
                 class_names_from_metadata = user_annotation_group.attrs.get('class_names', [])
         
         if not np.any(non_empty_mask):
-            print("[Debug] No non-empty annotations found.")
+            logger.debug("_apply_manual_nuclei_annotations => No non-empty annotations found")
             if self.class_name is None and self.centroids is not None:
                 self.class_name = ["Negative control"]
                 self.class_hex_color = ["#aaaaaa"]
-                self.class_id = np.full(len(self.centroids), -1, dtype=int)
+                self.class_id = unassigned_class_ids(len(self.centroids))
             return
 
         # Scenario 1: No model data exists, initialize everything from manual annotations
         # OR: class_name exists but class_id is not properly initialized (e.g., after reset)
         if self.class_name is None or self.class_id is None or (self.centroids is not None and len(self.class_id) != len(self.centroids)):
             if self.class_name is None:
-                print("[Debug] No model classification found. Initializing from manual annotations.")
+                logger.debug("_apply_manual_nuclei_annotations => No model classification found. Initializing from manual annotations")
             else:
-                print(f"[Debug] class_name exists but class_id not properly initialized (class_id={self.class_id is not None}, len={len(self.class_id) if self.class_id is not None else 0}, centroids_len={len(self.centroids) if self.centroids is not None else 0}). Initializing class_id.")
+                logger.debug("_apply_manual_nuclei_annotations => class_name exists but class_id not properly initialized (class_id=%s, len=%d, centroids_len=%d). Initializing class_id", self.class_id is not None, len(self.class_id) if self.class_id is not None else 0, len(self.centroids) if self.centroids is not None else 0)
             
             if self.centroids is None:
-                print("[Error] Cannot apply manual annotations without centroids data. Aborting.")
+                logger.error("_apply_manual_nuclei_annotations => Cannot apply manual annotations without centroids data. Aborting")
                 return
 
             # If class_name already exists (from ClassificationNode), use it; otherwise extract from annotations
@@ -2962,7 +3410,7 @@ class SegmentationHandler:
                 # class_name exists but class_id needs initialization
                 # Ensure class_hex_color is also initialized if missing
                 if self.class_hex_color is None or len(self.class_hex_color) != len(self.class_name):
-                    print(f"[Debug] Initializing class_hex_color to match class_name (len={len(self.class_name)})")
+                    logger.debug("_apply_manual_nuclei_annotations => Initializing class_hex_color to match class_name (len=%d)", len(self.class_name))
                     self.class_hex_color = ["#808080"] * len(self.class_name)
                     if "Negative control" in self.class_name:
                         nc_index = self.class_name.index("Negative control")
@@ -2971,74 +3419,24 @@ class SegmentationHandler:
                 # BUG FIX: Merge user-added classes from user_annotation.attrs into self.class_name
                 # This ensures manually added classes (e.g., "Adipocytes (Fat Cells)") are not lost
                 # when handler reloads data after save_annotation invalidates the cache
-                if class_names_from_metadata:
-                    current_names = list(self.class_name)
-                    current_colors = list(self.class_hex_color) if self.class_hex_color is not None else []
-                    
-                    # Get colors from metadata for new classes
-                    class_colors_from_metadata = []
-                    if 'user_annotation' in zarr_file:
-                        user_annotation_group = zarr_file['user_annotation']
-                        if 'class_colors' in user_annotation_group.attrs:
-                            class_colors_from_metadata = user_annotation_group.attrs.get('class_colors', [])
-                    color_map = dict(zip(class_names_from_metadata, class_colors_from_metadata)) if class_colors_from_metadata else {}
-                    
-                    # Add missing classes from metadata
-                    classes_added = []
-                    for meta_name in class_names_from_metadata:
-                        if meta_name not in current_names:
-                            current_names.append(meta_name)
-                            current_colors.append(color_map.get(meta_name, "#808080"))
-                            classes_added.append(meta_name)
-                    
-                    if classes_added:
-                        self.class_name = np.array(current_names)
-                        self.class_hex_color = np.array(current_colors)
-                        print(f"[Debug] Merged user-added classes from metadata: {classes_added}")
+                self._merge_metadata_classes(zarr_file, class_names_from_metadata)
 
             # Default all nuclei to UNCLASSIFIED (-1) until explicitly annotated
-            self.class_id = np.full(len(self.centroids), -1, dtype=int)
+            self.class_id = unassigned_class_ids(len(self.centroids))
             
-            print(f"[Debug] Initialized class_id with length {len(self.class_id)} to match centroids")
+            logger.debug("_apply_manual_nuclei_annotations => Initialized class_id with length %d to match centroids", len(self.class_id))
         else:
             # Scenario 2: Both class_name and class_id exist with correct lengths
             # Still need to merge user-added classes from metadata to ensure consistency
-            if class_names_from_metadata:
-                current_names = list(self.class_name)
-                current_colors = list(self.class_hex_color) if self.class_hex_color is not None else []
-                
-                # Get colors from metadata for new classes
-                class_colors_from_metadata = []
-                if 'user_annotation' in zarr_file:
-                    user_annotation_group = zarr_file['user_annotation']
-                    if 'class_colors' in user_annotation_group.attrs:
-                        class_colors_from_metadata = user_annotation_group.attrs.get('class_colors', [])
-                color_map = dict(zip(class_names_from_metadata, class_colors_from_metadata)) if class_colors_from_metadata else {}
-                
-                # Add missing classes from metadata
-                classes_added = []
-                for meta_name in class_names_from_metadata:
-                    if meta_name not in current_names:
-                        current_names.append(meta_name)
-                        current_colors.append(color_map.get(meta_name, "#808080"))
-                        classes_added.append(meta_name)
-                
-                if classes_added:
-                    self.class_name = np.array(current_names)
-                    self.class_hex_color = np.array(current_colors)
-                    print(f"[Debug] Merged user-added classes from metadata (existing model data): {classes_added}")
+            self._merge_metadata_classes(zarr_file, class_names_from_metadata, "existing model data")
 
         # Now, proceed with overriding based on the (potentially just created) class mapping
         class_to_id_map = {name: i for i, name in enumerate(self.class_name)}
         
-        # Pre-allocate lists for better performance
-        class_name_list = list(self.class_name)
-        class_hex_color_list = list(self.class_hex_color)
-        
         # Batch process annotations using numpy operations (much faster)
         
         # Filter annotations using numpy masks
-        valid_indices = np.where(non_empty_mask)[0]
+        valid_indices = np.flatnonzero(non_empty_mask)
         
         # First pass: collect valid annotations and new classes
         # Use vectorized operations where possible
@@ -3051,9 +3449,9 @@ class SegmentationHandler:
             max_valid_idx = len(original_indices) - 1
             if len(valid_indices) > 0 and valid_indices.max() > max_valid_idx:
                 # Reset detected: recalculate valid_indices based on current array size
-                print(f"[Debug] Reset detected: original_indices size={len(original_indices)}, valid_indices max={valid_indices.max() if len(valid_indices) > 0 else 0}. Recalculating valid_indices.")
+                logger.debug("_apply_manual_nuclei_annotations => Reset detected: original_indices size=%d, valid_indices max=%d. Recalculating valid_indices", len(original_indices), valid_indices.max() if len(valid_indices) > 0 else 0)
                 # Recalculate valid_indices based on current array
-                valid_indices = np.where(non_empty_mask)[0]
+                valid_indices = np.flatnonzero(non_empty_mask)
                 # After reset, use valid_indices directly as nucleus_ids
                 nucleus_ids = valid_indices if len(valid_indices) > 0 else np.array([], dtype=int)
             else:
@@ -3062,7 +3460,7 @@ class SegmentationHandler:
                     # Additional safety check: filter out out-of-bounds indices
                     valid_mask = valid_indices < len(original_indices)
                     valid_indices = valid_indices[valid_mask]
-                    print(f"[Debug] Filtered out {np.sum(~valid_mask)} out-of-bounds indices")
+                    logger.debug("_apply_manual_nuclei_annotations => Filtered out %d out-of-bounds indices", int(np.count_nonzero(~valid_mask)))
                 nucleus_ids = original_indices[valid_indices] if len(valid_indices) > 0 else np.array([], dtype=int)
         else:
             nucleus_ids = valid_indices
@@ -3108,13 +3506,13 @@ class SegmentationHandler:
                         filtered_nucleus_ids = filtered_nucleus_ids[timestamp_mask]
                         filtered_class_ids = filtered_class_ids[timestamp_mask]
                     except Exception as e:
-                        print(f"[Debug] Could not load datetime for filtering: {e}")
+                        logger.debug("_apply_manual_nuclei_annotations => Could not load datetime for filtering: %s", e)
         
         # Check bounds using vectorized operation
         bounds_mask = (filtered_nucleus_ids >= 0) & (filtered_nucleus_ids < len(self.class_id))
         out_of_bounds_count = np.sum(~bounds_mask)
         if out_of_bounds_count > 0:
-            print(f"[Warning] {out_of_bounds_count} manual annotation cell_IDs are out of bounds.")
+            logger.warning("_apply_manual_nuclei_annotations => %d manual annotation cell_IDs are out of bounds", out_of_bounds_count)
         
         # Apply bounds mask
         final_nucleus_ids = filtered_nucleus_ids[bounds_mask]
@@ -3145,7 +3543,7 @@ class SegmentationHandler:
                 
                 if needs_offset:
                     # Offset all class_ids by +1 to account for "Negative control" added at index 0
-                    print(f"[Debug] Metadata has no 'Negative control' but handler does. Offsetting class_ids by +1")
+                    logger.debug("_apply_manual_nuclei_annotations => Metadata has no 'Negative control' but handler does. Offsetting class_ids by +1")
                     offset_class_ids = final_class_ids + 1
                     # Filter valid IDs (within range of self.class_name)
                     max_class_id = len(self.class_name) - 1
@@ -3156,23 +3554,17 @@ class SegmentationHandler:
                         # Vectorized assignment
                         self.class_id[valid_nucleus_ids] = valid_class_ids
                     else:
-                        print(f"[Warning] No valid class IDs found after offset (max={max_class_id})")
+                        logger.warning("_apply_manual_nuclei_annotations => No valid class IDs found after offset (max=%d)", max_class_id)
                 else:
-                    # Create mapping from metadata class_names to self.class_name indices
-                    metadata_to_handler_map = {}
-                    for i, name in enumerate(class_names_from_metadata):
-                        if name in class_to_id_map:
-                            metadata_to_handler_map[i] = class_to_id_map[name]
-                        else:
-                            # Class not found in handler, skip it
-                            metadata_to_handler_map[i] = -1
-                    
-                    # Map class_ids using vectorized operation
-                    # Create a lookup array for fast mapping
-                    lookup_size = max(max(final_class_ids), max(metadata_to_handler_map.keys())) + 1 if len(final_class_ids) > 0 else 0
-                    lookup_array = np.full(lookup_size, -1, dtype=np.int32)
-                    for k, v in metadata_to_handler_map.items():
-                        lookup_array[k] = v
+                    # Lookup array from metadata class index to self.class_name index
+                    # (-1 for classes the handler does not know, and for ids past the metadata list)
+                    metadata_to_handler = np.fromiter(
+                        (class_to_id_map.get(name, -1) for name in class_names_from_metadata),
+                        dtype=np.int32, count=len(class_names_from_metadata)
+                    )
+                    lookup_size = max(int(final_class_ids.max()) + 1, len(metadata_to_handler))
+                    lookup_array = unassigned_class_ids(lookup_size)
+                    lookup_array[:len(metadata_to_handler)] = metadata_to_handler
                     # Use numpy advanced indexing; out-of-bounds indices will be set to -1
                     mapped_class_ids = np.where(
                         (final_class_ids >= 0) & (final_class_ids < lookup_size),
@@ -3188,7 +3580,7 @@ class SegmentationHandler:
                         # Vectorized assignment (much faster than loop)
                         self.class_id[valid_nucleus_ids] = valid_class_ids
                     else:
-                        print(f"[Warning] No valid class mappings found for {len(final_class_ids)} annotations")
+                        logger.warning("_apply_manual_nuclei_annotations => No valid class mappings found for %d annotations", len(final_class_ids))
             else:
                 # No metadata, use IDs directly (assuming they match self.class_name)
                 # Filter valid IDs (within range of self.class_name)
@@ -3201,57 +3593,132 @@ class SegmentationHandler:
                     # Vectorized assignment
                     self.class_id[valid_nucleus_ids] = valid_class_ids
                 else:
-                    print(f"[Warning] No valid class IDs found (max={max_class_id})")
+                    logger.warning("_apply_manual_nuclei_annotations => No valid class IDs found (max=%d)", max_class_id)
         
         # Negative selection ("No" type): cell_class <= -2 means exclude from that class.
         # Do not change class_id for those cells — keep original color; prediction will update when model runs.
 
-        # Convert back to numpy arrays
-        self.class_name = np.array(class_name_list)
-        self.class_hex_color = np.array(class_hex_color_list)
+        # Keep class_name/class_hex_color as numpy arrays; asarray is a no-op when they already are,
+        # so only the list-initialized scenarios above pay for a conversion
+        self.class_name = np.asarray(self.class_name)
+        self.class_hex_color = np.asarray(self.class_hex_color)
         
         # Cache mechanism removed - always process annotations
         
         # Auto-create ClassificationNode if it doesn't exist and we have classification data
-        print(f"[Debug] Checking if ClassificationNode should be created: class_name={self.class_name is not None}, class_hex_color={self.class_hex_color is not None}, len={len(self.class_name) if self.class_name is not None else 0}")
+        logger.debug("_apply_manual_nuclei_annotations => Checking if ClassificationNode should be created: class_name=%s, class_hex_color=%s, len=%d", self.class_name is not None, self.class_hex_color is not None, len(self.class_name) if self.class_name is not None else 0)
         
         if self.class_name is not None and self.class_hex_color is not None and len(self.class_name) > 0:
             try:
                 zarr_file_path = self.get_current_file_path()
-                print(f"[Debug] Attempting to create ClassificationNode in: {zarr_file_path}")
+                logger.debug("_apply_manual_nuclei_annotations => Attempting to create ClassificationNode in: %s", zarr_file_path)
                 
                 # Create synchronizer for thread-safe access (use cached synchronizer)
                 synchronizer = self._create_zarr_synchronizer(zarr_file_path)
                 
                 with zarr.open(zarr_file_path, 'a', synchronizer=synchronizer) as zf:
                     if 'ClassificationNode' not in zf:
-                        print("[Debug] Creating ClassificationNode from manual annotations")
+                        logger.debug("_apply_manual_nuclei_annotations => Creating ClassificationNode from manual annotations")
                         classification_group = zf.create_group('ClassificationNode')
                         
                         # Store class information as group attributes
-                        classification_group.attrs['class_names'] = [str(name) for name in self.class_name]
-                        classification_group.attrs['class_colors'] = [str(color) for color in self.class_hex_color]
-                        classification_group.attrs['path'] = str(zarr_file_path)
-                        classification_group.attrs['last_updated'] = time.time()
+                        classification_group.attrs.update({
+                            'class_names': [str(name) for name in self.class_name],
+                            'class_colors': [str(color) for color in self.class_hex_color],
+                            'path': str(zarr_file_path),
+                            'last_updated': time.time(),
+                        })
                         
                         # nuclei_class_id is not stored in ClassificationNode attributes
                         # It is dynamically extracted from user_annotation/nuclei_annotations when needed
                         
-                        print(f"[Debug] Created ClassificationNode with {len(self.class_name)} classes: {self.class_name}")
-                        print(f"[Debug] Created ClassificationNode with colors: {self.class_hex_color}")
+                        logger.debug("_apply_manual_nuclei_annotations => Created ClassificationNode with %d classes: %s", len(self.class_name), self.class_name)
+                        logger.debug("_apply_manual_nuclei_annotations => Created ClassificationNode with colors: %s", self.class_hex_color)
                     else:
-                        print("[Debug] ClassificationNode already exists")
+                        logger.debug("_apply_manual_nuclei_annotations => ClassificationNode already exists")
             except Exception as e:
-                print(f"[Debug] Failed to create ClassificationNode: {e}")
+                logger.debug("_apply_manual_nuclei_annotations => Failed to create ClassificationNode: %s", e)
                 traceback.print_exc()
         else:
-            print("[Debug] ClassificationNode creation skipped - missing classification data")
+            logger.debug("_apply_manual_nuclei_annotations => ClassificationNode creation skipped - missing classification data")
         
-        print("[Debug] Finished applying manual nuclei annotations.")
+        logger.debug("_apply_manual_nuclei_annotations => Finished applying manual nuclei annotations")
+
+    def _get_prefixed_keys(self):
+        """get flattened dataset keys derived from the current prefixes (memoized until a prefix changes)"""
+        if self._prefixed_keys_cache is None:
+            classification_prefix = self._classification_prefix
+            patch_prefix = self._patch_classification_prefix
+            self._prefixed_keys_cache = {
+                'classification_prefix': classification_prefix,
+                'patch_prefix': patch_prefix,
+                'class_id': f'{classification_prefix}_nuclei_class_id',
+                'class_name': f'{classification_prefix}_nuclei_class_name',
+                'class_hex_color': f'{classification_prefix}_nuclei_class_HEX_color',
+                'class_labels': f'{classification_prefix}_nuclei_class',
+                'patch_coordinates': f'{patch_prefix}_coordinates',
+            }
+        return self._prefixed_keys_cache
+
+    def _get_patch_class_name_index(self):
+        """get name -> index map over patch_class_name (rebuilt only when the class list is replaced or grows)"""
+        names = self.patch_class_name
+        if names is None:
+            return {}
+        if (self._patch_class_name_index is None or self._patch_class_name_index_source is not names
+                or self._patch_class_name_index_len != len(names)):
+            index = {}
+            for i, name in enumerate(decode_str_array(names).tolist()):
+                index.setdefault(name, i)
+            self._patch_class_name_index = index
+            self._patch_class_name_index_source = names
+            self._patch_class_name_index_len = len(names)
+        return self._patch_class_name_index
+
+    def _get_class_name_index(self):
+        """get name -> index map over class_name (rebuilt only when the class list is replaced or grows)
+
+        A repeated name maps to its last index.
+        """
+        names = self.class_name
+        if names is None:
+            return {}
+        if (self._class_name_index is None or self._class_name_index_source is not names
+                or self._class_name_index_len != len(names)):
+            self._class_name_index = {name: i for i, name in enumerate(decode_str_array(names).tolist())}
+            self._class_name_index_source = names
+            self._class_name_index_len = len(names)
+        return self._class_name_index
+
+    def _get_class_tables(self):
+        """get (names, colors) as decoded str lists over class_name/class_hex_color
+
+        Rebuilt only when either list is replaced or changes length; per-nucleus lookups index these
+        plain Python strings.
+        """
+        names, colors = self.class_name, self.class_hex_color
+        source = self._class_tables_source
+        if (self._class_tables is None or source[0] is not names or source[1] is not colors
+                or self._class_tables_lens != (len(names), len(colors))):
+            self._class_tables = (decode_str_array(names).tolist(), decode_str_array(colors).tolist())
+            self._class_tables_source = (names, colors)
+            self._class_tables_lens = (len(names), len(colors))
+        return self._class_tables
+
+    def _get_patch_color_table(self):
+        """get patch_class_hex_color as a decoded str array (rebuilt only when the list is replaced or grows)"""
+        colors = self.patch_class_hex_color
+        if (self._patch_color_table is None or self._patch_color_table_source is not colors
+                or self._patch_color_table_len != len(colors)):
+            self._patch_color_table = decode_str_array(colors)
+            self._patch_color_table_source = colors
+            self._patch_color_table_len = len(colors)
+        return self._patch_color_table
 
     def set_classification_prefix(self, prefix):
         """set prefix for classification result"""
         self._classification_prefix = prefix
+        self._prefixed_keys_cache = None
 
     def get_classification_prefix(self):
         """get prefix for classification result"""
@@ -3276,6 +3743,7 @@ class SegmentationHandler:
     def set_patch_classification_prefix(self, prefix):
         """set prefix for patch classification result"""
         self._patch_classification_prefix = prefix
+        self._prefixed_keys_cache = None
 
     def get_tissue_segmentation_prefix(self):
         """get prefix for tissue segmentation result"""
@@ -3283,9 +3751,9 @@ class SegmentationHandler:
     
     def get_patch_classification(self):
         """get patch classification result"""
-        patch_class_id_instances = getattr(self, 'patch_class_id', None)
-        patch_class_name = getattr(self, 'patch_class_name', None)
-        patch_class_hex_color = getattr(self, 'patch_class_hex_color', None)
+        patch_class_id_instances = self.patch_class_id
+        patch_class_name = self.patch_class_name
+        patch_class_hex_color = self.patch_class_hex_color
 
         processed_class_name = patch_class_name
         processed_class_hex_color = patch_class_hex_color
@@ -3320,81 +3788,77 @@ class SegmentationHandler:
         defined_class_ids = list(range(len(processed_class_name)))
 
         # Load counts and colors from user_annotation (priority source)
-        class_counts = [0] * len(processed_class_name)
+        class_counts = np.zeros(len(processed_class_name), dtype=np.int64)
         try:
-            # Direct loading from Zarr file (no cache)
+            # Read through the handler's shared read-only group
             if self.zarr_file and os.path.exists(self.zarr_file):
-                with zarr.open(self.zarr_file, 'r') as zarr_file:
-                    if 'user_annotation' in zarr_file:
-                        user_anno_group = zarr_file['user_annotation']
+                zarr_file = self._get_read_zarr_group()
+                if 'user_annotation' in zarr_file:
+                    user_anno_group = zarr_file['user_annotation']
+                    
+                    # Priority: Load colors from user_annotation.attrs['tissue_class_colors']
+                    if 'tissue_class_colors' in user_anno_group.attrs and 'tissue_class_names' in user_anno_group.attrs:
+                        user_tissue_class_names = list(user_anno_group.attrs.get('tissue_class_names', []))
+                        user_tissue_colors = list(user_anno_group.attrs.get('tissue_class_colors', []))
                         
-                        # Priority: Load colors from user_annotation.attrs['tissue_class_colors']
-                        if 'tissue_class_colors' in user_anno_group.attrs and 'tissue_class_names' in user_anno_group.attrs:
-                            user_tissue_class_names = list(user_anno_group.attrs.get('tissue_class_names', []))
-                            user_tissue_colors = list(user_anno_group.attrs.get('tissue_class_colors', []))
-                            
-                            # Create a mapping from class name to color
-                            name_to_color = {
-                                (name.decode('utf-8') if isinstance(name, bytes) else str(name)): 
-                                (color.decode('utf-8') if isinstance(color, bytes) else str(color))
-                                for name, color in zip(user_tissue_class_names, user_tissue_colors)
-                            }
-                            
-                            # Update processed_class_hex_color with colors from user_annotation
-                            # Match by class name
-                            updated_colors = []
-                            for idx, class_name in enumerate(processed_class_name):
-                                if class_name in name_to_color:
-                                    updated_colors.append(name_to_color[class_name])
-                                else:
-                                    # Keep existing color if not found in user_annotation
-                                    if idx < len(processed_class_hex_color):
-                                        updated_colors.append(processed_class_hex_color[idx])
-                                    else:
-                                        updated_colors.append("#aaaaaa")
-                            
-                            if len(updated_colors) == len(processed_class_name):
-                                processed_class_hex_color = updated_colors
-                                print(f"[get_patch_classification] Loaded {len(updated_colors)} colors from user_annotation.attrs")
+                        # Create a mapping from class name to color
+                        name_to_color = {
+                            (name.decode('utf-8') if isinstance(name, bytes) else str(name)): 
+                            (color.decode('utf-8') if isinstance(color, bytes) else str(color))
+                            for name, color in zip(user_tissue_class_names, user_tissue_colors)
+                        }
                         
-                        # Load counts from patch_class_counts
-                        if 'patch_class_counts' in user_anno_group:
-                            counts_dataset = user_anno_group['patch_class_counts']
-                            # Handle scalar array (0-dimensional)
-                            if hasattr(counts_dataset, 'shape') and counts_dataset.shape == ():
-                                raw_data = counts_dataset[()]
+                        # Update processed_class_hex_color with colors from user_annotation
+                        # Match by class name
+                        updated_colors = []
+                        for idx, class_name in enumerate(processed_class_name):
+                            if class_name in name_to_color:
+                                updated_colors.append(name_to_color[class_name])
                             else:
-                                raw_data = counts_dataset[:]
-                            
-                            if isinstance(raw_data, bytes):
-                                counts_dict = json.loads(raw_data.decode('utf-8'))
-                            elif isinstance(raw_data, str):
-                                counts_dict = json.loads(raw_data)
-                            elif isinstance(raw_data, dict):
-                                counts_dict = raw_data
-                            else:
-                                # Try to decode if it's a numpy array
-                                if isinstance(raw_data, np.ndarray):
-                                    if raw_data.dtype.kind == 'S' or raw_data.dtype.kind == 'U':
-                                        if raw_data.ndim == 0:
-                                            json_str = str(raw_data.item())
-                                        else:
-                                            json_str = str(raw_data.flat[0])
-                                        if isinstance(json_str, bytes):
-                                            json_str = json_str.decode('utf-8')
-                                        counts_dict = json.loads(json_str)
-                                    else:
-                                        counts_dict = {}
+                                # Keep existing color if not found in user_annotation
+                                if idx < len(processed_class_hex_color):
+                                    updated_colors.append(processed_class_hex_color[idx])
+                                else:
+                                    updated_colors.append("#aaaaaa")
+                        
+                        if len(updated_colors) == len(processed_class_name):
+                            processed_class_hex_color = updated_colors
+                            print(f"[get_patch_classification] Loaded {len(updated_colors)} colors from user_annotation.attrs")
+                    
+                    # Load counts from patch_class_counts
+                    if 'patch_class_counts' in user_anno_group:
+                        counts_dataset = user_anno_group['patch_class_counts']
+                        # Handle scalar array (0-dimensional)
+                        if hasattr(counts_dataset, 'shape') and counts_dataset.shape == ():
+                            raw_data = counts_dataset[()]
+                        else:
+                            raw_data = counts_dataset[:]
+                        
+                        if isinstance(raw_data, (bytes, str)):
+                            counts_dict = load_json_scalar(raw_data)
+                        elif isinstance(raw_data, dict):
+                            counts_dict = raw_data
+                        else:
+                            # Try to decode if it's a numpy array
+                            if isinstance(raw_data, np.ndarray):
+                                if raw_data.dtype.kind == 'S' or raw_data.dtype.kind == 'U':
+                                    counts_dict = load_json_scalar(raw_data.item() if raw_data.ndim == 0 else raw_data.flat[0])
                                 else:
                                     counts_dict = {}
-
-                            print(f"[get_patch_classification] Loaded patch_class_counts dict: {counts_dict}")
-                            name_to_id = {name: i for i, name in enumerate(processed_class_name)}
-                            for name, count in counts_dict.items():
-                                if name in name_to_id:
-                                    class_counts[name_to_id[name]] = int(count) if isinstance(count, (int, float)) else 0
-                                    print(f"[get_patch_classification] Mapped '{name}' (count={count}) to index {name_to_id[name]}")
-                            print(f"[get_patch_classification] Final class_counts array: {class_counts}")
+                            else:
+                                counts_dict = {}
+
+                        print(f"[get_patch_classification] Loaded patch_class_counts dict: {counts_dict}")
+                        name_to_id = {name: i for i, name in enumerate(processed_class_name)}
+                        known_names = [name for name in counts_dict if name in name_to_id]
+                        if known_names:
+                            idxs = np.fromiter((name_to_id[name] for name in known_names), dtype=np.int64, count=len(known_names))
+                            vals = np.fromiter(
+                                (int(counts_dict[name]) if isinstance(counts_dict[name], (int, float)) else 0 for name in known_names),
+                                dtype=np.int64, count=len(known_names),
+                            )
+                            class_counts[idxs] = vals
+                        print(f"[get_patch_classification] Final class_counts array: {class_counts.tolist()}")
         except Exception as e:
             print(f"Could not load patch_class_counts or colors from user_annotation, using defaults. Error: {e}")
             traceback.print_exc()
@@ -3405,9 +3869,9 @@ class SegmentationHandler:
         num_classes = len(processed_class_name)
         if len(defined_class_ids) != num_classes: defined_class_ids = list(range(num_classes))
         if len(processed_class_hex_color) != num_classes: processed_class_hex_color = ["#aaaaaa"] * num_classes
-        if len(class_counts) != num_classes: class_counts = [0] * num_classes
+        if len(class_counts) != num_classes: class_counts = np.zeros(num_classes, dtype=np.int64)
 
-        return defined_class_ids, processed_class_name, processed_class_hex_color, class_counts
+        return defined_class_ids, processed_class_name, processed_class_hex_color, class_counts.tolist()
     
     def get_current_file_path(self):
         if self.zarr_file:
@@ -3417,6 +3881,12 @@ class SegmentationHandler:
     def clear_annotations_cache(self):
         self.annotations_data = {}
         self.tissue_annotations = {}
+        self._patch_annotations_cache_key = None
+        self._patch_annotations_parsed = None
+        # Parsed root tissue_annotations used for patch viewport color overrides, keyed the same way
+        self._tissue_overrides_cache_key = None
+        self._tissue_overrides_parsed = None
+        self._tissue_overrides_by_index = None
     
     #   classification
     def get_cell_classification_data(self):
@@ -3438,8 +3908,8 @@ class SegmentationHandler:
             if zarr_path in _reclassified_cells:
                 reclassified_data = _reclassified_cells[zarr_path]
 
-                # Convert class names to IDs for reclassification
-                class_name_to_id = {name: idx for idx, name in enumerate(self.class_name)}
+                # Convert class names to IDs for reclassification (cached per class list)
+                class_name_to_id = self._get_class_name_index()
 
                 for cell_id_str, reclassify_info in reclassified_data.items():
                     try:
@@ -3459,8 +3929,8 @@ class SegmentationHandler:
         # Priority: user_annotation.attrs['class_names'] and ['class_colors'] (most up-to-date, updated by delete_class) 
         # > self.class_name and self.class_hex_color (loaded from file, may be stale)
         # > ClassificationNode.attrs['class_colors'] (from task node)
-        names_out = [str(name) for name in self.class_name] if self.class_name is not None else []
-        colors_out = [str(color) for color in self.class_hex_color] if self.class_hex_color is not None else []
+        names_out = decode_str_array(self.class_name).tolist() if self.class_name is not None else []
+        colors_out = decode_str_array(self.class_hex_color).tolist() if self.class_hex_color is not None else []
         
         # Try to get names and colors from user_annotation metadata first (most up-to-date, includes deletions)
         try:
@@ -3500,23 +3970,96 @@ class SegmentationHandler:
         
         return result
 
+    def _refresh_annotation_colors(self):
+        """Rebuild the list-based annotation_colors from the classification arrays.
+
+        class_id holds one entry per nucleus, so tolist() on it allocates millions of Python ints on
+        large slides. The rebuild is skipped when the arrays hash to the same content as last time and
+        the lists have not been extended since (store_annotation_color appends to them).
+        """
+        class_id = np.ascontiguousarray(self.class_id)
+        signature = (
+            class_id.dtype.str,
+            class_id.shape,
+            hashlib.blake2b(class_id, digest_size=16).digest(),
+            tuple(np.asarray(self.class_name).tolist()),
+            tuple(np.asarray(self.class_hex_color).tolist()),
+        )
+        colors = self.annotation_colors
+        if (signature == self._annotation_colors_signature
+                and len(colors["class_id"]) == len(class_id)
+                and len(colors["class_name"]) == len(self.class_name)
+                and len(colors["class_hex_color"]) == len(self.class_hex_color)):
+            return
+
+        self.annotation_colors = {
+            "class_id": self.class_id.tolist() if hasattr(self.class_id, 'tolist') else self.class_id,
+            "class_name": self.class_name.tolist() if hasattr(self.class_name, 'tolist') else self.class_name,
+            "class_hex_color": self.class_hex_color.tolist() if hasattr(self.class_hex_color, 'tolist') else self.class_hex_color
+        }
+        self._annotation_colors_signature = signature
+
     def store_annotation_color(self, indices, class_name, color):
         """Store the color for the given indices (vectorized)."""
-        # Convert to numpy array if not already
-        if not isinstance(indices, np.ndarray):
-            indices = np.array(indices)
+        # Arrays become Python ints in one C-level tolist(); other iterables are taken as given
+        if isinstance(indices, np.ndarray):
+            indices = indices.ravel().tolist()
+        elif not isinstance(indices, list):
+            indices = list(indices)
         # Vectorized batch append: extend all lists at once
         n = len(indices)
-        self.annotation_colors["class_id"].extend(indices.tolist())
+        self.annotation_colors["class_id"].extend(indices)
         self.annotation_colors["class_name"].extend([class_name] * n)
         self.annotation_colors["class_hex_color"].extend([color] * n)
 
+    def _get_annotation_color_index(self):
+        """get class_id value -> first position map over annotation_colors["class_id"]
+
+        The list is only ever replaced or extended, so a longer list under the same object only indexes
+        the appended tail.
+        """
+        ids = self.annotation_colors["class_id"]
+        if self._annotation_color_index_source is not ids or self._annotation_color_index_len > len(ids):
+            self._annotation_color_index = {}
+            self._annotation_color_index_source = ids
+            self._annotation_color_index_len = 0
+        if self._annotation_color_index_len < len(ids):
+            index = self._annotation_color_index
+            for pos in range(self._annotation_color_index_len, len(ids)):
+                index.setdefault(ids[pos], pos)
+            self._annotation_color_index_len = len(ids)
+        return self._annotation_color_index
+
+    def _get_annotation_color_lookup(self):
+        """get class_id value -> hex color map over annotation_colors (last entry wins)
+
+        Like _get_annotation_color_index, only entries appended since the last call are scanned.
+        """
+        ids = self.annotation_colors.get("class_id")
+        if not isinstance(ids, list):
+            return {}
+        colors = self.annotation_colors.get("class_hex_color", [])
+        if self._annotation_color_lookup_source is not ids or self._annotation_color_lookup_len > len(ids):
+            self._annotation_color_lookup = {}
+            self._annotation_color_lookup_source = ids
+            self._annotation_color_lookup_len = 0
+        end = min(len(ids), len(colors))
+        if self._annotation_color_lookup_len < end:
+            lookup = self._annotation_color_lookup
+            for pos in range(self._annotation_color_lookup_len, end):
+                color = colors[pos]
+                if isinstance(color, bytes):
+                    color = color.decode('utf-8')
+                lookup[ids[pos]] = color
+            self._annotation_color_lookup_len = end
+        return self._annotation_color_lookup
+
     def get_annotation_color(self, index):
         """Get the color for the given index."""
         try:
-            if 0 <= index < len(self.annotation_colors["class_id"]) and index in self.annotation_colors["class_id"]:
-                idx = self.annotation_colors["class_id"].index(index)
-                if 0 <= idx < len(self.annotation_colors["class_name"]) and 0 <= idx < len(self.annotation_colors["class_hex_color"]):
+            if 0 <= index < len(self.annotation_colors["class_id"]):
+                idx = self._get_annotation_color_index().get(index)
+                if idx is not None and 0 <= idx < len(self.annotation_colors["class_name"]) and 0 <= idx < len(self.annotation_colors["class_hex_color"]):
                     return {
                         "class_name": self.annotation_colors["class_name"][idx],
                         "class_hex_color": self.annotation_colors["class_hex_color"][idx]
@@ -3545,14 +4088,14 @@ class SegmentationHandler:
             "maxY": float
         }
         """
-        if not isinstance(contour, np.ndarray):
-            contour_np = np.array(contour)
-        else:
-            contour_np = contour
+        # No copy when the caller already passes an ndarray
+        contour_np = np.asarray(contour)
 
         # Legacy check for old (2, K) format. The new format is (K, 2).
         if contour_np.ndim == 2 and contour_np.shape[0] == 2:
-            print(f"[create_annotation] WARNING: Received legacy (2, K) contour format for index {index}. Transposing. Please update the data source to provide (K, 2) format.")
+            if not SegmentationHandler._legacy_contour_warned:
+                SegmentationHandler._legacy_contour_warned = True
+                print(f"[create_annotation] WARNING: Received legacy (2, K) contour format for index {index}. Transposing. Please update the data source to provide (K, 2) format.")
             contour_np = contour_np.T
 
         # Validate if contour_np is now (K, 2) with K >= 3
@@ -3560,12 +4103,13 @@ class SegmentationHandler:
             print(f"[create_annotation] Warning: Contour for index {index} has invalid shape {contour_np.shape} after potential transpose. Expected (K, 2) with K >= 3. Skipping.")
             return None
 
-        # Convert contour to list format (original coordinates, no scaling)
+        # Convert contour to list format (original coordinates, no scaling); one C-level tolist()
+        # yields the same Python floats as per-point float() calls
         try:
-            contours_list = [
-                [float(x), float(y)]
-                for x, y in contour_np  # Iterates over rows (points) of (K,2) array
-            ]
+            contour_f64 = contour_np.astype(np.float64, copy=False)
+            contours_list = contour_f64.tolist()
+            min_x, min_y = contour_f64.min(axis=0).tolist()
+            max_x, max_y = contour_f64.max(axis=0).tolist()
         except Exception as e:
             print(f"[create_annotation] Error processing contour points for index {index}, shape {contour_np.shape}: {e}.")
             return None
@@ -3611,27 +4155,14 @@ class SegmentationHandler:
                     
                     if class_id_val is not None and 0 <= class_id_val < len(self.class_hex_color) and \
                        0 <= class_id_val < len(self.class_name):
-                        # Get color from ClassificationNode
-                        effective_color = self.class_hex_color[class_id_val]
-                        if isinstance(effective_color, bytes):
-                            effective_color = effective_color.decode('utf-8')
-                        
-                        # Get class name from ClassificationNode
-                        class_name_val = self.class_name[class_id_val]
-                        if isinstance(class_name_val, bytes):
-                            class_name_val = class_name_val.decode('utf-8')
+                        # Get color and class name from ClassificationNode (decoded once per class list)
+                        class_names, class_colors = self._get_class_tables()
+                        effective_color = class_colors[class_id_val]
+                        class_name_val = class_names[class_id_val]
             except (ValueError, IndexError, TypeError) as e:
                 print(f"[Debug] Error getting classification data for nucleus index {index}: {str(e)}")
                 # Keep color as None if classification data is not available
 
-        # Calculate bounds from contours (original coordinates, no scaling)
-        xs = [p[0] for p in contours_list]
-        ys = [p[1] for p in contours_list]
-        min_x = float(min(xs))
-        min_y = float(min(ys))
-        max_x = float(max(xs))
-        max_y = float(max(ys))
-
         # Return simplified annotation format
         annotation = {
             "id": str(index),
@@ -3658,22 +4189,14 @@ class SegmentationHandler:
             print("No tissue polygons loaded.")
             return
 
+        created = datetime.now().isoformat()
+        tissue_color = "#ffff00"
+
         for tissue in self.tissues:
             index = tissue["id"]
-            contour = tissue["points"]
-
-            points = [[float(x), float(y)] for x, y in contour]
-            xs = [p[0] for p in points]
-            ys = [p[1] for p in points]
-            bounds = {
-                "minX": min(xs),
-                "minY": min(ys),
-                "maxX": max(xs),
-                "maxY": max(ys)
-            }
+            points, bounds = polygon_points_and_bounds(tissue["points"])
 
             unique_id = str(index)
-            tissue_color = "#ffff00"
 
             style_body = {
                 "id": unique_id,
@@ -3681,7 +4204,7 @@ class SegmentationHandler:
                 "type": "TextualBody",
                 "purpose": "style",
                 "value": tissue_color,
-                "created": datetime.now().isoformat(),
+                "created": created,
                 "creator": {
                     "id": "default",
                     "type": "AI"
@@ -3706,7 +4229,7 @@ class SegmentationHandler:
                     "isGuest": True,
                     "id": "nrESYlDUe8L1qF6Ffhq4"
                 },
-                "created": datetime.now().isoformat()
+                "created": created
             }
 
             self.tissue_annotations[index] = annotation
@@ -3741,7 +4264,7 @@ class SegmentationHandler:
         center_y = (y1 + y2) / 2
         radius = max(x2 - x1, y2 - y1) / 2
         radius = radius * 1.2 # add 20% buffer
-        points_in_view = self.kd_tree.query_ball_point([center_x, center_y], r=radius) if self.kd_tree else []
+        points_in_view = self._query_viewport_indices(center_x, center_y, radius)
         sorted_points = tuple(sorted(points_in_view))
 
         # Check cache for simplified annotations
@@ -3768,15 +4291,8 @@ class SegmentationHandler:
             color_map = {}
             default_color = "#808080"
             
-            # Pre-build lookup dictionaries for O(1) access instead of O(n) .index() calls
-            annotation_color_lookup = {}
-            if isinstance(self.annotation_colors.get("class_id"), list):
-                for i, cid in enumerate(self.annotation_colors["class_id"]):
-                    if i < len(self.annotation_colors.get("class_hex_color", [])):
-                        color = self.annotation_colors["class_hex_color"][i]
-                        if isinstance(color, bytes):
-                            color = color.decode('utf-8')
-                        annotation_color_lookup[cid] = color
+            # Lookup dictionary for O(1) access, kept across requests and extended incrementally
+            annotation_color_lookup = self._get_annotation_color_lookup()
 
             if not use_classification:
                 # Non-classification mode: use stored colors
@@ -4005,26 +4521,28 @@ class SegmentationHandler:
                 return [], counts
 
             # Step 6: Stack all valid contours (viewport / level coordinates; no extra scale step)
-            stacked_contours = np.stack(valid_contours)  # Shape: (n_contours, n_points, 2)
+            # and convert the whole batch to float64 once; each annotation below takes a row view
+            stacked_contours = np.stack(valid_contours).astype(np.float64, copy=False)  # Shape: (n_contours, n_points, 2)
 
             # Step 7: Build simplified annotations
             # Keep points as numpy arrays for better performance in binary packing
+            # Get class_id for every nucleus at once (same logic as get_centroids_in_viewport)
+            effective_class_ids = np.full(len(valid_indices), -1, dtype=np.int64)  # Default to unclassified
+            if self.class_id is not None:
+                valid_ids = np.fromiter(valid_indices, dtype=np.int64, count=len(valid_indices))
+                in_bounds = (valid_ids >= 0) & (valid_ids < len(self.class_id))
+                effective_class_ids[in_bounds] = self.class_id[valid_ids[in_bounds]]
+            effective_class_ids = effective_class_ids.tolist()
+
             simplified_annotations = []
             for i, idx in enumerate(valid_indices):
-                # Get the i-th contour from the stacked array
-                stacked_contour = stacked_contours[i]
-                # Keep as numpy array instead of converting to list
-                points = stacked_contour.astype(np.float64)
-
-                # Get class_id for this nucleus (same logic as get_centroids_in_viewport)
-                effective_class_id = -1  # Default to unclassified
-                if self.class_id is not None and idx < len(self.class_id):
-                    effective_class_id = self.class_id[idx]
+                # View into the batch buffer, kept as a numpy array
+                points = stacked_contours[i]
 
                 simplified_annotation = {
                     "id": idx,  # Keep as int for binary packing
                     "points": points,  # Keep as numpy array
-                    "class_id": int(effective_class_id)  # Let frontend determine color based on class_id
+                    "class_id": effective_class_ids[i]  # Let frontend determine color based on class_id
                 }
                 simplified_annotations.append(simplified_annotation)
 
@@ -4066,17 +4584,17 @@ class SegmentationHandler:
         center_x = (x1 + x2) / 2
         center_y = (y1 + y2) / 2
         radius = max(x2 - x1, y2 - y1) / 2 + self.BUFFER
-        indices_in_view = self.kd_tree.query_ball_point([center_x, center_y], r=radius) if self.kd_tree else []
+        indices_in_view = self._query_viewport_indices(center_x, center_y, radius)
         points = self.centroids[indices_in_view].tolist()
         return points
 
     def get_centroids_in_viewport(self, x1, y1, x2, y2):
         # Check if handler needs reload due to file change
-        if hasattr(self, '_needs_reload') and self._needs_reload:
+        if self._needs_reload:
             print(f"[DEBUG] SegmentationHandler - Reloading data due to file change")
             try:
                 # Check if we need to force reload centroids (e.g., after file switch)
-                force_reload_centroids = hasattr(self, '_force_reload_centroids') and self._force_reload_centroids
+                force_reload_centroids = self._force_reload_centroids
                 
                 # If centroids/contours are already loaded and we don't need to force reload, only refresh annotations
                 if self.centroids is not None and self.contours is not None and not force_reload_centroids:
@@ -4111,17 +4629,9 @@ class SegmentationHandler:
                     # Check again after reload
                     if self.centroids is None or self.contours is None or self.kd_tree is None:
                         print(f"[ERROR] get_centroids_in_viewport => Data still missing after reload")
-                        # If we have centroids but no KD-tree, try to build it manually
-                        if self.centroids is not None and self.contours is not None and self.kd_tree is None:
-                            print(f"[Warning] get_centroids_in_viewport => Attempting to build KD-tree manually")
-                            try:
-                                self.kd_tree = KDTree(self.centroids)
-                                print(f"[Debug] get_centroids_in_viewport => Successfully built KD-tree manually")
-                            except Exception as e:
-                                print(f"[Error] get_centroids_in_viewport => Failed to build KD-tree manually: {e}")
-                                return [], {}
-                        else:
-                            return [], {}
+                        # The KD-tree is built lazily from the centroids, so a missing tree here means
+                        # the centroids themselves are unusable; retrying the build would not help
+                        return [], {}
                 except Exception as e:
                     print(f"[ERROR] get_centroids_in_viewport => Failed to reload data: {e}")
                     return [], {}
@@ -4129,23 +4639,16 @@ class SegmentationHandler:
                 print(f"[Warning] get_centroids_in_viewport => No valid zarr_file to reload from")
                 return [], {}
         
-        center_x = (x1 + x2) / 2
-        center_y = (y1 + y2) / 2
-        width = x2 - x1
-        height = y2 - y1
-        diagonal = math.sqrt(width ** 2 + height ** 2)
-        radius = diagonal / 2 + self.BUFFER
-        
         # Use KD-tree if available, otherwise fall back to bounding box filtering
         if self.kd_tree is not None:
-            indices_in_view = self.kd_tree.query_ball_point([center_x, center_y], r=radius)
+            indices_in_view = self._query_viewport_box(x1, y1, x2, y2)
         else:
             # Fallback: use bounding box filtering
             in_bbox_mask = (
                 (x1 <= self.centroids[:, 0]) & (self.centroids[:, 0] <= x2) &
                 (y1 <= self.centroids[:, 1]) & (self.centroids[:, 1] <= y2)
             )
-            indices_in_view = np.where(in_bbox_mask)[0]
+            indices_in_view = np.flatnonzero(in_bbox_mask)
         
         # Vectorized processing for better performance
         if len(indices_in_view) == 0:
@@ -4153,32 +4656,19 @@ class SegmentationHandler:
             points = np.empty((0, 4), dtype=np.float64)
         else:
             # Convert indices_in_view to numpy array for vectorized indexing
-            indices_array = np.asarray(indices_in_view)
+            indices_array = np.asarray(indices_in_view, dtype=np.int64)
             
-            # Vectorized coordinate extraction
-            centroids_in_view = self.centroids[indices_array]
-            scaled_coords = centroids_in_view
+            # Build points array in place: [indices, x_coords, y_coords, class_ids]
+            # Keep as numpy array for better performance in binary packing
+            points = np.empty((len(indices_array), 4), dtype=np.float64)
+            points[:, 0] = indices_array
+            points[:, 1:3] = self.centroids[indices_array]
             
-            # Vectorized class_id extraction
+            # Vectorized class_id extraction, -1 (unclassified) where there is none
+            points[:, 3] = -1
             if self.class_id is not None:
-                # Create a mask for valid indices
                 valid_mask = indices_array < len(self.class_id)
-                # Initialize with -1 (unclassified)
-                effective_class_ids = np.full(len(indices_array), -1, dtype=np.int32)
-                # Fill valid indices with actual class_id values
-                effective_class_ids[valid_mask] = self.class_id[indices_array[valid_mask]].astype(np.int32)
-            else:
-                effective_class_ids = np.full(len(indices_array), -1, dtype=np.int32)
-            
-            # Build points array using vectorized operations
-            # Stack: [indices, x_coords, y_coords, class_ids]
-            # Keep as numpy array for better performance in binary packing
-            points = np.column_stack([
-                indices_array,
-                scaled_coords[:, 0].astype(np.float64),
-                scaled_coords[:, 1].astype(np.float64),
-                effective_class_ids
-            ])
+                points[valid_mask, 3] = self.class_id[indices_array[valid_mask]]
                 
         counts = self.get_all_nuclei_counts()
 
@@ -4248,7 +4738,7 @@ class SegmentationHandler:
             (x1 <= centroids_x) & (centroids_x <= x2) &
             (y1 <= centroids_y) & (centroids_y <= y2)
         )
-        indices_in_region = np.where(in_bbox_mask)[0]
+        indices_in_region = np.flatnonzero(in_bbox_mask)
         if len(indices_in_region) == 0:
             logger.debug("[get_region_probability_histogram] No cells in bbox (x1=%s y1=%s x2=%s y2=%s)", x1, y1, x2, y2)
             return {"probs": [], "indices": []}
@@ -4324,19 +4814,13 @@ class SegmentationHandler:
             return {"probs": [], "indices": []}
 
     def get_centroids_in_viewport_matrix(self, x1, y1, x2, y2, params):
-        center_x = (x1 + x2) / 2
-        center_y = (y1 + y2) / 2
-        width = x2 - x1
-        height = y2 - y1
-        diagonal = math.sqrt(width ** 2 + height ** 2)
-        radius = diagonal / 2 + self.BUFFER
-
-        indices_in_view = self.kd_tree.query_ball_point([center_x, center_y], r=radius) if self.kd_tree else []
+        indices_in_view = self._query_viewport_box(x1, y1, x2, y2)
         if len(indices_in_view) == 0:
             return []
 
-        # Obtain points to be transformed (in image coordinates)
-        points = self.centroids[indices_in_view].astype(float)
+        # Obtain points to be transformed (in image coordinates); the gather already makes a fresh
+        # array, so only convert when the centroids are not float64
+        points = np.asarray(self.centroids[indices_in_view], dtype=np.float64)
 
         zoom = params.get("zoom")
         contentBounds = params.get("contentBounds")
@@ -4345,34 +4829,26 @@ class SegmentationHandler:
         bounds = params["bounds"]
         margins = params["margins"]
 
-        # Construct the affine transformation matrix (image -> viewport -> viewer)
+        # Compose the affine transform (image -> viewport -> viewer) as scalar coefficients
         # image -> viewport
         # viewport_x = (image_x / contentSize['x']) * contentBounds['width'] + contentBounds['x']
         # viewport_y = (image_y / contentSize['x']) * contentBounds['width'] + contentBounds['y']
         s = contentBounds['width'] / contentSize['x']
-        M_image_to_viewport = np.array([
-            [s,   0, contentBounds['x']],
-            [0,   s, contentBounds['y']],
-            [0,   0, 1]
-        ], dtype=np.float64)
-
         # viewport -> viewer
-        # scale = container_size["width"] / bounds["width"]
-        scale = container_size["width"] / bounds["width"]
         # viewer_x = (viewport_x - bounds['x']) * scale + margins['left']
         # viewer_y = (viewport_y - bounds['y']) * scale + margins['top']
-        M_viewport_to_viewer = np.array([
-            [scale,     0, (-bounds['x'])*scale + margins['left']],
-            [0,     scale, (-bounds['y'])*scale + margins['top']],
-            [0,         0, 1]
-        ], dtype=np.float64)
-
-        # Merge matrices
-        M = M_viewport_to_viewer @ M_image_to_viewport
-
-        # Transform points using NumPy matrix operations
-        pixel_points = transform_points_numpy(points, M)
-        return pixel_points.tolist()
+        scale = container_size["width"] / bounds["width"]
+        # Both steps are a uniform scale plus translation, so the product is too:
+        # viewer = image * (scale * s) + (scale * (contentBounds - bounds) + margins)
+        a = scale * s
+        tx = scale * (contentBounds['x'] - bounds['x']) + margins['left']
+        ty = scale * (contentBounds['y'] - bounds['y']) + margins['top']
+
+        # Transform the gathered (fresh) points in place
+        points *= a
+        points[:, 0] += tx
+        points[:, 1] += ty
+        return points.tolist()
 
     def imageToViewportCoordinates(self, image_x, image_y, zoom, contentBounds, contentSize):
         """
@@ -4488,21 +4964,22 @@ class SegmentationHandler:
             
             print(f"[Debug] end_idx={end_idx}")
             print(f"[Debug] get_annotations => offset={offset}, limit={limit}, end_idx={end_idx}")
-            
-            # iterate over the specified range of indices
-            for idx in range(offset, end_idx):
-                if idx >= len(self.centroids):
-                    break
-                
-                # Get contour for this cell
-                contour = self.contours[idx]
-                
-                # Create simplified annotation (no zoom scale, direct from zarr data)
-                # Color will be retrieved from ClassificationNode in create_annotation, no default value
-                annotation = self.create_annotation(idx, contour)
-                if annotation is not None:
-                    annotations.append(annotation)
-                    print(f"[Debug] Created annotation for idx={idx}")
+
+            # Clamp the range once and read its contours in one slice (a single read on lazy Zarr arrays)
+            start_idx = max(offset, 0)
+            end_idx = min(end_idx, total_count)
+            if start_idx < end_idx:
+                contours_slice = self.contours[start_idx:end_idx]
+
+                # iterate over the specified range of indices
+                for idx, contour in zip(range(start_idx, end_idx), contours_slice):
+                    # Create simplified annotation (no zoom scale, direct from zarr data)
+                    # Color will be retrieved from ClassificationNode in create_annotation, no default value
+                    annotation = self.create_annotation(idx, contour)
+                    if annotation is not None:
+                        annotations.append(annotation)
+
+            logger.debug("get_annotations => created %d annotations for range [%d, %d)", len(annotations), start_idx, end_idx)
 
 
         return annotations, total_count
@@ -4593,15 +5070,12 @@ class SegmentationHandler:
 
                     # Calculate bounds and format contours
                     if contour.ndim == 2 and contour.shape[1] == 2 and contour.shape[0] >= 3:
-                        # Vectorized bounds calculation (faster)
-                        min_x = float(contour[:, 0].min())
-                        min_y = float(contour[:, 1].min())
-                        max_x = float(contour[:, 0].max())
-                        max_y = float(contour[:, 1].max())
+                        # Vectorized bounds calculation: one reduction per direction over both axes
+                        min_x, min_y = contour.min(axis=0).tolist()
+                        max_x, max_y = contour.max(axis=0).tolist()
 
                         # Simplified contours format - faster string building
-                        # Use numpy array operations where possible
-                        contours_str = ";".join(f"{x:.1f},{y:.1f}" for x, y in contour)
+                        contours_str = ";".join(f"{x:.1f},{y:.1f}" for x, y in contour.tolist())
                     else:
                         min_x = min_y = max_x = max_y = ""
                         contours_str = ""
@@ -4949,34 +5423,31 @@ class SegmentationHandler:
         """
         try:
             # ensure we have data to save
-            if not hasattr(self, 'patch_coordinates') or self.patch_coordinates is None:
+            if self.patch_coordinates is None:
                 print("no patch data to export")
                 return False
 
-            def decode_if_bytes(data):
-                """decode bytes type data to string"""
-                if isinstance(data, bytes):
-                    return data.decode('utf-8')
-                elif isinstance(data, np.ndarray):
-                    return [decode_if_bytes(item) for item in data]
-                elif isinstance(data, list):
-                    return [decode_if_bytes(item) for item in data]
-                return data
-
-            patch_data = []
-            for i in range(len(self.patch_coordinates)):
-                patch = {
-                    "id": i,
-                    "coordinates": self.patch_coordinates[i].tolist() if self.patch_coordinates is not None else [],
-                    "class_id": int(self.patch_class_id[i]) if self.patch_class_id is not None and i < len(self.patch_class_id) else -1,
-                    "class_name": decode_if_bytes(self.patch_class_name[self.patch_class_id[i]]) if self.patch_class_name is not None and self.patch_class_id is not None and i < len(self.patch_class_id) else "",
-                    "class_hex_color": decode_if_bytes(self.patch_class_hex_color[self.patch_class_id[i]]) if self.patch_class_hex_color is not None and self.patch_class_id is not None and i < len(self.patch_class_id) else "#ff0000"
-                }
-                patch_data.append(patch)
+            # decode the class tables once (bytes -> str in a single pass)
+            class_names = decode_str_array(self.patch_class_name).tolist() if self.patch_class_name is not None else None
+            class_colors = decode_str_array(self.patch_class_hex_color).tolist() if self.patch_class_hex_color is not None else None
+            class_ids = self.patch_class_id.tolist() if self.patch_class_id is not None else []
+            num_ids = len(class_ids)
 
             if format_type.lower() == "json":
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(patch_data, f, ensure_ascii=False, indent=4)
+                patch_data = []
+                for i, coords in enumerate(self.patch_coordinates.tolist()):
+                    class_id = class_ids[i] if i < num_ids else None
+                    patch = {
+                        "id": i,
+                        "coordinates": coords,
+                        "class_id": class_id if class_id is not None else -1,
+                        "class_name": class_names[class_id] if class_names is not None and class_id is not None else "",
+                        "class_hex_color": class_colors[class_id] if class_colors is not None and class_id is not None else "#ff0000"
+                    }
+                    patch_data.append(patch)
+
+                with open(file_path, 'wb') as f:
+                    f.write(orjson.dumps(patch_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
             elif format_type.lower() == "csv":
                 with open(file_path, 'w', newline='', encoding='utf-8') as f:
                     writer = csv.writer(f)
@@ -4986,9 +5457,9 @@ class SegmentationHandler:
                     # write data rows
                     for i in range(len(self.patch_coordinates)):
                         coords = self.patch_coordinates[i]
-                        class_id = self.patch_class_id[i] if self.patch_class_id is not None and i < len(self.patch_class_id) else -1
-                        class_name = decode_if_bytes(self.patch_class_name[i]) if self.patch_class_name is not None and i < len(self.patch_class_name) else ""
-                        class_color = decode_if_bytes(self.patch_class_hex_color[i]) if self.patch_class_hex_color is not None and i < len(self.patch_class_hex_color) else "#ff0000"
+                        class_id = class_ids[i] if i < num_ids else -1
+                        class_name = class_names[i] if class_names is not None and i < len(class_names) else ""
+                        class_color = class_colors[i] if class_colors is not None and i < len(class_colors) else "#ff0000"
                         
                         writer.writerow([
                             i,              # patch id
@@ -5026,8 +5497,8 @@ class SegmentationHandler:
                 return False
 
             if format_type.lower() == "json":
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(self.annotation_colors, f, ensure_ascii=False, indent=4)
+                with open(file_path, 'wb') as f:
+                    f.write(orjson.dumps(self.annotation_colors, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
             elif format_type.lower() == "csv":
                 # Get the arrays
                 class_ids = self.annotation_colors.get("class_id", [])
@@ -5089,93 +5560,150 @@ class SegmentationHandler:
                     contours_data = self.contours.tolist()
                 # For large zarr arrays, we'll load per-cell below
             
-            segmentation_data = []
-            for i in range(len(centroids_data)):
-                # Get contour - handle both preloaded list and lazy zarr array
-                if i < len(contours_data):
-                    cell_contour = contours_data[i]
-                elif self.contours is not None and i < len(self.contours):
-                    # Lazy load from zarr
-                    cell_contour = self.contours[i].tolist() if hasattr(self.contours[i], 'tolist') else list(self.contours[i])
-                else:
-                    cell_contour = []
-                
-                nucleus = {
-                    "id": i,
-                    "centroid": centroids_data[i],
-                    "contour": cell_contour,
-                    "class_id": self.annotation_colors["class_id"][i] if i < len(self.annotation_colors.get("class_id", [])) else -1,
-                    "class_name": self.annotation_colors["class_name"][self.annotation_colors["class_id"][i]] if i < len(self.annotation_colors.get("class_id", [])) and self.annotation_colors["class_id"][i] < len(self.annotation_colors.get("class_name", [])) else "",
-                    "class_hex_color": self.annotation_colors["class_hex_color"][self.annotation_colors["class_id"][i]] if i < len(self.annotation_colors.get("class_id", [])) and self.annotation_colors["class_id"][i] < len(self.annotation_colors.get("class_hex_color", [])) else "#ff0000"
-                }
-                segmentation_data.append(nucleus)
-            
+            num_nuclei = len(centroids_data)
+
+            # Resolve class id/name/color for every nucleus at once: ids beyond annotation_colors
+            # default to -1, and ids outside the name/color tables map to a trailing default entry
+            annotation_class_ids = self.annotation_colors.get("class_id", [])
+            annotation_class_names = list(self.annotation_colors.get("class_name", []))
+            annotation_class_colors = list(self.annotation_colors.get("class_hex_color", []))
+            class_ids = np.full(num_nuclei, -1, dtype=np.int64)
+            num_with_class = min(num_nuclei, len(annotation_class_ids))
+            class_ids[:num_with_class] = np.asarray(annotation_class_ids[:num_with_class], dtype=np.int64)
+            name_table = np.array(annotation_class_names + [""], dtype=object)
+            color_table = np.array(annotation_class_colors + ["#ff0000"], dtype=object)  # Default red color
+            name_idx = np.where((class_ids >= 0) & (class_ids < len(annotation_class_names)), class_ids, len(annotation_class_names))
+            color_idx = np.where((class_ids >= 0) & (class_ids < len(annotation_class_colors)), class_ids, len(annotation_class_colors))
+            class_names = name_table[name_idx].tolist()
+            class_colors = color_table[color_idx].tolist()
+            class_ids = class_ids.tolist()
+
+            def iter_contours():
+                for i in range(num_nuclei):
+                    # Get contour - handle both preloaded list and lazy zarr array
+                    if i < len(contours_data):
+                        yield contours_data[i]
+                    elif self.contours is not None and i < len(self.contours):
+                        # Lazy load from zarr
+                        cell_contour = self.contours[i]
+                        yield cell_contour.tolist() if hasattr(cell_contour, 'tolist') else list(cell_contour)
+                    else:
+                        yield []
+
             if format_type.lower() == "json":
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(segmentation_data, f, ensure_ascii=False, indent=4)
+                segmentation_data = [
+                    {
+                        "id": i,
+                        "centroid": centroid,
+                        "contour": cell_contour,
+                        "class_id": class_id,
+                        "class_name": class_name,
+                        "class_hex_color": class_color
+                    }
+                    for i, centroid, cell_contour, class_id, class_name, class_color
+                    in zip(range(num_nuclei), centroids_data, iter_contours(), class_ids, class_names, class_colors)
+                ]
+                with open(file_path, 'wb') as f:
+                    f.write(orjson.dumps(segmentation_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
             elif format_type.lower() == "csv":
                 with open(file_path, 'w', newline='', encoding='utf-8') as f:
                     writer = csv.writer(f)
                     # Write header row
                     writer.writerow(["id", "centroid_x", "centroid_y", "contour", "class_id", "class_name", "class_hex_color"])
                     
-                    # Write data rows
-                    for i in range(len(centroids_data)):
-                        class_id = -1
-                        class_name = ""
-                        class_color = "#ff0000"  # Default red color
-                        
-                        # If classification data is available, get the corresponding information
-                        if i < len(self.annotation_colors.get("class_id", [])):
-                            class_id = self.annotation_colors["class_id"][i]
-                            if 0 <= class_id < len(self.annotation_colors.get("class_name", [])):
-                                class_name = self.annotation_colors["class_name"][class_id]
-                            if 0 <= class_id < len(self.annotation_colors.get("class_hex_color", [])):
-                                class_color = self.annotation_colors["class_hex_color"][class_id]
-                        
-                        # Get contour - handle both preloaded list and lazy zarr array
-                        if i < len(contours_data):
-                            contour_str = str(contours_data[i])
-                        elif self.contours is not None and i < len(self.contours):
-                            contour_str = str(self.contours[i].tolist() if hasattr(self.contours[i], 'tolist') else list(self.contours[i]))
-                        else:
-                            contour_str = "[]"
-                        
-                        centroid_x = centroids_data[i][0] if i < len(centroids_data) else 0
-                        centroid_y = centroids_data[i][1] if i < len(centroids_data) else 0
-                        
-                        writer.writerow([
-                            i,             # id (index)
-                            centroid_x,    # centroid x coordinate
-                            centroid_y,    # centroid y coordinate
-                            contour_str,   # contour points
-                            class_id,      # class ID
-                            class_name,    # class name
-                            class_color    # class color
-                        ])
+                    # Write data rows straight from the resolved columns (no per-row dict)
+                    writer.writerows(zip(
+                        range(num_nuclei),                          # id (index)
+                        (centroid[0] for centroid in centroids_data),  # centroid x coordinate
+                        (centroid[1] for centroid in centroids_data),  # centroid y coordinate
+                        map(str, iter_contours()),                  # contour points
+                        class_ids,                                  # class ID
+                        class_names,                                # class name
+                        class_colors                                # class color
+                    ))
             else:
                 print(f"Unsupported file format: {format_type}, supported formats are csv or json")
                 return False
-                
             return True
         except Exception as e:
             print(f"Error saving segmentation results to file: {str(e)}")
             return False
 
     def get_patch_centroids(self):
-        """get all patch centroids"""
-        if not hasattr(self, 'patch_coordinates') or self.patch_coordinates is None:
+        """get all patch centroids (computed once per patch_coordinates array and cached in self.patch_centroids)"""
+        if self.patch_coordinates is None:
             return []
 
+        if self.patch_centroids is not None and self._patch_centroids_source is self.patch_coordinates:
+            return self.patch_centroids
+
         # Validate patch coordinates shape before accessing columns
         if len(self.patch_coordinates.shape) < 2 or self.patch_coordinates.shape[1] < 4:
             raise ValueError(f"Expected patch coordinates to have at least 4 columns (Nx4), but got shape {self.patch_coordinates.shape}")
 
-        centroids_x = np.mean(self.patch_coordinates[:, [0, 2]], axis=1)
-        centroids_y = np.mean(self.patch_coordinates[:, [1, 3]], axis=1)
-        
-        result = np.column_stack((centroids_x, centroids_y))
-        return result.astype(float)
+        # Midpoints written straight into one float64 (N, 2) buffer: no fancy-index copies of the
+        # column pairs, no separate column_stack/astype passes
+        coords = self.patch_coordinates
+        result = np.empty((len(coords), 2), dtype=np.float64)
+        np.add(coords[:, 0], coords[:, 2], out=result[:, 0], dtype=np.float64)
+        np.add(coords[:, 1], coords[:, 3], out=result[:, 1], dtype=np.float64)
+        result *= 0.5
+        self.patch_centroids = result
+        self._patch_centroids_source = coords
+        return self.patch_centroids
+
+    def _get_patch_dimensions(self):
+        """get (width, height) of every patch, computed once per patch_coordinates array"""
+        coords = self.patch_coordinates
+        if self._patch_dimensions is None or self._patch_dimensions_source is not coords:
+            self._patch_dimensions = np.column_stack([
+                coords[:, 2] - coords[:, 0],
+                coords[:, 3] - coords[:, 1]
+            ])
+            self._patch_dimensions_source = coords
+        return self._patch_dimensions
+
+    def _get_patch_x1_index(self):
+        """get (order, sorted_x1, max_width) over patch_coordinates, computed once per array
+
+        Patches sorted by left edge let a viewport query binary-search the [x1 - max_width, x2] band;
+        None when a non-finite width would make the band unsafe.
+        """
+        coords = self.patch_coordinates
+        if self._patch_x1_index_source is not coords:
+            index = None
+            if len(coords) > 0:
+                max_width = float(self._get_patch_dimensions()[:, 0].max())
+                if math.isfinite(max_width):
+                    order = np.argsort(coords[:, 0], kind='stable')
+                    index = (order, coords[order, 0], max_width)
+            self._patch_x1_index = index
+            self._patch_x1_index_source = coords
+        return self._patch_x1_index
+
+    def _patch_indices_in_box(self, x1, y1, x2, y2):
+        """Ascending indices of the patches that have any part inside [x1, x2] x [y1, y2]
+
+        Only patches whose left edge lies in [x1 - max_width, x2] can overlap the box, so that band of
+        the x1-sorted index is binary-searched and only its patches have the remaining edges tested.
+        """
+        x1_index = self._get_patch_x1_index()
+        if x1_index is not None:
+            order, sorted_x1, max_width = x1_index
+            # one pixel of slack keeps float rounding of the band edge on the safe side
+            lo = np.searchsorted(sorted_x1, x1 - max_width - 1, side='left')
+            hi = np.searchsorted(sorted_x1, x2, side='right')
+            candidates = np.sort(order[lo:hi])
+            band = self.patch_coordinates[candidates]
+            mask = (band[:, 2] >= x1) & (band[:, 0] <= x2) & (band[:, 3] >= y1) & (band[:, 1] <= y2)
+            return candidates[mask]
+
+        patch_x1 = self.patch_coordinates[:, 0]
+        patch_y1 = self.patch_coordinates[:, 1]
+        patch_x2 = self.patch_coordinates[:, 2]
+        patch_y2 = self.patch_coordinates[:, 3]
+        mask = (patch_x2 >= x1) & (patch_x1 <= x2) & (patch_y2 >= y1) & (patch_y1 <= y2)
+        return np.flatnonzero(mask)
     
     def get_patch_centroids_in_viewport(self, x1, y1, x2, y2):
         """
@@ -5183,13 +5711,13 @@ class SegmentationHandler:
         Now includes patch dimensions for dynamic rendering
         """
         # Check if handler needs reload due to file change
-        if hasattr(self, '_needs_reload') and self._needs_reload:
+        if self._needs_reload:
             print(f"[DEBUG] SegmentationHandler - Reloading data due to file change")
             self.load_file(self.zarr_file)
             # Reset the reload flag after successful reload
             self._needs_reload = False
         
-        if not hasattr(self, 'patch_coordinates') or self.patch_coordinates is None:
+        if self.patch_coordinates is None:
             if self.zarr_file and os.path.exists(self.zarr_file):
                 try:
                     # Patch overlays only need patch metadata; avoid forcing full nuclei reload here.
@@ -5198,37 +5726,32 @@ class SegmentationHandler:
                     print(f"[ERROR] get_patch_centroids_in_viewport => Failed to load patch data: {e}")
                     return [], {}
 
-        if not hasattr(self, 'patch_coordinates') or self.patch_coordinates is None:
+        if self.patch_coordinates is None:
             return [], {}
         
         # Validate patch coordinates shape before accessing columns
         if len(self.patch_coordinates.shape) < 2 or self.patch_coordinates.shape[1] < 4:
             raise ValueError(f"Expected patch coordinates to have at least 4 columns (Nx4), but got shape {self.patch_coordinates.shape}")
         
-        # calculate all centroids
-        centroids_x = np.mean(self.patch_coordinates[:, [0, 2]], axis=1)
-        centroids_y = np.mean(self.patch_coordinates[:, [1, 3]], axis=1)
-        
-        # calculate patch dimensions (width and height) in Level 0 coordinates
-        patch_widths = self.patch_coordinates[:, 2] - self.patch_coordinates[:, 0]
-        patch_heights = self.patch_coordinates[:, 3] - self.patch_coordinates[:, 1]
-        
-        # create mask for patches that have any part in viewport
-        patch_x1 = self.patch_coordinates[:, 0]
-        patch_y1 = self.patch_coordinates[:, 1]
-        patch_x2 = self.patch_coordinates[:, 2]
-        patch_y2 = self.patch_coordinates[:, 3]
-        
-        mask = (patch_x2 >= x1) & (patch_x1 <= x2) & (patch_y2 >= y1) & (patch_y1 <= y2)
-        
-        indices = np.where(mask)[0]
+        # find patches that have any part in viewport
+        indices = self._patch_indices_in_box(x1, y1, x2, y2)
 
         if len(indices) == 0:
             return [], {}
 
+        # Centroids and patch dimensions (width and height) in Level 0 coordinates, computed for the
+        # patches in view only (same float64 midpoints as get_patch_centroids)
+        coords_in_view = self.patch_coordinates[indices]
+        centroids_in_view = np.empty((len(indices), 2), dtype=np.float64)
+        np.add(coords_in_view[:, 0], coords_in_view[:, 2], out=centroids_in_view[:, 0], dtype=np.float64)
+        np.add(coords_in_view[:, 1], coords_in_view[:, 3], out=centroids_in_view[:, 1], dtype=np.float64)
+        centroids_in_view *= 0.5
+        patch_widths = coords_in_view[:, 2] - coords_in_view[:, 0]
+        patch_heights = coords_in_view[:, 3] - coords_in_view[:, 1]
+
         # Get class IDs for patches in view
         patch_class_ids_in_view = []
-        if hasattr(self, 'patch_class_id') and self.patch_class_id is not None:
+        if self.patch_class_id is not None:
             patch_class_ids_in_view = self.patch_class_id[indices]
 
         # Calculate counts
@@ -5239,19 +5762,24 @@ class SegmentationHandler:
 
         # Prepare manual annotations for color overrides
         manual_annots = {}
-        if getattr(self, 'tissue_annotations', None):
+        if self.tissue_annotations:
             manual_annots = self.tissue_annotations
         else:
-            # Direct loading from Zarr file (no cache)
+            # Read through the handler's shared read-only group
             try:
                 if self.zarr_file and os.path.exists(self.zarr_file):
-                    with zarr.open(self.zarr_file, 'r') as zarr_file:
-                        if 'tissue_annotations' in zarr_file:
-                            raw = zarr_file['tissue_annotations'][()]
-                            if isinstance(raw, (bytes, bytearray)):
-                                manual_annots = json.loads(raw.decode('utf-8'))
-                            else:
-                                manual_annots = json.loads(raw)
+                    zarr_file = self._get_read_zarr_group()
+                    if 'tissue_annotations' in zarr_file:
+                        # Parse only when the stored array changed since the last viewport request
+                        annotations_array = zarr_file['tissue_annotations']
+                        cache_key = zarr_array_stamp(annotations_array)
+                        if cache_key is not None and cache_key == self._tissue_overrides_cache_key:
+                            manual_annots = self._tissue_overrides_parsed
+                        else:
+                            manual_annots = load_json_scalar(annotations_array[()])
+                            self._tissue_overrides_cache_key = cache_key
+                            self._tissue_overrides_parsed = manual_annots
+                            self._tissue_overrides_by_index = None
             except Exception as e:
                 print(f"[PATCHES] Failed to read manual tissue_annotations for override: {e}")
 
@@ -5261,12 +5789,11 @@ class SegmentationHandler:
         # Priority: self.patch_class_hex_color (from zarr patch group, contains all classes from model)
         # Similar to get_cell_classification_data which uses self.class_name and self.class_hex_color
         user_tissue_colormap = None
-        if hasattr(self, 'patch_class_name') and self.patch_class_name is not None and \
-           hasattr(self, 'patch_class_hex_color') and self.patch_class_hex_color is not None:
+        if self.patch_class_name is not None and self.patch_class_hex_color is not None:
             try:
                 # Get class names and colors from handler (loaded from zarr patch group)
                 names_list = list(self.patch_class_name) if self.patch_class_name is not None else []
-                decoded_colors = [c.decode('utf-8') if isinstance(c, bytes) else str(c) for c in self.patch_class_hex_color]
+                decoded_colors = self._get_patch_color_table().tolist()  # decoded once per color list
                 
                 if len(names_list) == len(decoded_colors) and len(names_list) > 0:
                     user_tissue_colormap = {
@@ -5281,105 +5808,118 @@ class SegmentationHandler:
         if user_tissue_colormap is not None:
             try:
                 if self.zarr_file and os.path.exists(self.zarr_file):
-                    with zarr.open(self.zarr_file, 'r') as zarr_file:
-                        if 'user_annotation' in zarr_file:
-                            user_anno_group = zarr_file['user_annotation']
-                            if 'tissue_class_colors' in user_anno_group.attrs and 'tissue_class_names' in user_anno_group.attrs:
-                                user_tissue_class_names = list(user_anno_group.attrs.get('tissue_class_names', []))
-                                user_tissue_colors_raw = user_anno_group.attrs.get('tissue_class_colors', [])
-                                
-                                # Update colors for classes that exist in base colormap
-                                for name, color in zip(user_tissue_class_names, user_tissue_colors_raw):
-                                    decoded_color = color.decode('utf-8') if isinstance(color, bytes) else str(color)
-                                    if name in user_tissue_colormap:
-                                        user_tissue_colormap[name] = decoded_color
-                                        print(f"[PATCHES] Updated color for '{name}' from user_annotation: {decoded_color}")
+                    zarr_file = self._get_read_zarr_group()
+                    if 'user_annotation' in zarr_file:
+                        user_anno_group = zarr_file['user_annotation']
+                        if 'tissue_class_colors' in user_anno_group.attrs and 'tissue_class_names' in user_anno_group.attrs:
+                            user_tissue_class_names = list(user_anno_group.attrs.get('tissue_class_names', []))
+                            user_tissue_colors_raw = user_anno_group.attrs.get('tissue_class_colors', [])
+                            
+                            # Update colors for classes that exist in base colormap
+                            for name, color in zip(user_tissue_class_names, user_tissue_colors_raw):
+                                decoded_color = color.decode('utf-8') if isinstance(color, bytes) else str(color)
+                                if name in user_tissue_colormap:
+                                    user_tissue_colormap[name] = decoded_color
+                                    print(f"[PATCHES] Updated color for '{name}' from user_annotation: {decoded_color}")
             except Exception as e:
                 print(f"[PATCHES] Failed to merge user_annotation colors: {e}")
         
-        # Get colors for each patch
-        for idx_in_view, class_id in zip(indices, patch_class_ids_in_view):
-            # Check if this patch has a manual annotation override
-            manual_class_name = None
-            manual_negative = None  # negative selection: tissue_class is None, exclude_classes present
-            if isinstance(manual_annots, dict):
-                key_str = str(int(idx_in_view))
-                manual = manual_annots.get(key_str)
-                if manual is None:
-                    manual = manual_annots.get(int(idx_in_view))
-                if manual and isinstance(manual, dict):
-                    manual_class_name = manual.get('tissue_class')
-                    if not manual_class_name and manual.get('exclude_classes'):
-                        manual_negative = manual
-            
-            # Determine which class name to use: positive manual override > prediction (class_id)
-            class_name_to_use = None
-            if manual_class_name:
-                class_name_to_use = manual_class_name
-            elif class_id >= 0 and self.patch_class_name is not None and class_id < len(self.patch_class_name):
+        # Get colors for each patch: predicted colors come from one per-class table gathered over the
+        # class ids in view, then the (sparse) manual annotations override their own patches
+        num_in_view = len(indices)
+        if self.patch_class_id is None:
+            # No predictions: light gray when there is no colormap at all, nothing to color otherwise
+            colors = [] if user_tissue_colormap else ["#cccccc"] * num_in_view
+        else:
+            class_ids = np.asarray(patch_class_ids_in_view).astype(np.int64, copy=False)
+            num_classes = len(self.patch_class_name) if self.patch_class_name is not None else 0
+
+            # Colormap color of each predicted class (None when its name is not in the colormap)
+            pred_colors = []
+            for c in range(num_classes):
                 try:
-                    class_name_to_use = str(self.patch_class_name[class_id])
+                    pred_name = str(self.patch_class_name[c])
                 except (IndexError, TypeError):
-                    pass
-            
-            # Get color: for negative selection prefer prediction color when available, else gray
-            if manual_negative:
-                # Negative selection (exclude_classes): show prediction color if we have one, else gray
-                pred_class_name = None
-                if class_id >= 0 and self.patch_class_name is not None and class_id < len(self.patch_class_name):
-                    try:
-                        pred_class_name = str(self.patch_class_name[class_id])
-                    except (IndexError, TypeError):
-                        pass
-                if pred_class_name and user_tissue_colormap and pred_class_name in user_tissue_colormap:
-                    color_to_use = user_tissue_colormap[pred_class_name]
-                    colors.append(color_to_use)
-                    if len(colors) <= 3:
-                        excl = manual_negative.get('exclude_classes', [])
-                        print(f"[PATCHES] Patch {idx_in_view} negative (not {excl}), showing prediction '{pred_class_name}' color '{color_to_use}'")
+                    pred_name = None
+                if pred_name and user_tissue_colormap and pred_name in user_tissue_colormap:
+                    pred_colors.append(user_tissue_colormap[pred_name])
                 else:
-                    color_to_use = manual_negative.get('tissue_color') or '#aaaaaa'
-                    colors.append(color_to_use)
-                    if len(colors) <= 3:
-                        excl = manual_negative.get('exclude_classes', [])
-                        print(f"[PATCHES] Patch {idx_in_view} negative (not {excl}), no prediction, color '{color_to_use}'")
-            elif class_name_to_use and user_tissue_colormap and class_name_to_use in user_tissue_colormap:
-                color_to_use = user_tissue_colormap[class_name_to_use]
-                colors.append(color_to_use)
-                if len(colors) <= 3:
-                    print(f"[PATCHES] Assigning color for patch {idx_in_view} (class='{class_name_to_use}'): '{color_to_use}' from colormap")
-            elif class_id == -1:
-                colors.append("#cccccc")  # Light gray for unclassified
-            else:
-                colors.append("#808080")  # Default dark gray for unknown/error
-                if len(colors) <= 3:
-                    print(f"[PATCHES] Warning: No color found for class '{class_name_to_use}' (class_id={class_id}), using default gray")
-        
-        # If no color map exists at all, default everything to light gray
-        if not user_tissue_colormap:
-            for idx_in_view in indices:
-                colors.append("#cccccc")
+                    pred_colors.append(None)
+
+            # Palette of the class colors followed by two sentinels, light gray for unclassified (-1) and
+            # dark gray for unknown/error ids, so every patch resolves with a single gather
+            palette = np.empty(num_classes + 2, dtype=object)
+            palette[:] = [color if color is not None else "#808080" for color in pred_colors] + ["#cccccc", "#808080"]
+            known = (class_ids >= 0) & (class_ids < num_classes)
+            palette_ids = np.where(known, class_ids, np.where(class_ids == -1, num_classes, num_classes + 1))
+            colors_arr = np.take(palette, palette_ids)
+
+            # Manual annotation overrides, keyed by patch index. The stored annotations parsed above are
+            # indexed once per parse; the live in-memory dict can change in place, so it is indexed per
+            # request when smaller than the view and looked up per patch otherwise
+            if isinstance(manual_annots, dict) and manual_annots:
+                if manual_annots is self._tissue_overrides_parsed:
+                    if self._tissue_overrides_by_index is None:
+                        self._tissue_overrides_by_index = index_manual_annotations(manual_annots)
+                    overrides = self._tissue_overrides_by_index
+                elif len(manual_annots) <= num_in_view:
+                    overrides = index_manual_annotations(manual_annots)
+                else:
+                    overrides = None
+
+                if overrides is None:
+                    def lookup_override(patch_idx):
+                        manual = manual_annots.get(str(patch_idx))
+                        return manual if manual is not None else manual_annots.get(patch_idx)
+                    override_items = ((pos, lookup_override(patch_idx)) for pos, patch_idx in enumerate(indices.tolist()))
+                elif len(overrides) <= num_in_view:
+                    override_idx = np.fromiter(overrides.keys(), dtype=np.int64, count=len(overrides))
+                    positions = np.searchsorted(indices, override_idx)
+                    in_view = positions < num_in_view
+                    in_view[in_view] = indices[positions[in_view]] == override_idx[in_view]
+                    override_items = ((pos, overrides[patch_idx]) for pos, patch_idx
+                                      in zip(positions[in_view].tolist(), override_idx[in_view].tolist()))
+                else:
+                    override_items = ((pos, overrides.get(patch_idx)) for pos, patch_idx in enumerate(indices.tolist()))
+
+                for pos, manual in override_items:
+                    if not (manual and isinstance(manual, dict)):
+                        continue
+                    class_id = class_ids[pos]
+                    manual_class_name = manual.get('tissue_class')
+                    if manual_class_name:
+                        # Positive manual override > prediction
+                        if user_tissue_colormap and manual_class_name in user_tissue_colormap:
+                            colors_arr[pos] = user_tissue_colormap[manual_class_name]
+                        else:
+                            colors_arr[pos] = "#cccccc" if class_id == -1 else "#808080"
+                    elif manual.get('exclude_classes'):
+                        # Negative selection (exclude_classes): show prediction color if we have one, else gray
+                        pred_color = pred_colors[class_id] if 0 <= class_id < num_classes else None
+                        if pred_color is None:
+                            pred_color = manual.get('tissue_color') or '#aaaaaa'
+                        colors_arr[pos] = pred_color
+            colors = colors_arr.tolist()
+
+        logger.debug("get_patch_centroids_in_viewport => colored %d patches (%d manual annotations)",
+                     num_in_view, len(manual_annots) if isinstance(manual_annots, dict) else 0)
 
         # Create result array [index, centroid_x, centroid_y, width, height, color, class_id]
         # Width and height are included for dynamic patch rendering
         # class_id is included to enable optimistic color updates in frontend (similar to nuclei)
-        result_with_colors = []
-        centroids_in_view_x = centroids_x[mask]
-        centroids_in_view_y = centroids_y[mask]
-        widths_in_view = patch_widths[mask]
-        heights_in_view = patch_heights[mask]
-
-        for i in range(len(indices)):
-            class_id = int(patch_class_ids_in_view[i]) if i < len(patch_class_ids_in_view) else -1
-            result_with_colors.append([
-                int(indices[i]),
-                float(centroids_in_view_x[i]),
-                float(centroids_in_view_y[i]),
-                float(widths_in_view[i]),
-                float(heights_in_view[i]),
-                str(colors[i]) if colors[i] else "#cccccc",  # Force string for JSON
-                class_id  # Add class_id for optimistic color updates
-            ])
+        # The columns are packed into one structured array, so a single tolist() yields the row tuples
+        rows = np.empty(num_in_view, dtype=PATCH_VIEWPORT_ROW_DTYPE)
+        rows['index'] = indices
+        rows['x'] = centroids_in_view[:, 0]
+        rows['y'] = centroids_in_view[:, 1]
+        rows['width'] = patch_widths
+        rows['height'] = patch_heights
+        rows['color'] = [str(color) if color else "#cccccc" for color in colors[:num_in_view]]  # Force string for JSON
+        rows['class_id'] = -1
+        num_with_class = min(num_in_view, len(patch_class_ids_in_view))
+        rows['class_id'][:num_with_class] = patch_class_ids_in_view[:num_with_class]  # For optimistic color updates
+
+        result_with_colors = [list(row) for row in rows.tolist()]
 
         return result_with_colors, self.get_all_patch_counts()
 
@@ -5388,7 +5928,7 @@ class SegmentationHandler:
         Merge adjacent patches within viewport and return the contour points of the merged area.
         Only checks adjacency in 8 directions (up, down, left, right, and diagonals).
         """
-        if not hasattr(self, 'patch_coordinates') or self.patch_coordinates is None:
+        if self.patch_coordinates is None:
             print("[Debug] No patch data to merge")
             return
         
@@ -5396,15 +5936,8 @@ class SegmentationHandler:
         if len(self.patch_coordinates.shape) < 2 or self.patch_coordinates.shape[1] < 4:
             raise ValueError(f"Expected patch coordinates to have at least 4 columns (Nx4), but got shape {self.patch_coordinates.shape}")
         
-        # Create mask for all patches
-        patch_x1 = self.patch_coordinates[:, 0]
-        patch_y1 = self.patch_coordinates[:, 1]
-        patch_x2 = self.patch_coordinates[:, 2]
-        patch_y2 = self.patch_coordinates[:, 3]
-        
         # Find patches within viewport
-        viewport_mask = (patch_x2 >= x1) & (patch_x1 <= x2) & (patch_y2 >= y1) & (patch_y1 <= y2)
-        viewport_indices = np.where(viewport_mask)[0]
+        viewport_indices = self._patch_indices_in_box(x1, y1, x2, y2)
         
         if len(viewport_indices) == 0:
             print(f"[Debug] No patches found in viewport ({x1}, {y1}, {x2}, {y2})")
@@ -5415,15 +5948,19 @@ class SegmentationHandler:
         # Create visit markers array (only mark patches within viewport)
         visited = np.zeros(len(self.patch_coordinates), dtype=bool)
         
-        # Pre-calculate patch centers and dimensions for faster adjacency checks
-        centers = np.column_stack([
-            (patch_x1 + patch_x2) / 2,
-            (patch_y1 + patch_y2) / 2
-        ])
-        dimensions = np.column_stack([
-            patch_x2 - patch_x1,
-            patch_y2 - patch_y1
-        ])
+        # Patch centers and dimensions for faster adjacency checks (cached per patch_coordinates array)
+        centers = self.get_patch_centroids()
+        dimensions = self._get_patch_dimensions()
+
+        # Candidate neighbours come from a KD-tree over the in-view centers (Chebyshev distance); the
+        # radius covers the widest in-view neighbour and the exact adjacency check below decides
+        viewport_tree = cKDTree(centers[viewport_indices])
+        max_width, max_height = dimensions[viewport_indices].max(axis=0).tolist()
+
+        # Decoded color of every patch (None without classification data)
+        patch_colors = None
+        if self.patch_class_hex_color is not None and self.patch_class_id is not None:
+            patch_colors = self._get_patch_color_table()[self.patch_class_id]
         
         def is_adjacent_vectorized(current_idx, other_indices, tolerance=1e-6):
             """Vectorized version of adjacency check"""
@@ -5449,12 +5986,10 @@ class SegmentationHandler:
             
             if self.patch_class_hex_color is not None and self.patch_class_id is not None:
                 # get start patch color and class name
-                start_color = self.patch_class_hex_color[self.patch_class_id[start_idx]]
+                start_color = str(patch_colors[start_idx])
                 start_class_name = self.patch_class_name[self.patch_class_id[start_idx]] if self.patch_class_name is not None else None
                 
                 # decode if bytes type
-                if isinstance(start_color, bytes):
-                    start_color = start_color.decode('utf-8')
                 if isinstance(start_class_name, bytes):
                     start_class_name = start_class_name.decode('utf-8')
                     
@@ -5473,23 +6008,21 @@ class SegmentationHandler:
                 visited[current] = True
                 connected.append(current)
                 
-                # Get unvisited patches in viewport
-                unvisited_mask = ~visited[viewport_indices]
-                if not np.any(unvisited_mask):
+                # Get unvisited in-view patches close enough to touch the current one
+                current_width, current_height = dimensions[current].tolist()
+                radius = max(current_width + max_width, current_height + max_height) / 2 + 1e-6
+                candidates = viewport_indices[viewport_tree.query_ball_point(centers[current], r=radius, p=np.inf)]
+                unvisited_indices = candidates[~visited[candidates]]
+                if len(unvisited_indices) == 0:
                     continue
                 
-                unvisited_indices = viewport_indices[unvisited_mask]
-                
                 # Check adjacency for all unvisited patches at once
                 adjacent_mask = is_adjacent_vectorized(current, unvisited_indices)
                 adjacent_indices = unvisited_indices[adjacent_mask]
                 
                 # Filter by color if needed
                 if start_color is not None and len(adjacent_indices) > 0:
-                    colors = self.patch_class_hex_color[self.patch_class_id[adjacent_indices]]
-                    colors = np.array([c.decode('utf-8') if isinstance(c, bytes) else c for c in colors])
-                    color_mask = colors == start_color
-                    adjacent_indices = adjacent_indices[color_mask]
+                    adjacent_indices = adjacent_indices[patch_colors[adjacent_indices] == start_color]
                 
                 stack.extend(adjacent_indices)
             
@@ -5506,21 +6039,11 @@ class SegmentationHandler:
             max_x = np.max(coords[:, 2])
             max_y = np.max(coords[:, 3])
             
-            # Create mask image (using relative coordinates to save memory)
+            # Create mask image (using relative coordinates to save memory) and fill all patch
+            # areas in one pass
             width = int(max_x - min_x + 1)
             height = int(max_y - min_y + 1)
-            mask = np.zeros((height, width), dtype=np.uint8)
-            
-            # Fill patch areas
-            for patch_idx in patches:
-                coords = self.patch_coordinates[patch_idx]
-                x1, y1, x2, y2 = coords
-                # Convert to relative coordinates
-                x1_rel = int(x1 - min_x)
-                y1_rel = int(y1 - min_y)
-                x2_rel = int(x2 - min_x)
-                y2_rel = int(y2 - min_y)
-                mask[y1_rel:y2_rel+1, x1_rel:x2_rel+1] = 1
+            mask = fill_patch_mask(coords, min_x, min_y, height, width)
             
             try:
                 contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -5531,11 +6054,10 @@ class SegmentationHandler:
                 largest_contour = max(contours, key=cv2.contourArea)
                 
                 # Convert back to original coordinate system
-                points = []
-                for point in largest_contour:
-                    x = float(point[0][0] + min_x)
-                    y = float(point[0][1] + min_y)
-                    points.append([x, y])
+                points = largest_contour.reshape(-1, 2).astype(np.float64)
+                points[:, 0] += min_x
+                points[:, 1] += min_y
+                points = points.tolist()
                 
                 if points and points[0] != points[-1]:
                     points.append(points[0])
@@ -5558,21 +6080,14 @@ class SegmentationHandler:
 
         # Only traverse patches within viewport
         merged_patch_annotations = {}
+        created = datetime.now().isoformat()
         for i in viewport_indices:
             if not visited[i]:
                 connected_patches, color = find_connected_patches(i)
                 if connected_patches and color:
                     # Get contour points
                     contour_points = get_contour_points(connected_patches)
-                    points = [[float(x), float(y)] for x, y in contour_points]
-                    xs = [p[0] for p in points]
-                    ys = [p[1] for p in points]
-                    bounds = {
-                        "minX": min(xs),
-                        "minY": min(ys),
-                        "maxX": max(xs),
-                        "maxY": max(ys)
-                    }
+                    points, bounds = polygon_points_and_bounds(contour_points, as_array=True)
 
                     unique_id = f"merged_patch_{len(merged_patch_annotations)}"
                     style_body = {
@@ -5581,7 +6096,7 @@ class SegmentationHandler:
                         "type": "TextualBody",
                         "purpose": "style",
                         "value": color,
-                        "created": datetime.now().isoformat(),
+                        "created": created,
                         "creator": {
                             "id": "default",
                             "type": "AI"
@@ -5606,7 +6121,7 @@ class SegmentationHandler:
                             "isGuest": True,
                             "id": "nrESYlDUe8L1qF6Ffhq4"
                         },
-                        "created": datetime.now().isoformat()
+                        "created": created
                     }
 
                     merged_patch_annotations[unique_id] = annotation
@@ -5619,7 +6134,7 @@ class SegmentationHandler:
         process all patches and store the merged patches in cache
         """
         print(f"[Debug] process_and_store_merged_patches - Processing file: {self.get_current_file_path()}")
-        if not hasattr(self, 'patch_coordinates') or self.patch_coordinates is None:
+        if self.patch_coordinates is None:
             print("[Debug] No patch data to process")
             self._merged_patches_cache = {}
             return
@@ -5628,74 +6143,58 @@ class SegmentationHandler:
         if len(self.patch_coordinates.shape) < 2 or self.patch_coordinates.shape[1] < 4:
             raise ValueError(f"Expected patch coordinates to have at least 4 columns (Nx4), but got shape {self.patch_coordinates.shape}")
 
-        visited = np.zeros(len(self.patch_coordinates), dtype=bool)
-        
-        centers = np.column_stack([
-            (self.patch_coordinates[:, 0] + self.patch_coordinates[:, 2]) / 2,
-            (self.patch_coordinates[:, 1] + self.patch_coordinates[:, 3]) / 2
-        ])
-        dimensions = np.column_stack([
-            self.patch_coordinates[:, 2] - self.patch_coordinates[:, 0],
-            self.patch_coordinates[:, 3] - self.patch_coordinates[:, 1]
-        ])
-        
-        def is_adjacent_vectorized(current_idx, other_indices, tolerance=1e-6):
-            current_center = centers[current_idx]
-            other_centers = centers[other_indices]
-            current_dim = dimensions[current_idx]
-            other_dims = dimensions[other_indices]
-            dx = np.abs(other_centers[:, 0] - current_center[0])
-            dy = np.abs(other_centers[:, 1] - current_center[1])
-            avg_width = (current_dim[0] + other_dims[:, 0]) / 2
-            avg_height = (current_dim[1] + other_dims[:, 1]) / 2
-            return (dx <= avg_width + tolerance) & (dy <= avg_height + tolerance)
+        if len(self.patch_coordinates) == 0:
+            self._merged_patches_cache = {}
+            print(f"[Debug] Processed and stored 0 merged patch annotations")
+            return
 
-        def find_connected_patches(start_idx):
-            connected = []
-            stack = [start_idx]
-            
-            if self.patch_class_hex_color is not None and self.patch_class_id is not None:
-                start_color = self.patch_class_hex_color[self.patch_class_id[start_idx]]
-                start_class_name = self.patch_class_name[self.patch_class_id[start_idx]] if self.patch_class_name is not None else None
-                
-                # decode if bytes type
-                if isinstance(start_color, bytes):
-                    start_color = start_color.decode('utf-8')
-                if isinstance(start_class_name, bytes):
-                    start_class_name = start_class_name.decode('utf-8')
-                    
-                # check if it is default color or Negative control class
-                if start_color == "#aaaaaa" or (start_class_name and start_class_name.lower() == "negative control"):
-                    return [], None
-            else:
-                start_color = None
-                start_class_name = None
+        num_patches = len(self.patch_coordinates)
+
+        # Patch centers and dimensions (cached per patch_coordinates array)
+        centers = self.get_patch_centroids()
+        dimensions = self._get_patch_dimensions()
+
+        # Decoded color of every patch (None without classification data)
+        patch_colors = None
+        if self.patch_class_hex_color is not None and self.patch_class_id is not None:
+            patch_colors = self._get_patch_color_table()[self.patch_class_id]
+
+        # Adjacent pairs in one pass: candidates within the widest possible neighbour distance come
+        # from a KD-tree over the centers (Chebyshev distance), then the exact adjacency test
+        # (centers within half the summed sizes, plus tolerance) and same-color check are applied
+        # to all candidates at once
+        tolerance = 1e-6
+        max_width, max_height = dimensions.max(axis=0).tolist()
+        pairs = cKDTree(centers).query_pairs(r=max(max_width, max_height) + tolerance, p=np.inf, output_type='ndarray')
+        first, second = pairs[:, 0], pairs[:, 1]
+        adjacent = (
+            (np.abs(centers[first, 0] - centers[second, 0]) <= (dimensions[first, 0] + dimensions[second, 0]) / 2 + tolerance)
+            & (np.abs(centers[first, 1] - centers[second, 1]) <= (dimensions[first, 1] + dimensions[second, 1]) / 2 + tolerance)
+        )
+        if patch_colors is not None:
+            adjacent &= patch_colors[first] == patch_colors[second]
+        graph = coo_matrix(
+            (np.ones(int(adjacent.sum()), dtype=np.int8), (first[adjacent], second[adjacent])),
+            shape=(num_patches, num_patches)
+        )
+        num_components, labels = connected_components(graph, directed=False)
+
+        # Patches of the default color or the Negative control class never start a merged region
+        if patch_colors is not None:
+            skip_start = patch_colors == "#aaaaaa"
+            if self.patch_class_name is not None:
+                is_negative_control = np.char.lower(decode_str_array(self.patch_class_name)) == "negative control"
+                skip_start |= is_negative_control[self.patch_class_id]
+        else:
+            skip_start = np.zeros(num_patches, dtype=bool)
 
-            while stack:
-                current = stack.pop()
-                if visited[current]:
-                    continue
-                
-                visited[current] = True
-                connected.append(current)
-                
-                unvisited_mask = ~visited
-                if not np.any(unvisited_mask):
-                    continue
-                
-                unvisited_indices = np.where(unvisited_mask)[0]
-                adjacent_mask = is_adjacent_vectorized(current, unvisited_indices)
-                adjacent_indices = unvisited_indices[adjacent_mask]
-                
-                if start_color is not None and len(adjacent_indices) > 0:
-                    colors = self.patch_class_hex_color[self.patch_class_id[adjacent_indices]]
-                    colors = np.array([c.decode('utf-8') if isinstance(c, bytes) else c for c in colors])
-                    color_mask = colors == start_color
-                    adjacent_indices = adjacent_indices[color_mask]
-                
-                stack.extend(adjacent_indices)
-            
-            return connected, start_color if start_color else "#aaaaaa"
+        # Each component is emitted once, at its first patch (in index order) that may start a region,
+        # with that patch's color; same-color components are exactly what a flood fill from it reaches
+        start_candidates = np.flatnonzero(~skip_start)
+        _, first_positions = np.unique(labels[start_candidates], return_index=True)
+        component_starts = np.sort(start_candidates[first_positions]).tolist()
+        members_order = np.argsort(labels, kind='stable')
+        member_bounds = np.searchsorted(labels[members_order], np.arange(num_components + 1)).tolist()
 
         def get_contour_points(patches):
             if not patches:
@@ -5709,16 +6208,7 @@ class SegmentationHandler:
             
             width = int(max_x - min_x + 1)
             height = int(max_y - min_y + 1)
-            mask = np.zeros((height, width), dtype=np.uint8)
-            
-            for patch_idx in patches:
-                coords = self.patch_coordinates[patch_idx]
-                x1, y1, x2, y2 = coords
-                x1_rel = int(x1 - min_x)
-                y1_rel = int(y1 - min_y)
-                x2_rel = int(x2 - min_x)
-                y2_rel = int(y2 - min_y)
-                mask[y1_rel:y2_rel+1, x1_rel:x2_rel+1] = 1
+            mask = fill_patch_mask(coords, min_x, min_y, height, width)
             
             try:
                 contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -5726,11 +6216,10 @@ class SegmentationHandler:
                     return []
                 
                 largest_contour = max(contours, key=cv2.contourArea)
-                points = []
-                for point in largest_contour:
-                    x = float(point[0][0] + min_x)
-                    y = float(point[0][1] + min_y)
-                    points.append([x, y])
+                points = largest_contour.reshape(-1, 2).astype(np.float64)
+                points[:, 0] += min_x
+                points[:, 1] += min_y
+                points = points.tolist()
                 
                 if points and points[0] != points[-1]:
                     points.append(points[0])
@@ -5751,62 +6240,53 @@ class SegmentationHandler:
 
         # store merged results
         self._merged_patches_cache = {}
-        all_indices = np.arange(len(self.patch_coordinates))
-        
-        for i in all_indices:
-            if not visited[i]:
-                connected_patches, color = find_connected_patches(i)
-                if connected_patches and color:
-                    contour_points = get_contour_points(connected_patches)
-                    points = [[float(x), float(y)] for x, y in contour_points]
-
-                    # calculate bounds
-                    xs = [p[0] for p in points]
-                    ys = [p[1] for p in points]
-                    bounds = {
-                        "minX": min(xs),
-                        "minY": min(ys),
-                        "maxX": max(xs),
-                        "maxY": max(ys)
-                    }
-                    
-                    unique_id = f"merged_patch_{len(self._merged_patches_cache)}"
-                    
-                    # create annotation object
-                    annotation = {
+        created = datetime.now().isoformat()
+        for start_idx in component_starts:
+            component = labels[start_idx]
+            connected_patches = members_order[member_bounds[component]:member_bounds[component + 1]].tolist()
+            color = str(patch_colors[start_idx]) if patch_colors is not None else None
+            color = color if color else "#aaaaaa"
+            if connected_patches:
+                contour_points = get_contour_points(connected_patches)
+                points, bounds = polygon_points_and_bounds(contour_points, as_array=True)
+                
+                unique_id = f"merged_patch_{len(self._merged_patches_cache)}"
+                
+                # create annotation object
+                annotation = {
+                    "id": unique_id,
+                    "type": "Annotation",
+                    "bodies": [{
                         "id": unique_id,
-                        "type": "Annotation",
-                        "bodies": [{
-                            "id": unique_id,
-                            "annotation": unique_id,
-                            "type": "TextualBody",
-                            "purpose": "style",
-                            "value": color,
-                            "created": datetime.now().isoformat(),
-                            "creator": {"id": "default", "type": "AI"}
-                        }],
-                        "target": {
-                            "annotation": unique_id,
-                            "selector": {
-                                "type": "POLYGON",
-                                "geometry": {
-                                    "points": points,
-                                    "bounds": bounds
-                                }
+                        "annotation": unique_id,
+                        "type": "TextualBody",
+                        "purpose": "style",
+                        "value": color,
+                        "created": created,
+                        "creator": {"id": "default", "type": "AI"}
+                    }],
+                    "target": {
+                        "annotation": unique_id,
+                        "selector": {
+                            "type": "POLYGON",
+                            "geometry": {
+                                "points": points,
+                                "bounds": bounds
                             }
-                        },
-                        "creator": {
-                            "isGuest": True,
-                            "id": "nrESYlDUe8L1qF6Ffhq4"
-                        },
-                        "created": datetime.now().isoformat()
-                    }
-                    
-                    self._merged_patches_cache[unique_id] = {
-                        "annotation": annotation,
-                        "bounds": bounds
-                    }
-        
+                        }
+                    },
+                    "creator": {
+                        "isGuest": True,
+                        "id": "nrESYlDUe8L1qF6Ffhq4"
+                    },
+                    "created": created
+                }
+                
+                self._merged_patches_cache[unique_id] = {
+                    "annotation": annotation,
+                    "bounds": bounds
+                }
+    
         print(f"[Debug] Processed and stored {len(self._merged_patches_cache)} merged patch annotations")
 
     def get_merged_patches_in_viewport(self, x1: float, y1: float, x2: float, y2: float):
@@ -5819,16 +6299,30 @@ class SegmentationHandler:
         Returns:
             Dict: the merged patches in viewport
         """
-        if not hasattr(self, '_merged_patches_cache'):
+        if self._merged_patches_cache is None:
             self.process_and_store_merged_patches()
-        
+
+        # Bounds of every merged patch as one (M, 4) array, rebuilt only when the cache is rebuilt
+        merged = self._merged_patches_cache
+        if (self._merged_bounds_index is None or self._merged_bounds_source is not merged
+                or self._merged_bounds_len != len(merged)):
+            patch_ids = list(merged)
+            bounds_arr = np.array(
+                [[b["minX"], b["minY"], b["maxX"], b["maxY"]] for b in (merged[pid]["bounds"] for pid in patch_ids)],
+                dtype=np.float64
+            ).reshape(-1, 4)
+            self._merged_bounds_index = (patch_ids, bounds_arr)
+            self._merged_bounds_source = merged
+            self._merged_bounds_len = len(merged)
+        patch_ids, bounds_arr = self._merged_bounds_index
+
+        # check which merged patches intersect with the viewport, all at once
+        in_view = ((bounds_arr[:, 2] >= x1) & (bounds_arr[:, 0] <= x2) &
+                   (bounds_arr[:, 3] >= y1) & (bounds_arr[:, 1] <= y2))
         result = {}
-        for patch_id, patch_data in self._merged_patches_cache.items():
-            bounds = patch_data["bounds"]
-            # check if it intersects with the viewport
-            if (bounds["maxX"] >= x1 and bounds["minX"] <= x2 and
-                bounds["maxY"] >= y1 and bounds["minY"] <= y2):
-                result[patch_id] = patch_data["annotation"]
+        for i in np.flatnonzero(in_view).tolist():
+            patch_id = patch_ids[i]
+            result[patch_id] = merged[patch_id]["annotation"]
         
         print(f"[Debug] Found {len(result)} merged patches in viewport")
         return result
@@ -5863,7 +6357,7 @@ class SegmentationHandler:
         total_count = 0
         
         # Check if patch data is available
-        if not hasattr(self, 'patch_coordinates') or self.patch_coordinates is None:
+        if self.patch_coordinates is None:
             print("[Debug] get_patches => No patch data available")
             return patches_list, total_count
             
@@ -5874,11 +6368,20 @@ class SegmentationHandler:
         if limit is not None:
             end_idx = min(offset + limit, total_count)
             
+        # Read the page's coordinates and class ids with one slice each, and decode the class
+        # color/name tables once for the page
+        start_idx = max(offset, 0)
+        page_coords = self.patch_coordinates[start_idx:end_idx].tolist()
+        page_class_ids = []
+        if self.patch_class_id is not None:
+            page_class_ids = self.patch_class_id[start_idx:end_idx].tolist()
+        class_colors = self._get_patch_color_table().tolist() if self.patch_class_hex_color is not None else []
+        class_names = decode_str_array(self.patch_class_name).tolist() if self.patch_class_name is not None else []
+
         # Iterate over the specified range of indices
-        for idx in range(offset, end_idx):
+        for idx, patch_coords in enumerate(page_coords, start_idx):
             # Create a patch annotation
-            patch_coords = self.patch_coordinates[idx]
-            x1_coord, y1_coord, x2_coord, y2_coord = patch_coords
+            x1_coord, y1_coord, x2_coord, y2_coord = patch_coords[:4]
             
             # Create contour points for the patch (rectangle)
             contour = [
@@ -5894,21 +6397,14 @@ class SegmentationHandler:
             patch_assigned_class_id = -1      # Default class_id
             patch_specific_class_name = ""    # Default class_name
 
-            if hasattr(self, 'patch_class_id') and self.patch_class_id is not None and \
-               idx < len(self.patch_class_id):
-                
-                current_patch_class_id_val = self.patch_class_id[idx]
-                patch_assigned_class_id = int(current_patch_class_id_val)
+            if idx - start_idx < len(page_class_ids):
+                patch_assigned_class_id = int(page_class_ids[idx - start_idx])
 
-                if hasattr(self, 'patch_class_hex_color') and self.patch_class_hex_color is not None and \
-                   0 <= current_patch_class_id_val < len(self.patch_class_hex_color):
-                    color_val = self.patch_class_hex_color[current_patch_class_id_val]
-                    patch_specific_color = color_val.decode('utf-8') if isinstance(color_val, bytes) else str(color_val)
+                if 0 <= patch_assigned_class_id < len(class_colors):
+                    patch_specific_color = class_colors[patch_assigned_class_id]
 
-                if hasattr(self, 'patch_class_name') and self.patch_class_name is not None and \
-                   0 <= current_patch_class_id_val < len(self.patch_class_name):
-                    name_val = self.patch_class_name[current_patch_class_id_val]
-                    patch_specific_class_name = name_val.decode('utf-8') if isinstance(name_val, bytes) else str(name_val)
+                if 0 <= patch_assigned_class_id < len(class_names):
+                    patch_specific_class_name = class_names[patch_assigned_class_id]
             
             # Create the annotation
             patch_annotation = self.create_annotation(
@@ -5963,26 +6459,24 @@ class SegmentationHandler:
             return result
 
         try:
-            with zarr.open(zarr_path, 'r') as zarr_file:
-                # Look for class counts in user_annotation group
-                if 'user_annotation' in zarr_file:
-                    user_anno_group = zarr_file['user_annotation']
-                    
-                    if 'class_counts' in user_anno_group:
-                        raw_data = user_anno_group['class_counts'][()]
-                        try:
-                            if isinstance(raw_data, bytes):
-                                counts_dict = json.loads(raw_data.decode('utf-8'))
-                            else:
-                                counts_dict = json.loads(raw_data)
-                            print(f"[get_all_nuclei_counts] Loaded class_counts from Zarr: {counts_dict}")
-                        except (json.JSONDecodeError, UnicodeDecodeError) as e:
-                            print(f"[WARN] get_all_nuclei_counts => Failed to parse counts data: {e}")
-                            counts_dict = {}
-                    else:
-                        print(f"[get_all_nuclei_counts] class_counts not found in user_annotation, will compute from annotations")
-                else:
-                    print(f"[get_all_nuclei_counts] user_annotation group not found, will compute from annotations")
+            # The handler keeps one read-only group open; DirectoryStore reads go to disk on every access,
+            # so it sees the latest writes
+            zarr_file = self._get_read_zarr_group()
+            if zarr_file is not None:
+                # Look for class counts in user_annotation group; a missing group or dataset raises KeyError
+                try:
+                    counts_array = zarr_file['user_annotation/class_counts']
+                except KeyError:
+                    counts_array = None
+                    print(f"[get_all_nuclei_counts] class_counts not found in user_annotation, will compute from annotations")
+
+                if counts_array is not None:
+                    try:
+                        counts_dict = self._load_json_array(counts_array)
+                        print(f"[get_all_nuclei_counts] Loaded class_counts from Zarr: {counts_dict}")
+                    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                        print(f"[WARN] get_all_nuclei_counts => Failed to parse counts data: {e}")
+                        counts_dict = {}
         except Exception as e:
             print(f"[WARN] get_all_nuclei_counts => Error reading Zarr file: {e}")
             counts_dict = {}
@@ -6031,57 +6525,57 @@ class SegmentationHandler:
                 print(f"[WARN] _compute_counts_from_manual_annotations => Zarr file not found: {self.zarr_file}")
                 return {}
             
-            with zarr.open(self.zarr_file, 'r') as zarr_file:
-                if 'user_annotation' in zarr_file:
-                    user_anno_group = zarr_file['user_annotation']
-                    
-                    # Get class_names from metadata first (needed for ID to name conversion)
-                    class_names = None
-                    if 'class_names' in user_anno_group.attrs:
-                        class_names = user_anno_group.attrs.get('class_names', [])
-                        # Decode bytes if needed
-                        if isinstance(class_names, (list, tuple)) and len(class_names) > 0:
-                            if isinstance(class_names[0], bytes):
-                                class_names = [name.decode('utf-8') if isinstance(name, bytes) else str(name) for name in class_names]
-                            else:
-                                class_names = [str(name) for name in class_names]
-                        elif isinstance(class_names, np.ndarray):
+            zarr_file = self._get_read_zarr_group()
+            if 'user_annotation' in zarr_file:
+                user_anno_group = zarr_file['user_annotation']
+                
+                # Get class_names from metadata first (needed for ID to name conversion)
+                class_names = None
+                if 'class_names' in user_anno_group.attrs:
+                    class_names = user_anno_group.attrs.get('class_names', [])
+                    # Decode bytes if needed
+                    if isinstance(class_names, (list, tuple)) and len(class_names) > 0:
+                        if isinstance(class_names[0], bytes):
                             class_names = [name.decode('utf-8') if isinstance(name, bytes) else str(name) for name in class_names]
+                        else:
+                            class_names = [str(name) for name in class_names]
+                    elif isinstance(class_names, np.ndarray):
+                        class_names = [name.decode('utf-8') if isinstance(name, bytes) else str(name) for name in class_names]
+                
+                if not class_names:
+                    # No metadata, can't convert IDs to names
+                    print(f"[_compute_counts_from_manual_annotations] No class_names in metadata, cannot compute counts")
+                    return {}
+                
+                print(f"[_compute_counts_from_manual_annotations] Found class_names: {class_names}")
+                
+                # Load only cell_class field (much faster than loading entire array)
+                manual_annotations = self._load_annotations_array(zarr_file, fields=['cell_class'])
+                if manual_annotations is not None:
+                    # Use numpy operations for much better performance
+                    cell_class_ids = manual_annotations['cell_class']
+                    # New format: -1 = unclassified, 0+ = class index
+                    non_empty_mask = cell_class_ids >= 0
                     
-                    if not class_names:
-                        # No metadata, can't convert IDs to names
-                        print(f"[_compute_counts_from_manual_annotations] No class_names in metadata, cannot compute counts")
-                        return {}
-                    
-                    print(f"[_compute_counts_from_manual_annotations] Found class_names: {class_names}")
+                    annotated_count = np.sum(non_empty_mask)
+                    print(f"[_compute_counts_from_manual_annotations] Found {annotated_count} annotated cells")
                     
-                    # Load only cell_class field (much faster than loading entire array)
-                    manual_annotations = self._load_annotations_array(zarr_file, fields=['cell_class'])
-                    if manual_annotations is not None:
-                        # Use numpy operations for much better performance
-                        cell_class_ids = manual_annotations['cell_class']
-                        # New format: -1 = unclassified, 0+ = class index
-                        non_empty_mask = cell_class_ids >= 0
-                        
-                        annotated_count = np.sum(non_empty_mask)
-                        print(f"[_compute_counts_from_manual_annotations] Found {annotated_count} annotated cells")
-                        
-                        if np.any(non_empty_mask):
-                            # Convert IDs to class names
-                            valid_class_ids = cell_class_ids[non_empty_mask]
-                            # Filter out invalid indices before conversion
-                            valid_indices_mask = (valid_class_ids >= 0) & (valid_class_ids < len(class_names))
-                            valid_classes = np.array([class_names[cid] for cid in valid_class_ids[valid_indices_mask]])
-                            print(f"[_compute_counts_from_manual_annotations] Valid classes count: {len(valid_classes)}")
-                        else:
-                            print(f"[_compute_counts_from_manual_annotations] No annotated cells found")
-                            return {}
+                    if np.any(non_empty_mask):
+                        # Convert IDs to class names
+                        valid_class_ids = cell_class_ids[non_empty_mask]
+                        # Filter out invalid indices before conversion
+                        valid_indices_mask = (valid_class_ids >= 0) & (valid_class_ids < len(class_names))
+                        valid_classes = np.array([class_names[cid] for cid in valid_class_ids[valid_indices_mask]])
+                        print(f"[_compute_counts_from_manual_annotations] Valid classes count: {len(valid_classes)}")
                     else:
-                        print(f"[_compute_counts_from_manual_annotations] Failed to load annotations array")
+                        print(f"[_compute_counts_from_manual_annotations] No annotated cells found")
                         return {}
                 else:
-                    print(f"[_compute_counts_from_manual_annotations] user_annotation group not found")
+                    print(f"[_compute_counts_from_manual_annotations] Failed to load annotations array")
                     return {}
+            else:
+                print(f"[_compute_counts_from_manual_annotations] user_annotation group not found")
+                return {}
 
             # Optimized counting with pre-filtering using numpy
             TEMPORARY_CLASSES = {"Other", "Not Sure", "Incorrect Segmentation"}
@@ -6144,6 +6638,33 @@ class SegmentationHandler:
             print(f"[ERROR] _compute_counts_from_manual_annotations: {e}")
             return {}
 
+    def _get_read_zarr_group(self):
+        """get the handler's shared read-only group over zarr_file, opening it once (None if the file is missing)"""
+        if self._zarr_file_obj is not None:
+            return self._zarr_file_obj
+        if not self.zarr_file or not os.path.exists(self.zarr_file):
+            return None
+        if self._zarr_synchronizer is None:
+            from app.services.data import get_zarr_synchronizer
+            self._zarr_synchronizer = get_zarr_synchronizer(self.zarr_file)
+        self._zarr_file_obj = zarr.open(self.zarr_file, 'r', synchronizer=self._zarr_synchronizer)
+        return self._zarr_file_obj
+
+    def _load_json_array(self, array):
+        """Parsed JSON content of a bytes/str Zarr array, re-parsed only when the array's stamp changes.
+
+        The parsed object is shared between calls, so callers must treat it as read-only.
+        """
+        stamp = zarr_array_stamp(array)
+        if stamp is not None:
+            cached = self._user_json_cache.get(stamp[0])
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+        parsed = load_json_scalar(array[()])
+        if stamp is not None:
+            self._user_json_cache[stamp[0]] = (stamp, parsed)
+        return parsed
+
     def _build_id_based_counts(self, counts_dict: Dict[str, int]) -> Dict[str, Any]:
         """Build ID-based counts from name-based counts (optimized)"""
         if self.class_name is None or len(self.class_name) == 0:
@@ -6222,11 +6743,11 @@ class SegmentationHandler:
     def invalidate_user_counts_cache(self):
         """Invalidate all user-related caches to ensure fresh data"""
         self._user_annotation_counts_cache = None
+        self._user_json_cache.clear()
         self._global_label_counts_cache = None
         self._needs_reload = True
         # Also clear viewport cache to ensure fresh annotation data
-        if hasattr(self, '_viewport_cache'):
-            self._viewport_cache.clear()
+        self._viewport_cache.clear()
 
     def get_global_nuclei_label_counts(self) -> Dict[str, Any]:
         """
@@ -6253,7 +6774,7 @@ class SegmentationHandler:
         
         # Use caching for performance - total_counts is called frequently
         # Check cache first to avoid expensive recalculations
-        if hasattr(self, '_global_label_counts_cache') and self._global_label_counts_cache is not None:
+        if self._global_label_counts_cache is not None:
             # Check if cache is still valid (file hasn't changed)
             current_file = self.get_current_file_path()
             cached_file, cached_result = self._global_label_counts_cache
@@ -6366,42 +6887,40 @@ class SegmentationHandler:
 
             # Apply reclassifications if any exist
             if reclassified_data:
-                # Convert class names to IDs for reclassification (create once)
-                class_name_to_id = {name: idx for idx, name in enumerate(self.class_name)}
-                
-                # Optimize: use vectorized operations instead of loop
-                # Collect all valid updates first
-                valid_updates = []
-                for cell_id_str, reclassify_info in reclassified_data.items():
+                # Convert class names to IDs for reclassification (cached per class list)
+                class_name_to_id = self._get_class_name_index()
+
+                def cell_index(cell_id_str):
+                    try:
+                        return int(cell_id_str)
+                    except (ValueError, TypeError):
+                        return -1
+
+                def new_class_index(reclassify_info):
+                    # Temporary classes resolve to -1 and are skipped like unknown names
                     try:
-                        cell_id = int(cell_id_str)
                         new_class_name = reclassify_info["new_class"]
-                        
-                        # Skip temporary classes
                         if new_class_name in TEMPORARY_CLASSES:
-                            continue
-                        
-                        if cell_id < len(class_ids) and new_class_name in class_name_to_id:
-                            new_class_id = class_name_to_id[new_class_name]
-                            valid_updates.append((cell_id, new_class_id))
-                    except (ValueError, KeyError):
-                        continue
-                
-                # Apply updates in batch using vectorized operations
-                if valid_updates:
+                            return -1
+                        return class_name_to_id.get(new_class_name, -1)
+                    except (KeyError, TypeError):
+                        return -1
+
+                # Resolve every entry into two arrays, then apply the valid ones with one scatter
+                num_entries = len(reclassified_data)
+                update_indices = np.fromiter((cell_index(k) for k in reclassified_data.keys()),
+                                             dtype=np.int64, count=num_entries)
+                update_values = np.fromiter((new_class_index(v) for v in reclassified_data.values()),
+                                            dtype=np.int64, count=num_entries)
+                valid = (update_indices >= 0) & (update_indices < len(class_ids)) & (update_values >= 0)
+
+                if valid.any():
                     # Only create copy if we have updates to apply
                     if not isinstance(class_ids, np.ndarray):
                         class_ids = np.array(class_ids)
                     else:
-                        # Use view instead of copy when possible, only copy if needed
                         class_ids = class_ids.copy()
-                    
-                    # Vectorized update: convert to arrays and update in one operation
-                    update_indices = np.array([uid for uid, _ in valid_updates], dtype=np.int64)
-                    update_values = np.array([val for _, val in valid_updates], dtype=class_ids.dtype)
-                    
-                    # Apply updates (much faster than loop)
-                    class_ids[update_indices] = update_values
+                    class_ids[update_indices[valid]] = update_values[valid].astype(class_ids.dtype, copy=False)
         except Exception as e:
             logger.error(f"Error applying reclassifications: {e}")
             logger.debug(traceback.format_exc())
@@ -6415,12 +6934,12 @@ class SegmentationHandler:
             max_id = int(np.max(safe_ids)) if hasattr(safe_ids, 'size') and safe_ids.size > 0 else int(max(safe_ids))
             bincount = np.bincount(safe_ids.astype(int), minlength=max(len(self.class_name), max_id + 1))
 
-        # Normalize lengths and types
-        names_list = list(self.class_name) if self.class_name is not None else []
-        colors_list = list(self.class_hex_color) if self.class_hex_color is not None else []
-        # Decode bytes if present
-        names_list = [n.decode('utf-8') if isinstance(n, (bytes, bytearray)) else str(n) for n in names_list]
-        colors_list = [c.decode('utf-8') if isinstance(c, (bytes, bytearray)) else str(c) for c in colors_list]
+        # Normalize lengths and types (decoded tables are cached per class list; copy before editing)
+        if self.class_name is not None and self.class_hex_color is not None:
+            names_list, colors_list = (list(table) for table in self._get_class_tables())
+        else:
+            names_list = decode_str_array(self.class_name).tolist() if self.class_name is not None else []
+            colors_list = decode_str_array(self.class_hex_color).tolist() if self.class_hex_color is not None else []
         
         # Priority: user_annotation.attrs['class_colors'] (updated by save_annotation/update_class_color) > self.class_hex_color (from ClassificationNode)
         # user_annotation.attrs['class_colors'] contains user's manual annotation colors (most up-to-date)
@@ -6493,40 +7012,49 @@ class SegmentationHandler:
         model_class_names: List[str] = []
         manual_class_names: List[str] = []
         try:
-            # Direct loading from Zarr file (no cache)
-            if self.zarr_file and os.path.exists(self.zarr_file):
-                with zarr.open(self.zarr_file, 'r') as zarr_file:
-                    # Get patch class counts
-                    if 'user_annotation' in zarr_file and 'patch_class_counts' in zarr_file['user_annotation']:
-                        raw_data = zarr_file['user_annotation/patch_class_counts'][()]
-                        counts_dict = json.loads(raw_data.decode('utf-8'))
-
-                    # Get tissue annotations
-                    if 'user_annotation' in zarr_file and 'tissue_annotations' in zarr_file['user_annotation']:
-                        raw_bytes = zarr_file['user_annotation/tissue_annotations'][()]
-                        manual_annotations = json.loads(raw_bytes.decode('utf-8'))
-                        for ann in manual_annotations.values():
-                            name = ann.get('tissue_class')
-                            if isinstance(name, str):
-                                manual_class_names.append(name)
-
-                    # Get model class names
-                    patch_prefix = self.get_patch_classification_prefix()
-                    if (self.patch_class_name is None or len(self.patch_class_name) == 0) and patch_prefix in zarr_file and 'tissue_class_name' in zarr_file[patch_prefix]:
-                        try:
-                            raw_names = safe_load_zarr_dataset(zarr_file[patch_prefix]['tissue_class_name'])
-                            if raw_names is not None:
-                                model_class_names = [n.decode('utf-8') for n in raw_names]
-                            else:
-                                model_class_names = []
-                        except Exception:
-                            # Fallback for scalar/other edge cases
-                            raw = zarr_file[patch_prefix]['tissue_class_name'][()]
-                            if isinstance(raw, (bytes, bytearray)):
-                                model_class_names = [raw.decode('utf-8')]
-                            else:
-                                model_class_names = []
-        
+            zarr_file = self._get_read_zarr_group()
+            if zarr_file is not None:
+                # A missing group or dataset raises KeyError and is returned as None
+                def open_array(path):
+                    try:
+                        return zarr_file[path]
+                    except KeyError:
+                        return None
+
+                # Get patch class counts
+                counts_array = open_array('user_annotation/patch_class_counts')
+                if counts_array is not None:
+                    counts_dict = self._load_json_array(counts_array)
+
+                # Get tissue annotations
+                annotations_array = open_array('user_annotation/tissue_annotations')
+                if annotations_array is not None:
+                    manual_annotations = self._load_json_array(annotations_array)
+                    for ann in manual_annotations.values():
+                        name = ann.get('tissue_class')
+                        if isinstance(name, str):
+                            manual_class_names.append(name)
+
+                # Get model class names
+                patch_prefix = self.get_patch_classification_prefix()
+                names_array = None
+                if patch_prefix and (self.patch_class_name is None or len(self.patch_class_name) == 0):
+                    names_array = open_array(f"{patch_prefix}/tissue_class_name")
+                if names_array is not None:
+                    try:
+                        raw_names = safe_load_zarr_dataset(names_array)
+                        if raw_names is not None:
+                            model_class_names = decode_str_array(raw_names).tolist()
+                        else:
+                            model_class_names = []
+                    except Exception:
+                        # Fallback for scalar/other edge cases
+                        raw = names_array[()]
+                        if isinstance(raw, (bytes, bytearray)):
+                            model_class_names = [raw.decode('utf-8')]
+                        else:
+                            model_class_names = []
+
         except Exception as e:
             print(f"[ERROR] get_all_patch_counts: Failed to load patch_class_counts: {e}")
             counts_dict = {}
@@ -6534,13 +7062,8 @@ class SegmentationHandler:
         # Fallback for old files: if patch_class_counts dataset does not exist, compute from manual annotations.
         if not counts_dict:
             print("[Debug] patch_class_counts not found in Zarr. Computing from manual annotations for backward compatibility.")
-            name_counts = {}
-            if manual_annotations:
-                for _patch_id, annotation in manual_annotations.items():
-                    class_name = annotation.get("tissue_class")
-                    if class_name:
-                        name_counts[class_name] = name_counts.get(class_name, 0) + 1
-            counts_dict = name_counts
+            class_names_iter = (annotation.get("tissue_class") for annotation in manual_annotations.values())
+            counts_dict = dict(Counter(name for name in class_names_iter if name))
 
             # Persist the computed counts back to the Zarr file for future use
             if counts_dict:
@@ -6549,7 +7072,7 @@ class SegmentationHandler:
                         user_group = zarr_file.require_group('user_annotation')
                         if 'patch_class_counts' in user_group:
                             del user_group['patch_class_counts']
-                        user_group.create_dataset('patch_class_counts', data=json.dumps(counts_dict).encode('utf-8'))
+                        user_group.create_dataset('patch_class_counts', data=orjson.dumps(counts_dict))
                     print("[Debug] Persisted newly computed patch counts to Zarr file.")
                 except Exception as e:
                     print(f"[Warning] Could not persist computed patch counts to Zarr file: {e}")
@@ -6566,9 +7089,11 @@ class SegmentationHandler:
         _seen_names = set()
         base_names = [n for n in base_names if not (n in _seen_names or _seen_names.add(n))]
 
-        # Union with manual names (preserve order)
+        # Union with manual names (preserve order). manual_class_names has one entry per annotated
+        # patch, so membership is tested against the seen-set
         for n in manual_class_names:
-            if n not in base_names:
+            if n not in _seen_names:
+                _seen_names.add(n)
                 base_names.append(n)
 
         # Ensure 'Negative control' exists and is first
@@ -6612,9 +7137,11 @@ class SegmentationHandler:
                     group = zarr_file[classification_prefix]
                 
                 # Store class information as group attributes
-                group.attrs['class_names'] = class_names
-                group.attrs['class_colors'] = class_colors
-                group.attrs['last_updated'] = time.time()
+                group.attrs.update({
+                    'class_names': class_names,
+                    'class_colors': class_colors,
+                    'last_updated': time.time(),
+                })
                 
                 print(f"[Debug] save_class_metadata_to_zarr => Saved {len(class_names)} classes to Zarr metadata")
                 
@@ -6684,8 +7211,10 @@ class SegmentationHandler:
                         class_colors[class_index] = new_color
                         
                         # Update attributes (list is already modified, but ensure it's saved)
-                        group.attrs['class_colors'] = class_colors
-                        group.attrs['last_updated'] = time.time()
+                        group.attrs.update({
+                            'class_colors': class_colors,
+                            'last_updated': time.time(),
+                        })
                         
                         print(f"Updated color in ClassificationNode attributes for '{class_name}' to '{new_color}'.")
                     else:
@@ -6695,7 +7224,7 @@ class SegmentationHandler:
                 elif 'nuclei_class_name' in group and 'nuclei_class_HEX_color' in group:
                     raw_names = safe_load_zarr_dataset(group['nuclei_class_name'])
                     if raw_names is not None:
-                        class_names = [name.decode('utf-8') for name in raw_names]
+                        class_names = decode_str_array(raw_names).tolist()
                         if class_name in class_names:
                             class_index = class_names.index(class_name)
                             color_dataset = group['nuclei_class_HEX_color']
@@ -6746,7 +7275,7 @@ class SegmentationHandler:
                     dataset = zarr_file[tissue_annots_path]
                     if hasattr(dataset, 'size') and dataset.size < 100000:  # Skip if too large
                         raw_bytes = dataset[()]
-                        manual_tissue_annotations = json.loads(raw_bytes.decode("utf-8"))
+                        manual_tissue_annotations = load_json_scalar(raw_bytes)
 
                         updated = False
                         for patch_id, annotation in manual_tissue_annotations.items():
@@ -6756,7 +7285,7 @@ class SegmentationHandler:
 
                         if updated:
                             del zarr_file[tissue_annots_path]
-                            zarr_file.create_dataset(tissue_annots_path, data=json.dumps(manual_tissue_annotations).encode('utf-8'))
+                            zarr_file.create_dataset(tissue_annots_path, data=orjson.dumps(manual_tissue_annotations))
                             print(f"Updated denormalized colors in user_annotation/tissue_annotations.")
                 except Exception as e:
                     # Skip if update fails (e.g., large dataset) - colormap update is sufficient
@@ -6797,8 +7326,10 @@ class SegmentationHandler:
                         patch_class_colors[patch_class_index] = new_color
                         
                         # Update attributes (list is already modified, but ensure it's saved)
-                        patch_group.attrs['tissue_class_HEX_color'] = patch_class_colors
-                        patch_group.attrs['last_updated'] = time.time()
+                        patch_group.attrs.update({
+                            'tissue_class_HEX_color': patch_class_colors,
+                            'last_updated': time.time(),
+                        })
                     else:
                         print(f"Warning: Class '{class_name}' not found in {patch_classification_prefix} attributes. Available classes: {patch_class_names}")
                 
@@ -6806,7 +7337,7 @@ class SegmentationHandler:
                 elif 'tissue_class_name' in patch_group and 'tissue_class_HEX_color' in patch_group:
                     raw_patch_names = safe_load_zarr_dataset(patch_group['tissue_class_name'])
                     if raw_patch_names is not None:
-                        patch_class_names = [name.decode('utf-8') if isinstance(name, (bytes, bytearray)) else str(name) for name in raw_patch_names]
+                        patch_class_names = decode_str_array(raw_patch_names).tolist()
                         if class_name in patch_class_names:
                             patch_class_index = patch_class_names.index(class_name)
                             patch_color_dataset = patch_group['tissue_class_HEX_color']
@@ -6834,8 +7365,10 @@ class SegmentationHandler:
                     if class_name in user_tissue_class_names:
                         user_tissue_index = user_tissue_class_names.index(class_name)
                         user_tissue_class_colors[user_tissue_index] = new_color
-                        user_anno_group.attrs['tissue_class_colors'] = user_tissue_class_colors
-                        user_anno_group.attrs['last_updated'] = time.time()
+                        user_anno_group.attrs.update({
+                            'tissue_class_colors': user_tissue_class_colors,
+                            'last_updated': time.time(),
+                        })
 
         # Invalidate cache
         self._user_annotation_counts_cache = None
@@ -6848,10 +7381,9 @@ class SegmentationHandler:
         # Update in-memory patch_class_hex_color to reflect the new color
         # This ensures get_patch_centroids_in_viewport and other functions see the updated color immediately
         if self.patch_class_name is not None:
-            # Convert to list for easier manipulation
-            patch_class_name_list = list(self.patch_class_name) if hasattr(self.patch_class_name, '__iter__') else []
-            if class_name in patch_class_name_list:
-                patch_class_index = patch_class_name_list.index(class_name)
+            patch_class_name_index = self._get_patch_class_name_index()
+            if class_name in patch_class_name_index:
+                patch_class_index = patch_class_name_index[class_name]
                 print(f"[DEBUG] update_patch_class_color_in_zarr: Found class '{class_name}' at index {patch_class_index}")
                 if self.patch_class_hex_color is not None:
                     # Convert to list for easier manipulation, then convert back to original format
@@ -6885,7 +7417,7 @@ class SegmentationHandler:
                 else:
                     print(f"[DEBUG] update_patch_class_color_in_zarr: patch_class_hex_color is None, cannot update")
             else:
-                print(f"[DEBUG] update_patch_class_color_in_zarr: Class '{class_name}' not found in patch_class_name: {patch_class_name_list}")
+                print(f"[DEBUG] update_patch_class_color_in_zarr: Class '{class_name}' not found in patch_class_name: {list(patch_class_name_index)}")
 
 
     def delete_class_in_zarr(self, class_name: str, reassign_to: str = "Negative control") -> Dict[str, Any]:
@@ -6949,8 +7481,10 @@ class SegmentationHandler:
                         # Remove the deleted class from both lists
                         updated_class_names = [name for i, name in enumerate(class_names) if i != class_index]
                         updated_class_colors = [color for i, color in enumerate(class_colors) if i != class_index]
-                        user_annotation_group.attrs['class_names'] = updated_class_names
-                        user_annotation_group.attrs['class_colors'] = updated_class_colors
+                        user_annotation_group.attrs.update({
+                            'class_names': updated_class_names,
+                            'class_colors': updated_class_colors,
+                        })
                         print(f"Removed '{class_name}' from user_annotation.attrs['class_names'] and ['class_colors']")
                         # Update class_names variable for subsequent processing
                         class_names = updated_class_names
@@ -6994,12 +7528,12 @@ class SegmentationHandler:
             if 'class_counts' in user_annotation_group:
                 try:
                     raw_counts = user_annotation_group['class_counts'][()]
-                    counts_dict = json.loads(raw_counts.decode('utf-8') if isinstance(raw_counts, (bytes, bytearray)) else raw_counts)
+                    counts_dict = load_json_scalar(raw_counts)
                     counts_dict.pop(class_name, None)  # Remove the deleted class
                     
                     del user_annotation_group['class_counts']
                     user_annotation_group.create_dataset('class_counts', 
-                                                       data=json.dumps(counts_dict).encode('utf-8'))
+                                                       data=orjson.dumps(counts_dict))
                 except Exception as e:
                     print(f"Warning: Failed to update class_counts: {e}")
             
@@ -7032,7 +7566,7 @@ class SegmentationHandler:
                             if 0 <= class_id < len(class_names):
                                 cls_name = class_names[class_id]
                                 # Find first occurrence of this class to get its color
-                                first_idx = np.where(valid_class_ids == class_id)[0]
+                                first_idx = np.flatnonzero(valid_class_ids == class_id)
                                 if len(first_idx) > 0:
                                     cls_color = valid_colors[first_idx[0]]
                                     if cls_color:
@@ -7043,17 +7577,21 @@ class SegmentationHandler:
                     remaining_class_names = list(remaining_classes.keys())
                     remaining_class_colors = list(remaining_classes.values())
                     
-                    user_annotation_group.attrs['class_names'] = remaining_class_names
-                    user_annotation_group.attrs['class_colors'] = remaining_class_colors
+                    user_annotation_group.attrs.update({
+                        'class_names': remaining_class_names,
+                        'class_colors': remaining_class_colors,
+                    })
                     
                     print(f"Updated user_annotation.attrs with {len(remaining_class_names)} remaining classes: {remaining_class_names}")
                     
                     # Also update ClassificationNode attributes with remaining classes
                     if 'ClassificationNode' in zarr_file:
                         classification_group = zarr_file['ClassificationNode']
-                        classification_group.attrs['class_names'] = remaining_class_names
-                        classification_group.attrs['class_colors'] = remaining_class_colors
-                        classification_group.attrs['last_updated'] = time.time()
+                        classification_group.attrs.update({
+                            'class_names': remaining_class_names,
+                            'class_colors': remaining_class_colors,
+                            'last_updated': time.time(),
+                        })
                         
                         print(f"Updated ClassificationNode with {len(remaining_class_names)} remaining classes: {remaining_class_names}")
                 else:
@@ -29,6 +29,8 @@ class ThumbnailWorker:
         self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
         self.tasks = {}  # Task cache
         self.task_lock = threading.Lock()
+        # Signalled when a task is queued or the worker is stopping; the idle worker waits on it
+        self.task_available = threading.Condition(self.task_lock)
         self.ws_notifier = None
         self.running = False
         self.worker_thread = None
@@ -50,6 +52,8 @@ class ThumbnailWorker:
             return
             
         self.running = False
+        with self.task_available:
+            self.task_available.notify_all()
         if self.worker_thread and self.worker_thread.is_alive():
             self.worker_thread.join(timeout=5)
             
@@ -64,8 +68,12 @@ class ThumbnailWorker:
         """Main worker loop for processing tasks"""
         while self.running:
             try:
-                # Process pending tasks
-                with self.task_lock:
+                # Block until a task is submitted (or shutdown)
+                with self.task_available:
+                    self.task_available.wait_for(
+                        lambda: not self.running or any(task['status'] == 'pending' for task in self.tasks.values()),
+                        timeout=1.0
+                    )
                     pending_tasks = [task_id for task_id, task in self.tasks.items() 
                                    if task['status'] == 'pending']
                 
@@ -73,8 +81,6 @@ class ThumbnailWorker:
                     if not self.running:
                         break
                     self._process_task(task_id)
-                    
-                time.sleep(0.1)  # Small delay to prevent busy waiting
                 
             except Exception as e:
                 logger.error(f"Error in worker loop: {str(e)}")
@@ -549,8 +555,9 @@ class ThumbnailWorker:
             'result': None
         }
         
-        with self.task_lock:
+        with self.task_available:
             self.tasks[task_id] = task
+            self.task_available.notify()
             
         logger.info(f"Submitted thumbnail task {task_id} for session {session_id}")
         return task_id
@@ -572,8 +579,9 @@ class ThumbnailWorker:
             'result': None
         }
         
-        with self.task_lock:
+        with self.task_available:
             self.tasks[task_id] = task
+            self.task_available.notify()
             
         if session_id:
             logger.info(f"Submitted preview task {task_id} for session {session_id}")
@@ -198,6 +198,26 @@ def safe_convert_dataset(
         return False
 
 
+def collect_group_members(h5_group: h5py.Group, prefix: str = ""):
+    groups = []
+    datasets = []
+
+    # keys() resolves every link name, so hard-link aliases and soft-linked groups each get an entry
+    for key in h5_group.keys():
+        obj = h5_group[key]
+        name = f"{prefix}/{key}" if prefix else key
+
+        if isinstance(obj, h5py.Group):
+            groups.append((name, obj))
+            sub_groups, sub_datasets = collect_group_members(obj, name)
+            groups.extend(sub_groups)
+            datasets.extend(sub_datasets)
+        elif isinstance(obj, h5py.Dataset):
+            datasets.append((name, obj))
+
+    return groups, datasets
+
+
 def convert_group_parallel(
     h5_group: h5py.Group,
     zarr_group: zarr.Group,
@@ -206,24 +226,21 @@ def convert_group_parallel(
     stats: ConversionStats,
     logger: logging.Logger,
 ):
-    datasets_to_convert = []
+    # Walk the whole tree once; parents are listed before their children,
+    # so subgroups can be created in order before any dataset is written.
+    groups, datasets = collect_group_members(h5_group)
 
-    for key in h5_group.keys():
-        obj = h5_group[key]
-        current_path = f"{path}/{key}" if path else key
+    for key, obj in groups:
+        zarr_subgroup = zarr_group.create_group(key, overwrite=True)
+        stats.total_groups += 1
 
-        if isinstance(obj, h5py.Group):
-            zarr_subgroup = zarr_group.create_group(key, overwrite=True)
-            stats.total_groups += 1
+        if obj.attrs:
+            zarr_subgroup.attrs.update(dict(obj.attrs))
 
-            if obj.attrs:
-                zarr_subgroup.attrs.update(dict(obj.attrs))
-
-            convert_group_parallel(obj, zarr_subgroup, current_path, config, stats, logger)
-
-        elif isinstance(obj, h5py.Dataset):
-            stats.total_datasets += 1
-            datasets_to_convert.append((obj, key, current_path))
+    stats.total_datasets += len(datasets)
+    datasets_to_convert = [
+        (obj, key, f"{path}/{key}" if path else key) for key, obj in datasets
+    ]
 
     if datasets_to_convert and config.max_workers > 1:
         with ThreadPoolExecutor(max_workers=config.max_workers) as executor:
@@ -238,7 +255,7 @@ def convert_group_parallel(
                 try:
                     future.result(timeout=300)
                     if config.verbose:
-                        logger.info(f"Processed dataset: {current_path}")
+                        logger.info("Processed dataset: %s", current_path)
                 except Exception as e:
                     logger.error(f"Failed to process dataset {current_path}: {e}")
                     stats.add_error(current_path, str(e))
@@ -246,7 +263,7 @@ def convert_group_parallel(
                     stats.skipped_datasets += 1
     else:
         for h5_dataset, key, current_path in datasets_to_convert:
-            logger.info(f"Processing dataset: {current_path}")
+            logger.debug("Processing dataset: %s", current_path)
             safe_convert_dataset(h5_dataset, zarr_group, key, config, stats, logger)
 
             if stats.should_report_progress(config.progress_interval):
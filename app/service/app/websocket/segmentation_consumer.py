@@ -893,9 +893,9 @@ async def handle_segmentation_message(
                     }
 
                     # Check if we should compress
+                    # orjson writes the UTF-8 bytes directly; non-str keys are stringified like json.dumps
                     json_start = time.time()
-                    json_str = json.dumps(payload, default=str)
-                    json_bytes = json_str.encode('utf-8')
+                    json_bytes = orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS)
                     json_time = time.time() - json_start
 
                     if len(json_bytes) > 1024:
@@ -913,7 +913,7 @@ async def handle_segmentation_message(
                         logger.info(f"WebSocket: Sent {len(patches)} patches (compressed {len(json_bytes)/(1024*1024):.2f}MB -> {len(compressed)/(1024*1024):.2f}MB)")
                     else:
                         send_start = time.time()
-                        await websocket.send_text(json_str)
+                        await websocket.send_text(json_bytes.decode('utf-8'))
                         send_time = time.time() - send_start
                         logger.info(f"WebSocket: JSON: {json_time*1000:.2f}ms, Send: {send_time*1000:.2f}ms, Total: {(json_time + send_time)*1000:.2f}ms")
                 except Exception as e:
@@ -0,0 +1,25 @@
+import pytest
+
+zarr = pytest.importorskip("zarr")
+orjson = pytest.importorskip("orjson")
+seg_service = pytest.importorskip("app.services.seg_service")
+
+
+def test_load_json_array_round_trips_orjson_blob(tmp_path):
+    counts = {"Tumor": 3, "Négative control": 1}
+    root = zarr.open(str(tmp_path / "slide.zarr"), "a")
+    user_group = root.require_group("user_annotation")
+    # Written the way the count writers write it
+    user_group.create_dataset("class_counts", data=orjson.dumps(counts))
+
+    handler = seg_service.SegmentationHandler()
+    array = zarr.open(str(tmp_path / "slide.zarr"), "r")["user_annotation/class_counts"]
+    assert handler._load_json_array(array) == counts
+    # Second read is served from the stamp-keyed cache
+    assert handler._load_json_array(array) is handler._load_json_array(array)
+
+
+def test_load_json_scalar_accepts_numpy_str():
+    np = pytest.importorskip("numpy")
+    assert seg_service.load_json_scalar(np.str_('{"a": 1}')) == {"a": 1}
+    assert seg_service.load_json_scalar(np.bytes_(b'{"a": 1}')) == {"a": 1}
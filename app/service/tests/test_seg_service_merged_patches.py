@@ -0,0 +1,166 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("scipy")
+seg_service = pytest.importorskip("app.services.seg_service")
+
+
+def baseline_merged_patches(handler):
+    # Flood fill from process_and_store_merged_patches before the query_pairs + connected_components rewrite,
+    # returning {id: (color, points, bounds)}
+    coordinates = handler.patch_coordinates
+    class_id = handler.patch_class_id
+    class_name = handler.patch_class_name
+    class_color = handler.patch_class_hex_color
+
+    visited = np.zeros(len(coordinates), dtype=bool)
+    centers = np.column_stack([
+        (coordinates[:, 0] + coordinates[:, 2]) / 2,
+        (coordinates[:, 1] + coordinates[:, 3]) / 2
+    ])
+    dimensions = np.column_stack([
+        coordinates[:, 2] - coordinates[:, 0],
+        coordinates[:, 3] - coordinates[:, 1]
+    ])
+
+    def is_adjacent_vectorized(current_idx, other_indices, tolerance=1e-6):
+        current_center = centers[current_idx]
+        other_centers = centers[other_indices]
+        current_dim = dimensions[current_idx]
+        other_dims = dimensions[other_indices]
+        dx = np.abs(other_centers[:, 0] - current_center[0])
+        dy = np.abs(other_centers[:, 1] - current_center[1])
+        avg_width = (current_dim[0] + other_dims[:, 0]) / 2
+        avg_height = (current_dim[1] + other_dims[:, 1]) / 2
+        return (dx <= avg_width + tolerance) & (dy <= avg_height + tolerance)
+
+    def find_connected_patches(start_idx):
+        connected = []
+        stack = [start_idx]
+        if class_color is not None and class_id is not None:
+            start_color = class_color[class_id[start_idx]]
+            start_class_name = class_name[class_id[start_idx]] if class_name is not None else None
+            if isinstance(start_color, bytes):
+                start_color = start_color.decode('utf-8')
+            if isinstance(start_class_name, bytes):
+                start_class_name = start_class_name.decode('utf-8')
+            if start_color == "#aaaaaa" or (start_class_name and start_class_name.lower() == "negative control"):
+                return [], None
+        else:
+            start_color = None
+
+        while stack:
+            current = stack.pop()
+            if visited[current]:
+                continue
+            visited[current] = True
+            connected.append(current)
+            unvisited_indices = np.where(~visited)[0]
+            if len(unvisited_indices) == 0:
+                continue
+            adjacent_indices = unvisited_indices[is_adjacent_vectorized(current, unvisited_indices)]
+            if start_color is not None and len(adjacent_indices) > 0:
+                colors = class_color[class_id[adjacent_indices]]
+                colors = np.array([c.decode('utf-8') if isinstance(c, bytes) else c for c in colors])
+                adjacent_indices = adjacent_indices[colors == start_color]
+            stack.extend(adjacent_indices)
+        return connected, start_color if start_color else "#aaaaaa"
+
+    def get_contour_points(patches):
+        coords = coordinates[patches]
+        min_x = np.min(coords[:, 0])
+        min_y = np.min(coords[:, 1])
+        width = int(np.max(coords[:, 2]) - min_x + 1)
+        height = int(np.max(coords[:, 3]) - min_y + 1)
+        mask = np.zeros((height, width), dtype=np.uint8)
+        for x1, y1, x2, y2 in coords:
+            mask[int(y1 - min_y):int(y2 - min_y)+1, int(x1 - min_x):int(x2 - min_x)+1] = 1
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        largest_contour = max(contours, key=cv2.contourArea)
+        points = [[float(point[0][0] + min_x), float(point[0][1] + min_y)] for point in largest_contour]
+        if points and points[0] != points[-1]:
+            points.append(points[0])
+        return points
+
+    merged = {}
+    for i in range(len(coordinates)):
+        if not visited[i]:
+            connected_patches, color = find_connected_patches(i)
+            if connected_patches and color:
+                points = get_contour_points(connected_patches)
+                xs = [p[0] for p in points]
+                ys = [p[1] for p in points]
+                bounds = {"minX": min(xs), "minY": min(ys), "maxX": max(xs), "maxY": max(ys)}
+                merged[f"merged_patch_{len(merged)}"] = (color, points, bounds)
+    return merged
+
+
+def assert_matches_baseline(handler):
+    expected = baseline_merged_patches(handler)
+    handler.process_and_store_merged_patches()
+    merged = handler._merged_patches_cache
+    assert list(merged) == list(expected)
+    for patch_id, (color, points, bounds) in expected.items():
+        annotation = merged[patch_id]["annotation"]
+        assert annotation["bodies"][0]["value"] == color
+        geometry = annotation["target"]["selector"]["geometry"]
+        np.testing.assert_array_equal(np.asarray(geometry["points"]), np.asarray(points))
+        assert geometry["bounds"] == bounds
+        assert merged[patch_id]["bounds"] == bounds
+
+
+def make_handler(coords, class_id=None, names=None, colors=None, as_bytes=False):
+    handler = seg_service.SegmentationHandler()
+    handler.patch_coordinates = np.asarray(coords)
+    if class_id is not None:
+        handler.patch_class_id = np.asarray(class_id)
+        handler.patch_class_name = np.array([n.encode() if as_bytes else n for n in names], dtype=object)
+        handler.patch_class_hex_color = np.array([c.encode() if as_bytes else c for c in colors], dtype=object)
+    return handler
+
+
+def random_grid(rng, size=14, step=16, fill=0.7):
+    # Grid tiles touch edge to edge, so neighbours (diagonals too) are adjacent
+    coords = [[col * step, row * step, col * step + step, row * step + step]
+              for row in range(size) for col in range(size) if rng.random() < fill]
+    # A few off-grid and oversized patches bridging or overlapping tiles
+    for _ in range(rng.randint(0, 4)):
+        x = rng.randint(0, size * step)
+        y = rng.randint(0, size * step)
+        coords.append([x, y, x + rng.choice([8, 16, 40]), y + rng.choice([8, 16, 40])])
+    return coords
+
+
+NAMES = ["Tumor", "Stroma", "Negative control", "Background", "Lymphocytes"]
+
+
+@pytest.mark.parametrize("as_bytes", [False, True])
+def test_random_grids_match_flood_fill(as_bytes):
+    rng = random.Random(7 if as_bytes else 3)
+    for trial in range(25):
+        coords = random_grid(rng)
+        colors = ["#ff0000", "#00ff00", "#0000ff", "#aaaaaa", "#ffff00"]
+        if trial % 2:
+            # Negative control shares Tumor's color, so a Tumor fill may absorb it
+            colors[2] = colors[0]
+        class_id = [rng.randrange(len(NAMES)) for _ in coords]
+        assert_matches_baseline(make_handler(coords, class_id, NAMES, colors, as_bytes))
+
+
+def test_single_class_and_no_class_names():
+    rng = random.Random(11)
+    coords = random_grid(rng)
+    handler = make_handler(coords, [0] * len(coords), ["Tumor"], ["#ff0000"])
+    assert_matches_baseline(handler)
+    handler = make_handler(coords, [rng.randrange(2) for _ in coords], ["Tumor", "Stroma"], ["#ff0000", "#00ff00"])
+    handler.patch_class_name = None
+    assert_matches_baseline(handler)
+
+
+def test_without_classification_everything_adjacent_merges():
+    rng = random.Random(5)
+    for _ in range(10):
+        assert_matches_baseline(make_handler(random_grid(rng, fill=0.5)))
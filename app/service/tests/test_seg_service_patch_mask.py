@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+seg_service = pytest.importorskip("app.services.seg_service")
+
+
+def baseline_patch_mask(coords, min_x, min_y, height, width):
+    # Per-patch slice fill from get_contour_points before fill_patch_mask
+    mask = np.zeros((height, width), dtype=np.uint8)
+    for x1, y1, x2, y2 in coords:
+        x1_rel = int(x1 - min_x)
+        y1_rel = int(y1 - min_y)
+        x2_rel = int(x2 - min_x)
+        y2_rel = int(y2 - min_y)
+        mask[y1_rel:y2_rel+1, x1_rel:x2_rel+1] = 1
+    return mask
+
+
+def assert_matches_baseline(coords):
+    coords = np.asarray(coords)
+    min_x = np.min(coords[:, 0])
+    min_y = np.min(coords[:, 1])
+    width = int(np.max(coords[:, 2]) - min_x + 1)
+    height = int(np.max(coords[:, 3]) - min_y + 1)
+    mask = seg_service.fill_patch_mask(coords, min_x, min_y, height, width)
+    assert mask.dtype == np.uint8
+    np.testing.assert_array_equal(mask, baseline_patch_mask(coords, min_x, min_y, height, width))
+
+
+def test_random_layouts_match_slicing():
+    rng = random.Random(0)
+    for _ in range(300):
+        coords = []
+        for _ in range(rng.randint(1, 12)):
+            x1 = rng.uniform(0, 40) if rng.random() < 0.3 else rng.randint(0, 40)
+            y1 = rng.uniform(0, 40) if rng.random() < 0.3 else rng.randint(0, 40)
+            coords.append([x1, y1, x1 + rng.randint(0, 15), y1 + rng.randint(0, 15)])
+        assert_matches_baseline(coords)
+
+
+def test_patch_grid_matches_slicing():
+    step = 16
+    rng = np.random.default_rng(0)
+    cells = np.argwhere(rng.random((12, 12)) < 0.6)
+    coords = np.column_stack([cells[:, 1] * step, cells[:, 0] * step,
+                              cells[:, 1] * step + step, cells[:, 0] * step + step]).astype(np.int64)
+    assert_matches_baseline(coords)
+
+
+def test_many_overlapping_patches():
+    # More overlaps at one pixel than an int16 counter holds
+    assert_matches_baseline(np.tile([[0, 0, 3, 3], [2, 2, 5, 5]], (20000, 1)))
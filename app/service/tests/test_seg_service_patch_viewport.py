@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+seg_service = pytest.importorskip("app.services.seg_service")
+
+
+def baseline_indices(coords, x1, y1, x2, y2):
+    # Full-array overlap mask from get_patch_centroids_in_viewport before the sorted-x1 band search
+    mask = (coords[:, 2] >= x1) & (coords[:, 0] <= x2) & (coords[:, 3] >= y1) & (coords[:, 1] <= y2)
+    return np.where(mask)[0]
+
+
+def assert_matches_baseline(handler, box):
+    indices = handler._patch_indices_in_box(*box)
+    np.testing.assert_array_equal(indices, baseline_indices(handler.patch_coordinates, *box))
+
+
+def random_patches(rng, count, as_float):
+    coords = []
+    for _ in range(count):
+        x1 = rng.uniform(-50, 2000) if as_float else rng.randint(-50, 2000)
+        y1 = rng.uniform(-50, 2000) if as_float else rng.randint(-50, 2000)
+        # Mostly tile-sized, with the odd wide or inverted patch
+        width = rng.choice([0, 16, 64, 256, 700, -8])
+        height = rng.choice([0, 16, 64, 256, -8])
+        coords.append([x1, y1, x1 + width, y1 + height])
+    return np.array(coords, dtype=np.float64 if as_float else np.int64)
+
+
+def random_boxes(rng, coords):
+    boxes = []
+    for _ in range(40):
+        x1 = rng.uniform(-100, 2100)
+        y1 = rng.uniform(-100, 2100)
+        boxes.append((x1, y1, x1 + rng.uniform(0, 600), y1 + rng.uniform(0, 600)))
+    # Boxes whose edges land exactly on patch edges, where >= and <= decide
+    for x1, y1, x2, y2 in coords[:20]:
+        boxes.append((x2, y2, x2 + 10, y2 + 10))
+        boxes.append((x1 - 10, y1 - 10, x1, y1))
+        boxes.append((x1, y1, x1, y1))
+    return boxes
+
+
+@pytest.mark.parametrize("as_float", [False, True])
+def test_band_search_matches_full_mask(as_float):
+    rng = random.Random(1 if as_float else 0)
+    handler = seg_service.SegmentationHandler()
+    for count in (1, 5, 200, 2000):
+        handler.patch_coordinates = random_patches(rng, count, as_float)
+        for box in random_boxes(rng, handler.patch_coordinates):
+            assert_matches_baseline(handler, box)
+
+
+def test_index_follows_new_coordinates_array():
+    handler = seg_service.SegmentationHandler()
+    handler.patch_coordinates = np.array([[0, 0, 16, 16], [100, 0, 116, 16]])
+    assert_matches_baseline(handler, (90, 0, 120, 20))
+    # A reload swaps in a new array; the cached x1 index must not be reused for it
+    handler.patch_coordinates = np.array([[90, 0, 300, 16], [0, 0, 16, 16]])
+    assert_matches_baseline(handler, (200, 0, 210, 20))
+
+
+def test_non_finite_width_falls_back_to_full_mask():
+    handler = seg_service.SegmentationHandler()
+    handler.patch_coordinates = np.array([[0.0, 0.0, np.inf, 16.0], [50.0, 0.0, 66.0, 16.0]])
+    assert_matches_baseline(handler, (1000.0, 0.0, 1010.0, 10.0))
+    assert_matches_baseline(handler, (40.0, 0.0, 60.0, 10.0))
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+seg_service = pytest.importorskip("app.services.seg_service")
+
+
+def baseline_keep(user_ts_str, model_ts):
+    # Per-annotation check from _apply_manual_patch_annotations before timestamps_newer_than
+    keep = True
+    if user_ts_str and model_ts is not None:
+        try:
+            keep = datetime.strptime(user_ts_str, '%Y-%m-%d %H:%M:%S.%f') > model_ts
+        except ValueError:
+            pass
+    return keep
+
+
+def assert_matches_baseline(stamps, reference):
+    expected = [baseline_keep(ts, reference) for ts in stamps]
+    assert seg_service.timestamps_newer_than(stamps, reference).tolist() == expected
+
+
+def test_fixed_width_stamps_match_strptime():
+    rng = random.Random(0)
+    reference = datetime(2024, 5, 17, 12, 30, 15, 123456)
+    for precision in (1, 3, 6):
+        stamps = []
+        for _ in range(200):
+            ts = reference + timedelta(microseconds=rng.randint(-2_000_000, 2_000_000))
+            stamps.append(ts.strftime('%Y-%m-%d %H:%M:%S.%f')[:20 + precision])
+        # Equal up to the stamps' precision: strict '>' must not count them as newer
+        stamps.append(reference.strftime('%Y-%m-%d %H:%M:%S.%f')[:20 + precision])
+        assert_matches_baseline(stamps, reference)
+
+
+def test_other_layouts_keep_strptime_semantics():
+    reference = datetime(2024, 5, 17, 12, 30, 15, 500000)
+    stamps = [
+        '2024-05-17 12:30:16.000',
+        '2024-05-17T12:30:16.000',  # 'T' separator: strptime rejects it, so it counts as newer
+        '2024-05-17',
+        '2024-05-17 12:30:14',
+        '2024-5-17 12:30:16.1',  # strptime accepts unpadded fields
+        'not a timestamp',
+        '',
+        None,
+        '2024-05-17 12:30:14.999999',
+    ]
+    assert_matches_baseline(stamps, reference)
+
+
+def test_missing_stamps_are_kept():
+    reference = datetime(2024, 1, 1)
+    assert_matches_baseline([None, '', None], reference)
+    assert seg_service.timestamps_newer_than([], reference).tolist() == []